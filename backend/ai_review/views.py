@@ -1,11 +1,13 @@
 import os
 import json
+import time
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from judgeflow import metrics
 from problems.models import Problem, Submission
 from .models import AIReviewResult, ProgressSnapshot
 
@@ -86,6 +88,7 @@ class GeminiCodeAnalyzer:
         """Helper to safely call Gemini and always return text or fallback."""
         if not model:
             return None
+        started = time.perf_counter()
         try:
             # Call Gemini with longer timeout
             response = model.generate_content(prompt, 
@@ -98,10 +101,14 @@ class GeminiCodeAnalyzer:
                 parts = response.candidates[0].content.parts
                 if parts:
                     return parts[0].text
+            metrics.inc('gemini_failures_total', reason='empty_response')
             return None
         except Exception as e:
             print(f"[Gemini] API call failed: {e}")
+            metrics.inc('gemini_failures_total', reason=type(e).__name__)
             return None
+        finally:
+            metrics.observe('gemini_request_seconds', time.perf_counter() - started)
 
     def analyze_code_completion(self, question_text, user_code, language):
         prompt = f"""
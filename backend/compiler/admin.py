@@ -1,8 +1,15 @@
 from django.contrib import admin
-from .models import AIReview
+from .models import AIReview, VerdictCache
 
 @admin.register(AIReview)
 class AIReviewAdmin(admin.ModelAdmin):
     list_display = ('submission', 'created_at')
     search_fields = ('submission__user__username', 'submission__problem__title')
-    readonly_fields = ('created_at',)
\ No newline at end of file
+    readonly_fields = ('created_at',)
+
+@admin.register(VerdictCache)
+class VerdictCacheAdmin(admin.ModelAdmin):
+    list_display = ('problem', 'language', 'status', 'hits', 'created_at')
+    list_filter = ('language', 'status')
+    search_fields = ('problem__title', 'code_hash')
+    readonly_fields = ('created_at',)
@@ -0,0 +1,168 @@
+"""
+Admission control for the endpoints that execute code: a cap on runs in
+flight across the web processes and a token bucket per user or client
+address, both configured in JUDGE_ADMISSION. A request over either limit
+gets a 429 with a Retry-After header.
+"""
+import fcntl
+import json
+import math
+import os
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+BUCKETS_NAME = '{budget}-buckets.json'
+SLOT_NAME = '{budget}-slot-{index}.lock'
+LOCK_NAME = '.lock'
+
+
+class Slot:
+    """One of a budget's in-flight slots; released by release() or on leaving a with block."""
+
+    def __init__(self, fd):
+        self.fd = fd
+
+    def release(self):
+        if self.fd is not None:
+            # Closing the file drops its lock
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
+
+
+def budget_settings(budget):
+    return settings.JUDGE_ADMISSION[budget]
+
+
+def admission_root():
+    root = str(settings.JUDGE_ADMISSION_DIR)
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def check_rate(request, budget):
+    """
+    Take a token from the client's bucket for this budget.
+    Returns None if the request may go ahead, otherwise a 429 response.
+    """
+    config = budget_settings(budget)
+    identity = client_identity(request)
+    rate = config['per_minute'] / 60
+    now = time.time()
+
+    with _locked():
+        path = os.path.join(admission_root(), BUCKETS_NAME.format(budget=budget))
+        buckets = _load(path)
+        tokens, updated = buckets.get(identity, (config['burst'], now))
+        tokens = min(config['burst'], tokens + (now - updated) * rate)
+        admitted = tokens >= 1
+        if admitted:
+            tokens -= 1
+        buckets[identity] = (tokens, now)
+
+        # Full buckets are the same as missing ones, so they are not kept
+        buckets = {
+            key: (left, at) for key, (left, at) in buckets.items()
+            if left + (now - at) * rate < config['burst']
+        }
+        _save(path, buckets)
+
+    if admitted:
+        return None
+    retry_after = math.ceil((1 - tokens) / rate) if rate > 0 else None
+    return _too_many_requests('You are sending requests too quickly', retry_after)
+
+
+def acquire_slot(budget):
+    """A free in-flight slot of the budget, or None if all are taken."""
+    root = admission_root()
+    count = budget_settings(budget)['slots']
+    start = random.randrange(count) if count else 0
+    for offset in range(count):
+        path = os.path.join(root, SLOT_NAME.format(budget=budget, index=(start + offset) % count))
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            continue
+        return Slot(fd)
+    return None
+
+
+def busy_response(budget):
+    """The 429 response for a request that found no free slot."""
+    return _too_many_requests('The judge is busy', budget_settings(budget)['retry_after'])
+
+
+def client_identity(request):
+    """Who a request counts against: the logged-in user, else the client address."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        # Plain Django views do not see the API's JWT logins on their own
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except (InvalidToken, TokenError, AuthenticationFailed):
+            # A bad or stale token, or one of a deleted or inactive user
+            authenticated = None
+        user = authenticated[0] if authenticated else None
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'address:{client_address(request)}'
+
+
+def client_address(request):
+    """The client's address, as seen by the trusted proxy if there is one."""
+    header = settings.JUDGE_ADMISSION_CLIENT_ADDRESS_HEADER
+    if header:
+        # The proxy appends the address it saw to whatever the client sent
+        address = request.headers.get(header, '').split(',')[-1].strip()
+        if address:
+            return address
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _too_many_requests(message, retry_after):
+    response = JsonResponse({'error': message, 'retry_after': retry_after}, status=429)
+    if retry_after is not None:
+        response['Retry-After'] = str(retry_after)
+    return response
+
+
+@contextmanager
+def _locked():
+    with open(os.path.join(admission_root(), LOCK_NAME), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _load(path):
+    try:
+        with open(path) as f:
+            return {key: tuple(value) for key, value in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(path, buckets):
+    # Written to a temporary file and renamed, so a crash never leaves half a file
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(buckets, f)
+    os.replace(temp_path, path)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CompilerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'compiler'
+
+    def ready(self):
+        # Connects the test data storage and verdict cache invalidation handlers
+        from . import signals  # noqa: F401
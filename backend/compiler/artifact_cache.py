@@ -0,0 +1,267 @@
+"""
+Content-addressed cache of compiled submissions, shared by the worker
+processes through JUDGE_ARTIFACT_CACHE_DIR and kept under
+JUDGE_ARTIFACT_CACHE_MAX_BYTES by evicting the least recently used builds.
+"""
+import atexit
+import fcntl
+import functools
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+from django.conf import settings
+
+ARTIFACT_NAME = 'artifact'
+COMPILE_ERROR_NAME = 'compile_error'
+STATS_NAME = 'stats.json'
+LOCK_NAME = '.lock'
+
+COUNTERS = ('hits', 'misses', 'stores', 'evictions')
+
+# How often a process adds its counters to the stats file, in seconds
+STATS_FLUSH_SECONDS = 5
+
+# Eviction goes down to this fraction of the limit, so the next few stores
+# do not walk the cache again
+EVICT_TO_FRACTION = 0.9
+
+# This process's counts (and bytes stored) not yet in the stats file
+_pending = {}
+_pending_lock = Lock()
+_pending_pid = None
+_flushed_at = 0.0
+
+
+def is_enabled():
+    return bool(settings.JUDGE_ARTIFACT_CACHE_DIR)
+
+
+def cache_root():
+    root = str(settings.JUDGE_ARTIFACT_CACHE_DIR)
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+@functools.lru_cache(maxsize=None)
+def compiler_version(compiler):
+    """First line of `<compiler> --version`, part of every cache key."""
+    try:
+        process = subprocess.run([compiler, '--version'], capture_output=True, text=True, timeout=10)
+        return process.stdout.splitlines()[0] if process.stdout else ''
+    except Exception:
+        return ''
+
+
+def cache_key(language, code, compile_command):
+    """Hash of everything that affects the build output."""
+    digest = hashlib.sha256()
+    for part in (language, compiler_version(compile_command[0]), '\0'.join(compile_command), code):
+        digest.update(part.encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _entry_dir(key):
+    return os.path.join(cache_root(), key[:2], key)
+
+
+@contextmanager
+def _locked():
+    with open(os.path.join(cache_root(), LOCK_NAME), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _bump(counter, amount=1):
+    """Add to one of the counters shared by every worker, in a while."""
+    global _pending, _pending_pid
+    with _pending_lock:
+        # A forked worker must not count its parent's events again
+        if _pending_pid != os.getpid():
+            _pending, _pending_pid = {}, os.getpid()
+            atexit.register(_flush)
+        _pending[counter] = _pending.get(counter, 0) + amount
+        due = time.monotonic() - _flushed_at >= STATS_FLUSH_SECONDS
+    if due:
+        _flush()
+
+
+def _flush():
+    """Add this process's pending counts to the stats file."""
+    global _pending, _flushed_at
+    with _pending_lock:
+        pending, _pending = _pending, {}
+        _flushed_at = time.monotonic()
+    if not pending:
+        return
+    with _locked():
+        counters = _read_stats()
+        for counter, amount in pending.items():
+            counters[counter] = counters.get(counter, 0) + amount
+        _write_stats(counters)
+
+
+def _write_stats(counters):
+    # Called with the lock held
+    stats_path = os.path.join(cache_root(), STATS_NAME)
+    with open(stats_path + '.tmp', 'w') as f:
+        json.dump(counters, f)
+    os.replace(stats_path + '.tmp', stats_path)
+
+
+def _read_stats():
+    try:
+        with open(os.path.join(cache_root(), STATS_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def lookup(key, destination):
+    """
+    Look a build up: ('artifact', destination) with the binary copied to
+    destination, ('compile_error', message), or None on a miss.
+    """
+    entry = _entry_dir(key)
+    try:
+        if os.path.exists(os.path.join(entry, ARTIFACT_NAME)):
+            # A copy, not a link: the judged program can write to its workspace
+            shutil.copy2(os.path.join(entry, ARTIFACT_NAME), destination)
+            hit = ('artifact', destination)
+        elif os.path.exists(os.path.join(entry, COMPILE_ERROR_NAME)):
+            with open(os.path.join(entry, COMPILE_ERROR_NAME)) as f:
+                hit = ('compile_error', f.read())
+        else:
+            hit = None
+    except OSError:
+        # Evicted by another worker between the check and the read
+        hit = None
+
+    if hit is None:
+        _bump('misses')
+        return None
+
+    # Mark the entry as recently used
+    try:
+        os.utime(entry)
+    except OSError:
+        pass
+    _bump('hits')
+    return hit
+
+
+def store(key, artifact_path=None, compile_error=None):
+    """Save a built binary or a compile error under key."""
+    root = cache_root()
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=root)
+    try:
+        if artifact_path is not None:
+            shutil.copy2(artifact_path, os.path.join(staging, ARTIFACT_NAME))
+            size = os.path.getsize(os.path.join(staging, ARTIFACT_NAME))
+        else:
+            with open(os.path.join(staging, COMPILE_ERROR_NAME), 'w') as f:
+                f.write(compile_error)
+            size = os.path.getsize(os.path.join(staging, COMPILE_ERROR_NAME))
+
+        entry = _entry_dir(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        try:
+            os.rename(staging, entry)
+        except OSError:
+            # Another worker stored the same build first
+            return
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    _bump('stores')
+    _bump('bytes', size)
+    if _estimated_bytes() > settings.JUDGE_ARTIFACT_CACHE_MAX_BYTES:
+        evict()
+
+
+def _estimated_bytes():
+    """Size of the cache as of the last eviction, plus what was stored since."""
+    shared = _read_stats().get('bytes')
+    if shared is None:
+        # Not measured yet; evict() measures it
+        return float('inf')
+    with _pending_lock:
+        return shared + _pending.get('bytes', 0)
+
+
+def evict(max_bytes=None):
+    """
+    Remove least recently used entries until the cache fits in max_bytes,
+    or down to EVICT_TO_FRACTION of JUDGE_ARTIFACT_CACHE_MAX_BYTES by default.
+    """
+    if max_bytes is None:
+        max_bytes = int(settings.JUDGE_ARTIFACT_CACHE_MAX_BYTES * EVICT_TO_FRACTION)
+
+    with _locked():
+        entries = []
+        total = 0
+        for entry in _entries():
+            size = sum(
+                os.path.getsize(os.path.join(entry, name))
+                for name in os.listdir(entry)
+            )
+            entries.append((os.path.getmtime(entry), size, entry))
+            total += size
+
+        evicted = 0
+        for _, size, entry in sorted(entries):
+            if total <= max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            evicted += 1
+
+        # The walk counted what this process stored, so the estimate starts over from it
+        with _pending_lock:
+            _pending.pop('bytes', None)
+        counters = _read_stats()
+        counters['bytes'] = total
+        counters['evictions'] = counters.get('evictions', 0) + evicted
+        _write_stats(counters)
+    return evicted
+
+
+def clear():
+    """Remove every entry; the counters are kept."""
+    return evict(max_bytes=0)
+
+
+def stats():
+    """Shared counters plus the current number of entries and their size."""
+    _flush()
+    counters = {name: 0 for name in COUNTERS}
+    with _locked():
+        counters.update(_read_stats())
+        entries = list(_entries())
+        counters['entries'] = len(entries)
+        counters['bytes'] = sum(
+            os.path.getsize(os.path.join(entry, name))
+            for entry in entries
+            for name in os.listdir(entry)
+        )
+    return counters
+
+
+def _entries():
+    root = cache_root()
+    for prefix in os.listdir(root):
+        prefix_dir = os.path.join(root, prefix)
+        if len(prefix) != 2 or not os.path.isdir(prefix_dir):
+            continue
+        for key in os.listdir(prefix_dir):
+            yield os.path.join(prefix_dir, key)
@@ -0,0 +1,285 @@
+"""
+Asyncio versions of the execution helpers, for async views under ASGI.
+They behave like the blocking versions but always start a fresh process.
+"""
+import asyncio
+import os
+import signal
+import time
+
+from judgeflow import metrics
+
+from . import cgroups, launcher, workspaces
+from .execution import COMPILE_TIMED_OUT, COMPILE_TIMEOUT, ExecutionSession
+from .processes import (
+    DEFAULT_OUTPUT_LIMIT,
+    MAX_ERROR_BYTES,
+    MAX_OUTPUT_BYTES,
+    READ_CHUNK_SIZE,
+    WRITE_CHUNK_SIZE,
+    _usage,
+    apply_rlimits,
+    outcome_result,
+    read_launcher_usage,
+)
+
+
+async def run_process_async(command, input_data, timeout, limits=None, comparator=None, cwd=None):
+    """
+    Run a command like processes.run_process(), without blocking the event loop.
+    The process is killed if the calling task is cancelled.
+    """
+    stats_fd = None
+    cgroup = None
+    launcher_path = launcher.get_launcher()
+    pass_fds = ()
+    if launcher_path is not None:
+        limit_args = limits.launcher_args() if limits is not None else []
+        cgroup = cgroups.create(limits)
+        if cgroup is not None:
+            limit_args += ['-g', cgroup.procs_path]
+        stats_fd, stats_w = os.pipe()
+        command = [launcher_path, str(stats_w), *limit_args, '--', *command]
+        pass_fds = (stats_w,)
+
+    started = time.perf_counter()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+            pass_fds=pass_fds,
+            start_new_session=True,
+        )
+    except Exception as e:
+        if stats_fd is not None:
+            os.close(stats_fd)
+        if cgroup is not None:
+            await asyncio.to_thread(cgroup.remove)
+        return {'output': str(e), 'error': True}
+    finally:
+        if pass_fds:
+            os.close(pass_fds[0])
+    spawn_time = time.perf_counter() - started
+
+    if launcher_path is None and limits is not None:
+        # Best effort: the program is already running at this point
+        try:
+            apply_rlimits(process.pid, limits)
+        except OSError:
+            pass
+
+    try:
+        result = await communicate_async(process, input_data, timeout, limits, comparator, stats_fd, cgroup)
+        result['spawn_time'] = spawn_time
+        return result
+    finally:
+        if stats_fd is not None:
+            os.close(stats_fd)
+        if cgroup is not None:
+            # Kills anything the program left behind
+            await asyncio.to_thread(cgroup.remove)
+
+
+async def communicate_async(process, input_data, timeout, limits=None, comparator=None, stats_fd=None, cgroup=None):
+    """
+    processes.communicate() for an asyncio subprocess started in its own session.
+    stats_fd is the read end of the launcher's stats pipe, if there is one,
+    and cgroup the program's cgroups.ControlGroup, if it has one.
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    output_limit = limits.output << 20 if limits is not None else DEFAULT_OUTPUT_LIMIT
+    input_bytes = input_data.encode() if isinstance(input_data, str) else input_data
+    pump = _AsyncPump(process, output_limit, comparator)
+
+    outcome = 'finished'
+    try:
+        tasks = {
+            asyncio.ensure_future(pump.write(input_bytes)),
+            asyncio.ensure_future(pump.read(process.stdout)),
+            asyncio.ensure_future(pump.read(process.stderr)),
+        }
+        try:
+            # Readers return how the run ended; the writer returns 'finished'
+            while tasks and outcome == 'finished':
+                done, tasks = await asyncio.wait(
+                    tasks, timeout=max(deadline - time.monotonic(), 0), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    outcome = 'timeout'
+                for task in done:
+                    if task.result() != 'finished':
+                        outcome = task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if outcome == 'finished':
+            # The pipes are closed but the process may still be running
+            try:
+                await asyncio.wait_for(process.wait(), max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                outcome = 'timeout'
+    except asyncio.CancelledError:
+        await _kill(process)
+        raise
+    except Exception as e:
+        await _kill(process)
+        return {'output': str(e), 'error': True, **_usage(None, started)}
+
+    if outcome != 'finished':
+        await _kill(process)
+    rusage = read_launcher_usage(stats_fd) if stats_fd is not None else None
+    if cgroup is not None:
+        rusage = cgroup.usage(rusage)
+    return outcome_result(outcome, process.returncode, bytes(pump.stdout), bytes(pump.stderr), _usage(rusage, started))
+
+
+class _AsyncPump:
+    """The asyncio counterpart of processes._pump(), with the same caps and counting."""
+
+    def __init__(self, process, output_limit, comparator):
+        self.process = process
+        self.output_limit = output_limit
+        self.comparator = comparator
+        self.written = 0
+        self.stdout = bytearray()
+        self.stderr = bytearray()
+
+    async def write(self, input_bytes):
+        stdin = self.process.stdin
+        input_view = memoryview(input_bytes)
+        try:
+            for offset in range(0, len(input_view), WRITE_CHUNK_SIZE):
+                stdin.write(input_view[offset:offset + WRITE_CHUNK_SIZE])
+                await stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # The program exited without reading all of its input
+            pass
+        except asyncio.CancelledError:
+            # The run is over: drop the input it did not read instead of waiting for it
+            if not stdin.transport.is_closing():
+                stdin.transport.abort()
+            raise
+        finally:
+            stdin.close()
+            # An mmap input cannot be closed while a view of it is alive
+            input_view.release()
+        return 'finished'
+
+    async def read(self, stream):
+        is_stdout = stream is self.process.stdout
+        # A byte over what is shown, to tell whether there was more
+        if is_stdout:
+            buffer = self.stdout
+            cap = MAX_OUTPUT_BYTES + 1
+        else:
+            buffer = self.stderr
+            cap = MAX_ERROR_BYTES + 1
+
+        while True:
+            data = await stream.read(READ_CHUNK_SIZE)
+            if not data:
+                return 'finished'
+            buffer += data[:cap - len(buffer)]
+            self.written += len(data)
+            if self.written > self.output_limit:
+                return 'output_limit'
+            if is_stdout and self.comparator is not None and not self.comparator.feed(data):
+                return 'mismatch'
+
+
+async def _kill(process):
+    """Kill the whole process group and reap the process."""
+    if process.returncode is None:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    # wait() only returns once the pipes are closed too. What is left in them
+    # is not needed, and a program that left its process group could keep
+    # them open for ever, so they are closed from this end.
+    _close_pipes(process)
+    # Shielded so a second cancellation cannot leave the process unreaped
+    await asyncio.shield(process.wait())
+
+
+def _close_pipes(process):
+    # The input pipe is closed by _AsyncPump.write()
+    for fd in (1, 2):
+        pipe = process._transport.get_pipe_transport(fd)
+        if pipe is not None:
+            pipe.close()
+
+
+class AsyncExecutionSession(ExecutionSession):
+    """
+    ExecutionSession for async code: prepare_async(), run_async() and
+    close_async() (or `async with`) take the place of prepare(), run() and
+    close().
+    """
+
+    async def __aenter__(self):
+        await self.prepare_async()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close_async()
+        return False
+
+    async def prepare_async(self):
+        """Write the source file and compile it if the language needs it."""
+        if self.prepared:
+            return self.compile_error is None
+        if not await asyncio.to_thread(self._write_source):
+            return True
+
+        key, cached = await asyncio.to_thread(self._cached_build)
+        if cached is not None:
+            return cached
+        started = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            *self._compile_command(),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), COMPILE_TIMEOUT)
+        except asyncio.TimeoutError:
+            await _kill_compiler(process)
+            # Not cached, the next attempt may be luckier
+            self.compile_error = COMPILE_TIMED_OUT
+            return False
+        except asyncio.CancelledError:
+            await _kill_compiler(process)
+            raise
+        finally:
+            metrics.observe('judge_compile_seconds', time.perf_counter() - started, language=self.language)
+        return await asyncio.to_thread(self._finish_build, key, process.returncode, stderr)
+
+    async def run_async(self, input_data, comparator=None):
+        """Run the prepared code with the given input; see ExecutionSession.run()."""
+        if not await self.prepare_async():
+            return {'output': self.compile_error, 'error': True}
+
+        command = self._format(self.config['run'])
+        with metrics.in_flight('judge_executions_in_flight', language=self.language):
+            result = await run_process_async(
+                command, input_data, self.limits.wall_timeout, self.limits, comparator, cwd=self.workdir
+            )
+        return self._record_run(result)
+
+    async def close_async(self):
+        """Hand back the working directory; its contents are removed."""
+        if self.workdir:
+            await asyncio.to_thread(workspaces.release, self.workdir)
+            self.workdir = None
+
+
+async def _kill_compiler(process):
+    if process.returncode is None:
+        process.kill()
+    await asyncio.shield(process.wait())
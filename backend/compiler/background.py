@@ -0,0 +1,171 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Thread
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from judge import queue
+
+from . import verdict_cache
+from .checkers import problem_checker
+from .judging import judge_submission, problem_limits, record_result
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = Lock()
+_recovery = None
+
+# Jobs this process holds, by id: (job, worker); their leases are kept alive
+_held = {}
+_held_lock = Lock()
+_heartbeat = None
+
+
+def get_executor():
+    """The process-wide pool of judging threads, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.JUDGE_BACKGROUND_WORKERS,
+                thread_name_prefix='judge',
+            )
+        return _executor
+
+
+def enqueue_submission(submission, slot=None):
+    """
+    Judge a pending submission in the background once the current transaction
+    commits, or leave it to the judge workers when JUDGE_QUEUE = 'database'.
+    slot, an admission slot, is released once the job is handed over or done.
+    """
+    if settings.JUDGE_QUEUE == 'database':
+        queue.enqueue(submission)
+        if slot is not None:
+            slot.release()
+        return
+
+    worker = queue.worker_name()
+    job = queue.enqueue(submission, worker=worker)
+    transaction.on_commit(lambda: submit_job(job, worker, slot))
+
+
+def submit_job(job, worker, slot=None):
+    """Judge a job held by worker on the executor; its lease is kept alive until then."""
+    _hold(job, worker)
+    get_executor().submit(judge_job, job, worker, slot)
+
+
+def judge_job(job, worker, slot=None):
+    """
+    Judge the submission of a job held by worker and save the verdict.
+    A judge failure marks the submission as an internal error.
+    """
+    close_old_connections()
+    _hold(job, worker)
+    try:
+        submission = queue.get_submission_model(job).objects.select_related('problem').get(id=job.submission_id)
+        result, _ = judge_stored_submission(submission)
+        with transaction.atomic():
+            recorded = queue.complete(job, worker)
+            if recorded:
+                record_result(submission, result)
+        if recorded:
+            verdict_cache.store(submission.problem, submission.language, submission.code, result)
+        else:
+            logger.warning('Judge job %s was taken over before it finished; its result is dropped', job.id)
+    except Exception as e:
+        logger.exception('Judge job %s failed', job.id)
+        queue.fail(job, worker, str(e))
+    finally:
+        _release(job)
+        if slot is not None:
+            slot.release()
+        close_old_connections()
+
+
+def _hold(job, worker):
+    """Heartbeat the job's lease until _release(); one thread does it for every held job."""
+    global _heartbeat
+    with _held_lock:
+        _held[job.id] = (job, worker)
+        if _heartbeat is None:
+            _heartbeat = Thread(target=_keep_alive, name='judge-heartbeat', daemon=True)
+            _heartbeat.start()
+
+
+def _release(job):
+    with _held_lock:
+        _held.pop(job.id, None)
+
+
+def _keep_alive():
+    while True:
+        time.sleep(settings.JUDGE_JOB_LEASE / 3)
+        with _held_lock:
+            held = list(_held.values())
+        try:
+            for job, worker in held:
+                if not queue.heartbeat(job, worker):
+                    logger.warning('Lost the lease on judge job %s', job.id)
+                    _release(job)
+        except Exception:
+            logger.exception('Judge heartbeat failed')
+        finally:
+            connection.close()
+
+
+def start_recovery():
+    """
+    With the local queue, start this process's thread that takes over the
+    jobs of web processes that died (once per process).
+    """
+    global _recovery
+    with _executor_lock:
+        if settings.JUDGE_QUEUE != 'local' or _recovery is not None:
+            return
+        _recovery = Thread(target=_recover_forever, name='judge-recovery', daemon=True)
+        _recovery.start()
+
+
+def _recover_forever():
+    while True:
+        try:
+            recover_lost_jobs()
+        except Exception:
+            logger.exception('Recovering lost judge jobs failed')
+        finally:
+            connection.close()
+        time.sleep(settings.JUDGE_JOB_LEASE)
+
+
+def recover_lost_jobs():
+    """Claim jobs whose lease ran out, up to one per judging thread, and judge them here."""
+    close_old_connections()
+    worker = queue.worker_name()
+    for _ in range(settings.JUDGE_BACKGROUND_WORKERS):
+        job = queue.claim(worker)
+        if job is None:
+            return
+        logger.warning('Taking over judge job %s (attempt %s)', job.id, job.attempts)
+        submit_job(job, worker)
+
+
+def judge_stored_submission(submission):
+    """
+    Judge a saved submission (with its problem loaded) against the problem's
+    test cases. Returns (result, test cases); nothing is saved.
+    """
+    test_cases = list(submission.problem.test_cases.order_by('id'))
+    result = judge_submission(
+        submission.code,
+        submission.language,
+        test_cases,
+        problem_limits(submission.problem),
+        batched=submission.problem.batched_execution,
+        checker=problem_checker(submission.problem),
+    )
+    return result, test_cases
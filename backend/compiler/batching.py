@@ -0,0 +1,149 @@
+"""
+Batched execution: every test case of a submission through one program launch
+of a harness in runners/, split back into per-test results by BatchReader.
+"""
+import signal
+
+from .processes import MAX_ERROR_BYTES, MAX_OUTPUT_BYTES, _decode
+
+# Harness framing. Stdin: "<count>\n", then "<length>\n<input bytes>" per test.
+# Stdout, per test: chunk frames "<index> <length>\n<stdout bytes>" sent while it
+# runs, then "<index> <exit code> <signal> <timed out> <cpu seconds> <max rss kB>
+# <wall seconds> <stdout length> <stderr length>\n" and the rest of its output.
+
+# Longest frame header the harnesses write, in bytes
+MAX_HEADER_BYTES = 256
+
+# Resource usage reported for a test stopped before its frame arrived
+NO_USAGE = {'cpu_time': 0.0, 'wall_time': 0.0, 'memory': 0.0}
+
+
+def encode_inputs(inputs):
+    """The harness stdin for a list of test inputs (str or bytes)."""
+    parts = [f'{len(inputs)}\n'.encode()]
+    for input_data in inputs:
+        data = input_data.encode() if isinstance(input_data, str) else input_data
+        parts.append(f'{len(data)}\n'.encode())
+        parts.append(data)
+    return b''.join(parts)
+
+
+class BatchReader:
+    """
+    Parse the harness output as it is read and report each test's run.
+    Stdout of test i is fed to comparators[i]; on_run(index, run) returns False
+    to stop the batch. Used in place of a comparator in processes.communicate().
+    """
+
+    def __init__(self, comparators, on_run):
+        self.comparators = comparators
+        self.on_run = on_run
+        self.finished = 0
+        self.stopped = False
+        self._header = bytearray()
+        self._frame = None
+        # The start of the current test's stdout
+        self._stdout = bytearray()
+
+    def feed(self, data):
+        if self.stopped:
+            return False
+        view = memoryview(data)
+        while view and not self.stopped:
+            if self._frame is None:
+                view = self._read_header(view)
+            else:
+                view = self._read_body(view)
+        return not self.stopped
+
+    def _read_header(self, view):
+        end = bytes(view[:MAX_HEADER_BYTES]).find(b'\n')
+        if end < 0:
+            self._header += view
+            if len(self._header) > MAX_HEADER_BYTES:
+                self._stop()
+            return view[len(view):]
+
+        self._header += view[:end]
+        try:
+            fields = self._header.decode().split()
+            if len(fields) == 2:
+                frame = {'index': int(fields[0]), 'chunk': True, 'stdout_left': int(fields[1]), 'stderr_left': 0}
+            else:
+                index, exit_code, signal_number, timed_out = (int(value) for value in fields[:4])
+                cpu_time, max_rss, wall_time = float(fields[4]), int(fields[5]), float(fields[6])
+                frame = {
+                    'index': index,
+                    'exit_code': exit_code,
+                    'signal': signal_number,
+                    'timed_out': bool(timed_out),
+                    'usage': {'cpu_time': cpu_time, 'wall_time': wall_time, 'memory': max_rss / 1024},
+                    'stdout_left': int(fields[7]),
+                    'stderr_left': int(fields[8]),
+                    'stderr': bytearray(),
+                }
+        except (UnicodeDecodeError, ValueError, IndexError):
+            self._stop()
+            return view[len(view):]
+        self._header = bytearray()
+        if frame['index'] != self.finished or frame['index'] >= len(self.comparators):
+            self._stop()
+            return view[len(view):]
+
+        self._frame = frame
+        view = view[end + 1:]
+        if frame['stdout_left'] == 0 and frame['stderr_left'] == 0:
+            self._end_frame()
+        return view
+
+    def _read_body(self, view):
+        frame = self._frame
+        if frame['stdout_left']:
+            data = view[:frame['stdout_left']]
+            frame['stdout_left'] -= len(data)
+            self._stdout += data[:MAX_OUTPUT_BYTES - len(self._stdout)]
+            if not self.comparators[frame['index']].feed(bytes(data)):
+                # Stopped at the first mismatch, like a per-test run
+                usage = frame.get('usage', NO_USAGE)
+                self._report({'output': _decode(self._stdout), 'error': False, 'mismatch': True, **usage})
+                self._stop()
+        else:
+            data = view[:frame['stderr_left']]
+            frame['stderr_left'] -= len(data)
+            frame['stderr'] += data[:MAX_ERROR_BYTES - len(frame['stderr'])]
+        if not self.stopped and frame['stdout_left'] == 0 and frame['stderr_left'] == 0:
+            self._end_frame()
+        return view[len(data):]
+
+    def _end_frame(self):
+        frame = self._frame
+        self._frame = None
+        if frame.get('chunk'):
+            return
+        stdout = _decode(self._stdout)
+        self._stdout = bytearray()
+        usage = frame['usage']
+        if frame['timed_out']:
+            run = {'output': 'Time limit exceeded', 'error': True, 'timed_out': True, **usage}
+        elif frame['signal'] == signal.SIGXFSZ:
+            run = {
+                'output': 'Output limit exceeded',
+                'error': True,
+                'output_limit_exceeded': True,
+                'partial_output': stdout,
+                **usage
+            }
+        elif frame['exit_code'] == 0 and frame['signal'] == 0:
+            run = {'output': stdout, 'error': False, **usage}
+        else:
+            run = {'output': _decode(frame['stderr']), 'error': True, **usage}
+        if not self._report(run):
+            self._stop()
+
+    def _report(self, run):
+        index = self.finished
+        self.finished += 1
+        return self.on_run(index, run) is not False
+
+    def _stop(self):
+        self.stopped = True
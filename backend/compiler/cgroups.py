@@ -0,0 +1,190 @@
+"""
+cgroup v2 resource governor for judged programs: with JUDGE_CGROUP_ROOT set,
+every program runs in its own group with memory, pids and CPU limits, and its
+usage is read from the group's counters. An unusable root falls back to rlimits.
+"""
+import itertools
+import logging
+import os
+import signal
+import time
+from threading import Lock
+from types import SimpleNamespace
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_CONTROLLERS = ('cpu', 'memory', 'pids')
+
+# cpu.max accounting period, in microseconds
+CPU_PERIOD = 100000
+
+# How long remove() waits for the killed processes of a group to go away
+REMOVE_TIMEOUT = 1.0
+
+GROUP_PREFIX = 'run-'
+
+_available = None
+_available_lock = Lock()
+_names = itertools.count()
+
+
+def is_enabled():
+    """True if programs are to run in their own cgroups (configured and usable)."""
+    global _available
+    if not settings.JUDGE_CGROUP_ROOT:
+        return False
+    with _available_lock:
+        if _available is None:
+            _available = _set_up_root(str(settings.JUDGE_CGROUP_ROOT))
+        return _available
+
+
+def _set_up_root(root):
+    try:
+        with open(os.path.join(root, 'cgroup.controllers')) as f:
+            available = f.read().split()
+        missing = [name for name in REQUIRED_CONTROLLERS if name not in available]
+        if missing:
+            logger.warning('cgroup governor disabled: %s lacks the %s controllers', root, ', '.join(missing))
+            return False
+        with open(os.path.join(root, 'cgroup.subtree_control')) as f:
+            enabled = f.read().split()
+        wanted = ' '.join(f'+{name}' for name in REQUIRED_CONTROLLERS if name not in enabled)
+        if wanted:
+            _write(os.path.join(root, 'cgroup.subtree_control'), wanted)
+    except OSError as e:
+        logger.warning('cgroup governor disabled: cannot use %s (%s)', root, e)
+        return False
+
+    _remove_stale_groups(root)
+    return True
+
+
+def _remove_stale_groups(root):
+    # Groups left behind by web processes that died before cleaning up
+    for name in os.listdir(root):
+        if not name.startswith(GROUP_PREFIX):
+            continue
+        try:
+            pid = int(name[len(GROUP_PREFIX):].split('-')[0])
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            ControlGroup(os.path.join(root, name)).remove()
+        except (ValueError, PermissionError):
+            pass
+
+
+def create(limits):
+    """A new group holding limits, or None when the governor is off or the group could not be set up."""
+    if limits is None or not is_enabled():
+        return None
+    path = os.path.join(str(settings.JUDGE_CGROUP_ROOT), f'{GROUP_PREFIX}{os.getpid()}-{next(_names)}')
+    group = ControlGroup(path)
+    try:
+        os.mkdir(path)
+    except OSError as e:
+        logger.warning('Could not create cgroup %s: %s', path, e)
+        return None
+    try:
+        group.set_limits(limits)
+    except OSError as e:
+        logger.warning('Could not set the limits of cgroup %s: %s', path, e)
+        group.remove()
+        return None
+    return group
+
+
+class ControlGroup:
+    """One program's cgroup."""
+
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def procs_path(self):
+        """The file the launcher writes to in order to join the group."""
+        return os.path.join(self.path, 'cgroup.procs')
+
+    def set_limits(self, limits):
+        self._write('memory.max', str(limits.memory << 20))
+        if os.path.exists(os.path.join(self.path, 'memory.swap.max')):
+            self._write('memory.swap.max', '0')
+        self._write('pids.max', str(settings.JUDGE_CGROUP_PIDS_MAX))
+        quota = int(settings.JUDGE_CGROUP_CPUS * CPU_PERIOD)
+        self._write('cpu.max', f'{quota} {CPU_PERIOD}' if quota > 0 else f'max {CPU_PERIOD}')
+
+    def usage(self, fallback=None):
+        """
+        rusage-like figures of everything that ran in the group, plus oom_killed.
+        Counters the kernel lacks come from fallback, the launcher's figures.
+        """
+        stats = self._read_keyed('cpu.stat')
+        peak = self._read('memory.peak')
+        events = self._read_keyed('memory.events')
+        return SimpleNamespace(
+            ru_utime=stats['user_usec'] / 1e6 if 'user_usec' in stats else getattr(fallback, 'ru_utime', 0.0),
+            ru_stime=stats['system_usec'] / 1e6 if 'system_usec' in stats else getattr(fallback, 'ru_stime', 0.0),
+            # ru_maxrss is in kilobytes
+            ru_maxrss=int(peak) // 1024 if peak else getattr(fallback, 'ru_maxrss', 0),
+            oom_killed=events.get('oom_kill', 0) > 0,
+        )
+
+    def kill(self):
+        """SIGKILL every process in the group."""
+        try:
+            self._write('cgroup.kill', '1')
+            return
+        except OSError:
+            # cgroup.kill is Linux 5.14+
+            pass
+        for pid in self._read('cgroup.procs').split():
+            try:
+                os.kill(int(pid), signal.SIGKILL)
+            except (ProcessLookupError, ValueError):
+                pass
+
+    def remove(self):
+        """Kill what is left in the group and delete it."""
+        if not os.path.isdir(self.path):
+            return
+        self.kill()
+        deadline = time.monotonic() + REMOVE_TIMEOUT
+        while True:
+            try:
+                os.rmdir(self.path)
+                return
+            except FileNotFoundError:
+                return
+            except OSError:
+                # Busy until the killed processes have exited
+                if time.monotonic() > deadline:
+                    logger.warning('Could not remove cgroup %s', self.path)
+                    return
+                time.sleep(0.01)
+
+    def _write(self, name, value):
+        _write(os.path.join(self.path, name), value)
+
+    def _read(self, name):
+        try:
+            with open(os.path.join(self.path, name)) as f:
+                return f.read().strip()
+        except OSError:
+            return ''
+
+    def _read_keyed(self, name):
+        values = {}
+        for line in self._read(name).splitlines():
+            key, _, value = line.partition(' ')
+            try:
+                values[key] = int(value)
+            except ValueError:
+                pass
+        return values
+
+
+def _write(path, value):
+    with open(path, 'w') as f:
+        f.write(value)
@@ -0,0 +1,216 @@
+"""
+How a submission's output is checked, as configured on its problem.
+
+A 'custom' checker program is run once per test as
+`checker <input file> <expected output file> <output file>` and exits with
+0 to accept the output or 1 or 2 to reject it; anything else is a judge error.
+"""
+import itertools
+import os
+import subprocess
+from collections import namedtuple
+
+from . import test_data
+from .comparison import OutputComparator, TokenComparator
+from .execution import ExecutionSession
+from .processes import Limits, Process, communicate
+
+# Limits of one checker run
+CHECKER_LIMITS = Limits(time=10, memory=512, output=1)
+
+# Exit codes with which a checker rejects the output (testlib's WA and PE)
+WRONG_ANSWER_EXIT_CODES = (1, 2)
+
+# Characters of checker output kept as feedback
+MAX_FEEDBACK_CHARS = 1024
+
+CheckerSpec = namedtuple('CheckerSpec', 'kind tolerance code language')
+
+EXACT = CheckerSpec('exact', 0.0, '', '')
+
+
+def problem_checker(problem):
+    """The checker a problem asks for."""
+    return CheckerSpec(problem.checker, problem.checker_tolerance, problem.checker_code, problem.checker_language)
+
+
+class Checker:
+    """
+    Hands out a comparator for every test run of one submission.
+    For a 'custom' checker, prepare() builds the program; if that fails, error says why.
+    """
+
+    def __init__(self, spec=None):
+        self.spec = spec or EXACT
+        self.session = None
+        self.error = None
+        self._names = itertools.count()
+        # Checker comparators handed out, closed with the checker
+        self._comparators = []
+
+    def __enter__(self):
+        self.prepare()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def prepare(self):
+        """Build a custom checker program; False if it failed to build."""
+        if self.spec.kind != 'custom' or self.session is not None or self.error is not None:
+            return self.error is None
+        if not self.spec.code.strip():
+            self.error = 'The problem has no checker program'
+            return False
+        try:
+            self.session = ExecutionSession(self.spec.code, self.spec.language, CHECKER_LIMITS)
+        except ValueError:
+            self.error = f'The checker language {self.spec.language!r} is not supported'
+            return False
+        if not self.session.prepare():
+            self.error = f'The checker failed to compile:\n{self.session.compile_error}'
+        return self.error is None
+
+    def comparator(self, test_case):
+        """A fresh comparator for one run of test_case."""
+        if self.spec.kind == 'custom':
+            comparator = CheckerComparator(self, test_case)
+            self._comparators.append(comparator)
+            return comparator
+        expected_output = test_data.expected_output(test_case)
+        if self.spec.kind == 'tokens':
+            return TokenComparator(expected_output)
+        if self.spec.kind == 'float':
+            return TokenComparator(expected_output, self.spec.tolerance)
+        return OutputComparator(expected_output)
+
+    def new_path(self, suffix):
+        """A path in the checker's working directory that no other run uses."""
+        return os.path.join(self.session.workdir, f'{next(self._names)}.{suffix}')
+
+    def check(self, test_case, output_path):
+        """
+        Run the checker program on a test's output.
+        Returns (passed, feedback, error), error being set on a checker failure.
+        """
+        if self.error is not None:
+            return False, None, self.error
+
+        written = []
+        try:
+            input_path = self._data_path(test_case.input_hash, lambda: test_data.read_input(test_case), written)
+            expected_path = self._data_path(
+                test_case.expected_output_hash, lambda: test_case.expected_output, written
+            )
+            command = self.session._format(self.session.config['run'])
+            process = Process(
+                [*command, input_path, expected_path, output_path],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=self.session.workdir,
+                limits=CHECKER_LIMITS,
+            )
+            stdout = _Collector()
+            run = communicate(process, '', CHECKER_LIMITS.wall_timeout, limits=CHECKER_LIMITS, comparator=stdout)
+        except OSError as e:
+            return False, None, f'Checker failed: {e}'
+        finally:
+            for path in written:
+                os.remove(path)
+
+        if run.get('timed_out') or run.get('cpu_time', 0.0) > CHECKER_LIMITS.time:
+            return False, None, 'Checker failed: time limit exceeded'
+        if run.get('output_limit_exceeded'):
+            return False, None, 'Checker failed: output limit exceeded'
+        # communicate() only returns stderr for a non-zero exit
+        stderr = run['output'] if process.returncode != 0 else ''
+        feedback = '\n'.join(part for part in (stdout.text().strip(), stderr.strip()) if part)
+        feedback = feedback[:MAX_FEEDBACK_CHARS] or None
+        if process.returncode == 0:
+            return True, feedback, None
+        if process.returncode in WRONG_ANSWER_EXIT_CODES:
+            return False, feedback, None
+        error = f'Checker failed with exit code {process.returncode}'
+        return False, None, f'{error}: {feedback}' if feedback else error
+
+    def _data_path(self, content_hash, load, written):
+        # Stored test data is passed as it is; inline data is written out for the run
+        if content_hash:
+            return test_data.data_path(content_hash)
+        path = self.new_path('txt')
+        data = load()
+        with open(path, 'wb') as f:
+            f.write(data.encode() if isinstance(data, str) else data)
+        written.append(path)
+        return path
+
+    def close(self):
+        # Runs that ended before finish() leave their output file open
+        for comparator in self._comparators:
+            comparator.close()
+        if self.session is not None:
+            self.session.close()
+
+
+class _Collector:
+    """A comparator that accepts anything and keeps the start of it."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def feed(self, data):
+        self.data += data[:MAX_FEEDBACK_CHARS * 4 - len(self.data)]
+        return True
+
+    def text(self):
+        return self.data.decode(errors='replace')
+
+
+class CheckerComparator:
+    """
+    The comparator for a 'custom' checker: stdout is written to a file as it
+    arrives, and finish() runs the checker program on it.
+    """
+    mismatch = None
+
+    def __init__(self, checker, test_case):
+        self.checker = checker
+        self.test_case = test_case
+        self.path = None
+        self.file = None
+        self.passed = None
+        self.feedback = None
+        self.error = None
+
+    def feed(self, data):
+        if self.file is None:
+            self.path = self.checker.new_path('out')
+            self.file = open(self.path, 'wb')
+        self.file.write(data)
+        # Only the checker can tell, once the output is complete
+        return True
+
+    def finish(self):
+        """True if the checker accepts the output."""
+        if self.passed is None:
+            if self.file is None:
+                # The program wrote nothing
+                self.feed(b'')
+            self.file.close()
+            try:
+                self.passed, self.feedback, self.error = self.checker.check(self.test_case, self.path)
+            finally:
+                self.close()
+        return self.passed
+
+    def close(self):
+        """Close and remove the output file, if there is one."""
+        if self.file is None:
+            return
+        self.file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
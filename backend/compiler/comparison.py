@@ -0,0 +1,211 @@
+"""
+Compare a program's output with the expected output while it is written,
+so a wrong answer can be stopped at the first mismatch.
+"""
+import codecs
+import math
+import re
+
+
+class OutputComparator:
+    """
+    Streaming equivalent of comparing the stripped output and expected output.
+    feed() returns False once the output has diverged; mismatch holds where.
+    """
+    error = None
+    feedback = None
+
+    def __init__(self, expected_output):
+        self.expected = expected_output.strip()
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.after_cr = False
+        # Leading whitespace of the output is skipped until the first other character
+        self.started = False
+        # Expected characters matched so far, and how many of those are
+        # followed by something other than whitespace in the output. Past
+        # `confirmed`, the output may still turn out to be trailing whitespace.
+        self.matched = 0
+        self.confirmed = 0
+        self.line = 1
+        self.column = 1
+        self.mismatch = None
+
+    def feed(self, data):
+        """Add a chunk of stdout. Returns False once the output cannot match."""
+        if self.mismatch is None:
+            self._feed_text(self._normalise(self.decoder.decode(data)))
+        return self.mismatch is None
+
+    def finish(self):
+        """True if the complete output matches the expected output."""
+        if self.mismatch is None:
+            self._feed_text(self._normalise(self.decoder.decode(b'', final=True)))
+        if self.mismatch is None and self.confirmed < len(self.expected):
+            # The output ended too early
+            self._fail()
+        return self.mismatch is None
+
+    def _normalise(self, text):
+        # Same as _decode() in processes: '\r\n' and '\r' become '\n', even
+        # when a chunk boundary falls between '\r' and '\n'
+        if self.after_cr and text.startswith('\n'):
+            text = text[1:]
+        if text:
+            self.after_cr = text.endswith('\r')
+        return text.replace('\r\n', '\n').replace('\r', '\n')
+
+    def _feed_text(self, text):
+        while text and self.mismatch is None:
+            if not self.started:
+                rest = text.lstrip()
+                self._advance(text[:len(text) - len(rest)])
+                text = rest
+                self.started = bool(text)
+                continue
+
+            expected = self.expected[self.matched:self.matched + len(text)]
+            size = _common_prefix_length(text, expected)
+            if size:
+                same = text[:size]
+                self.matched += size
+                if not same.isspace():
+                    self.confirmed = self.matched - (len(same) - len(same.rstrip()))
+                self._advance(same)
+                text = text[size:]
+                continue
+
+            # text[0] differs from the expected output; only trailing
+            # whitespace after a complete match is still acceptable
+            if self.confirmed == len(self.expected):
+                rest = text.lstrip()
+                self._advance(text[:len(text) - len(rest)])
+                text = rest
+            if text:
+                self._fail()
+
+    def _advance(self, text):
+        newlines = text.count('\n')
+        if newlines:
+            self.line += newlines
+            self.column = len(text) - text.rfind('\n')
+        else:
+            self.column += len(text)
+
+    def _fail(self):
+        self.mismatch = {'line': self.line, 'column': self.column}
+
+
+TOKEN = re.compile(r'\S+')
+
+# Longest number TokenComparator reads when comparing with a tolerance
+MAX_NUMBER_CHARS = 1024
+
+
+class TokenComparator:
+    """
+    Streaming equivalent of `output.split() == expected.split()`, optionally
+    accepting numbers within a tolerance.
+    """
+    error = None
+    feedback = None
+
+    def __init__(self, expected_output, tolerance=None):
+        self.expected = expected_output.split()
+        self.tolerance = tolerance
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.index = 0
+        # The end of the output read so far, which may be the start of a token
+        self.pending = ''
+        self.line = 1
+        self.column = 1
+        self.mismatch = None
+
+    def feed(self, data):
+        """Add a chunk of stdout. Returns False once the output cannot match."""
+        if self.mismatch is None:
+            self._feed_text(self.decoder.decode(data), final=False)
+        return self.mismatch is None
+
+    def finish(self):
+        """True if the complete output matches the expected output."""
+        if self.mismatch is None:
+            self._feed_text(self.decoder.decode(b'', final=True), final=True)
+        if self.mismatch is None and self.index < len(self.expected):
+            # The output ended too early
+            self._fail()
+        return self.mismatch is None
+
+    def _feed_text(self, text, final):
+        text = self.pending + text
+        position = 0
+        for match in TOKEN.finditer(text):
+            if match.end() == len(text) and not final:
+                # The token may go on in the next chunk
+                break
+            self._advance(text[position:match.start()])
+            position = match.start()
+            if not self._matches(match.group()):
+                self._fail()
+                return
+            self._advance(match.group())
+            position = match.end()
+        else:
+            self._advance(text[position:])
+            self.pending = ''
+            return
+
+        self._advance(text[position:match.start()])
+        self.pending = match.group()
+        if len(self.pending) > self._longest_match():
+            self._fail()
+
+    def _matches(self, token):
+        if self.index >= len(self.expected):
+            # More tokens than expected
+            return False
+        expected = self.expected[self.index]
+        self.index += 1
+        if token == expected:
+            return True
+        if self.tolerance is None:
+            return False
+        try:
+            value, expected_value = float(token), float(expected)
+        except ValueError:
+            return False
+        if not (math.isfinite(value) and math.isfinite(expected_value)):
+            return False
+        return abs(value - expected_value) <= self.tolerance * max(1.0, abs(expected_value))
+
+    def _longest_match(self):
+        """How long the token being read may grow and still match."""
+        if self.index >= len(self.expected):
+            return 0
+        expected = self.expected[self.index]
+        # Numbers may be written with more digits than the expected answer
+        return len(expected) if self.tolerance is None else max(len(expected), MAX_NUMBER_CHARS)
+
+    def _advance(self, text):
+        newlines = text.count('\n')
+        if newlines:
+            self.line += newlines
+            self.column = len(text) - text.rfind('\n')
+        else:
+            self.column += len(text)
+
+    def _fail(self):
+        self.mismatch = {'line': self.line, 'column': self.column}
+
+
+def _common_prefix_length(a, b):
+    """Length of the longest common prefix of two strings."""
+    if a.startswith(b) or b.startswith(a):
+        return min(len(a), len(b))
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
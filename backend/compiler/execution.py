@@ -0,0 +1,246 @@
+import os
+import subprocess
+
+from judgeflow import metrics
+
+from . import artifact_cache, cgroups, launcher, node_pool, python_pool, toolchain, workspaces
+from .batching import encode_inputs
+from .processes import Limits, Process, communicate, run_process
+
+# Timeout (in seconds) used when compiling user code
+COMPILE_TIMEOUT = 30
+COMPILE_TIMED_OUT = 'Compilation timed out'
+
+# Limits for code that is not judged against a problem (the run endpoints)
+DEFAULT_LIMITS = Limits(time=10, memory=256, output=64)
+
+# Memory the batch harness may use on top of a test's, in MB, in the
+# cgroup of a batched run
+BATCH_HARNESS_MEMORY = 64
+
+# Source file name and run command for each supported language.
+# Compiled languages also carry the command used to build the executable
+# (for C++, the toolchain profile's; 'precompiled_headers' lets it use the
+# profile's precompiled headers), and languages with a pool of warm
+# interpreters name the pool's module.
+# 'out_of_memory' is what the runtime prints when an allocation fails under
+# the memory limit. 'batch' runs every test case through one launch of the
+# language's batch harness (see batching). Node.js has none: it cannot fork,
+# and worker threads would share the limits of one process.
+LANGUAGES = {
+    'python': {
+        'source': 'main.py',
+        'run': ['python', '{source}'],
+        'warm_pool': python_pool,
+        'batch': ['python', '{runners}/batch_harness.py', '{wall_timeout}', '{output_bytes}', '{source}'],
+        'out_of_memory': 'MemoryError',
+    },
+    'javascript': {
+        'source': 'main.js',
+        'run': ['node', '{source}'],
+        'warm_pool': node_pool,
+        'out_of_memory': 'heap out of memory',
+    },
+    'cpp': {
+        'source': 'main.cpp',
+        'compile': toolchain.compile_command(),
+        'precompiled_headers': True,
+        'executable': 'main',
+        'run': ['{executable}'],
+        'batch': ['env', 'LD_PRELOAD={preload}', 'JUDGE_BATCH_WALL_TIMEOUT={wall_timeout}', '{executable}'],
+        'out_of_memory': 'std::bad_alloc',
+    },
+}
+
+# A statically linked program ignores LD_PRELOAD, which the batch harness needs
+if toolchain.links_statically():
+    del LANGUAGES['cpp']['batch']
+
+
+class ExecutionSession:
+    """
+    Prepare a piece of user code once (building it, for C++) and run it
+    against many inputs under the given limits.
+    """
+
+    def __init__(self, code, language, limits=None):
+        if language not in LANGUAGES:
+            raise ValueError('Unsupported language')
+        self.code = code
+        self.language = language
+        self.config = LANGUAGES[language]
+        self.limits = limits or DEFAULT_LIMITS
+        self.workdir = None
+        self.compile_error = None
+        self.prepared = False
+
+    def __enter__(self):
+        self.prepare()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def _format(self, command, **extra):
+        paths = {
+            'source': os.path.join(self.workdir, self.config['source']),
+            'executable': os.path.join(self.workdir, self.config.get('executable', '')),
+            **extra,
+        }
+        return [part.format(**paths) for part in command]
+
+    def prepare(self):
+        """Write the source file and compile it if the language needs it."""
+        if self.prepared:
+            return self.compile_error is None
+        if not self._write_source():
+            return True
+
+        key, cached = self._cached_build()
+        if cached is not None:
+            return cached
+        try:
+            with metrics.timer('judge_compile_seconds', language=self.language):
+                compile_process = subprocess.run(
+                    self._compile_command(),
+                    capture_output=True,
+                    timeout=COMPILE_TIMEOUT
+                )
+        except subprocess.TimeoutExpired:
+            # Not cached, the next attempt may be luckier
+            self.compile_error = COMPILE_TIMED_OUT
+            return False
+        return self._finish_build(key, compile_process.returncode, compile_process.stderr)
+
+    def _write_source(self):
+        """Take a working directory and write the source; True if it must be compiled."""
+        self.prepared = True
+        self.workdir = workspaces.acquire()
+
+        with open(os.path.join(self.workdir, self.config['source']), 'w') as f:
+            f.write(self.code)
+
+        return 'compile' in self.config
+
+    def _cached_build(self):
+        """
+        Reuse an earlier build of the same code when there is one.
+        Returns (cache key or None, True / False for a cached build /
+        compile error, or None when the code must be compiled).
+        """
+        if not artifact_cache.is_enabled():
+            return None, None
+        key = artifact_cache.cache_key(self.language, self.code, self.config['compile'])
+        cached = artifact_cache.lookup(key, self._format(['{executable}'])[0])
+        if cached is None:
+            return key, None
+        kind, value = cached
+        if kind == 'compile_error':
+            self.compile_error = value
+            return key, False
+        return key, True
+
+    def _compile_command(self):
+        command = self.config['compile']
+        if self.config.get('precompiled_headers'):
+            # Not part of the cache key: the headers do not change the binary
+            command = toolchain.with_precompiled_headers(command)
+        return self._format(command)
+
+    def _finish_build(self, key, returncode, stderr):
+        """Record how the compiler exited (and cache it under key); True if it succeeded."""
+        if returncode != 0:
+            self.compile_error = stderr.decode(errors='replace')
+            if key is not None:
+                artifact_cache.store(key, compile_error=self.compile_error)
+            return False
+
+        if key is not None:
+            artifact_cache.store(key, artifact_path=self._format(['{executable}'])[0])
+        return True
+
+    def run(self, input_data, cancel_event=None, comparator=None):
+        """
+        Run the prepared code with the given input.
+        Returns a dict with 'output' and 'error' like the run_*_code helpers;
+        setting cancel_event kills the process early.
+        """
+        if not self.prepare():
+            return {'output': self.compile_error, 'error': True}
+
+        command = self._format(self.config['run'])
+        timeout = self.limits.wall_timeout
+        with metrics.in_flight('judge_executions_in_flight', language=self.language):
+            result = None
+            # Warm interpreters fork outside any cgroup, so the governor always starts a fresh process
+            if 'warm_pool' in self.config and not cgroups.is_enabled():
+                result = self.config['warm_pool'].run(
+                    command, input_data, timeout, cancel_event, self.limits, comparator
+                )
+            if result is None:
+                # No warm interpreter available, start a fresh process
+                result = run_process(
+                    command, input_data, timeout, cancel_event, self.limits, comparator, cwd=self.workdir
+                )
+        return self._record_run(result)
+
+    def _record_run(self, result):
+        """Add a finished run to the timing metrics; returns the result."""
+        if 'spawn_time' in result:
+            metrics.observe('judge_spawn_seconds', result['spawn_time'], language=self.language)
+        if 'wall_time' in result:
+            metrics.observe('judge_run_seconds', result['wall_time'], language=self.language)
+        return result
+
+    def supports_batch(self):
+        return 'batch' in self.config
+
+    def run_batch(self, inputs, reader):
+        """
+        Run the prepared code once for all inputs through the batch harness,
+        reporting to reader (a batching.BatchReader). Returns the harness's own
+        result, or None if this language cannot run batched.
+        """
+        if not self.prepare():
+            return {'output': self.compile_error, 'error': True}
+        if not self.supports_batch():
+            return None
+
+        extra = {
+            'runners': launcher.RUNNERS_DIR,
+            'wall_timeout': self.limits.wall_timeout,
+            'output_bytes': self.limits.output << 20,
+        }
+        if any('{preload}' in part for part in self.config['batch']):
+            extra['preload'] = launcher.get_batch_preload()
+            if extra['preload'] is None:
+                return None
+        command = self._format(self.config['batch'], **extra)
+
+        # Every test may use its own wall time, plus a second to start up
+        count = max(len(inputs), 1)
+        timeout = self.limits.wall_timeout * count + 1
+        try:
+            process = Process(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=self.workdir,
+                limits=self.limits,
+                group_limits=self.limits._replace(memory=self.limits.memory + BATCH_HARNESS_MEMORY),
+            )
+        except Exception as e:
+            return {'output': str(e), 'error': True}
+        # The rlimits bound every test; the harness may write all their output
+        output_limits = self.limits._replace(output=self.limits.output * count + 1)
+        with metrics.in_flight('judge_executions_in_flight', language=self.language):
+            return communicate(process, encode_inputs(inputs), timeout, None, output_limits, reader)
+
+    def close(self):
+        """Hand back the working directory; its contents are removed."""
+        if self.workdir:
+            workspaces.release(self.workdir)
+            self.workdir = None
+
@@ -0,0 +1,313 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Event, Lock
+
+from django.conf import settings
+from django.db.models import F
+
+from judgeflow import metrics
+from problems.models import TestCase
+
+from . import test_data
+from .batching import BatchReader
+from .checkers import Checker
+from .execution import ExecutionSession, LANGUAGES
+from .processes import TRUNCATED_MARKER, Limits
+
+# Longest program output kept in a stored test result, in characters
+STORED_OUTPUT_LIMIT = 64 * 1024
+
+_test_executor = None
+_test_executor_lock = Lock()
+
+
+def get_test_workers():
+    """How many test cases may run at once; JUDGE_TEST_WORKERS = 0 means one per CPU."""
+    workers = settings.JUDGE_TEST_WORKERS
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def get_test_executor():
+    """The process-wide pool that runs test cases in parallel mode, created on first use."""
+    global _test_executor
+    with _test_executor_lock:
+        if _test_executor is None:
+            _test_executor = ThreadPoolExecutor(
+                max_workers=get_test_workers(),
+                thread_name_prefix='judge-test',
+            )
+        return _test_executor
+
+
+def problem_limits(problem):
+    """The resource limits a problem sets for every test run."""
+    return Limits(time=problem.time_limit, memory=problem.memory_limit, output=problem.output_limit)
+
+
+def judge_submission(code, language, test_cases, limits=None, batched=False, checker=None):
+    """
+    Run the code against every test case and work out the verdict.
+    The code is prepared once; the first failing test decides the verdict.
+    """
+    # Initialize result
+    result = {
+        'status': 'accepted',  # Default to accepted, change if any test fails
+        'runtime': 0.0,
+        'memory': 0.0,
+        'test_results': [],  # Store detailed test case results
+        'compile_output': '',
+        'phase_times': {},
+    }
+    test_cases = list(test_cases)
+    started = time.perf_counter()
+
+    if language not in LANGUAGES:
+        # Unsupported language, reported against the first test case as before
+        for test_case in test_cases[:1]:
+            result['status'] = 'runtime_error'
+            result['test_results'].append(_test_result(test_case, '', 'Unsupported language', 'runtime_error'))
+        return result
+
+    with ExecutionSession(code, language, limits) as session:
+        result['phase_times']['prepare'] = time.perf_counter() - started
+        if session.compile_error is not None:
+            result['status'] = 'compilation_error'
+            result['compile_output'] = session.compile_error
+            return result
+
+        with Checker(checker) as output_checker:
+            result['phase_times']['prepare'] = time.perf_counter() - started
+            if output_checker.error is not None:
+                # The problem's checker is broken, reported against the first test case
+                result['status'] = 'internal_error'
+                for test_case in test_cases[:1]:
+                    result['test_results'].append(
+                        _test_result(test_case, '', output_checker.error, 'internal_error')
+                    )
+                return result
+
+            if batched and session.supports_batch() and len(test_cases) > 1:
+                result['test_results'] = run_tests_batched(session, output_checker, test_cases)
+            elif get_test_workers() > 1 and len(test_cases) > 1:
+                result['test_results'] = run_tests_parallel(session, output_checker, test_cases)
+            else:
+                result['test_results'] = run_tests_sequential(session, output_checker, test_cases)
+            result['phase_times']['tests'] = time.perf_counter() - started - result['phase_times']['prepare']
+
+    # Both runners stop at the first failing test, so it is always the last one
+    if result['test_results'] and not result['test_results'][-1]['passed']:
+        result['status'] = result['test_results'][-1]['status']
+
+    # The submission's runtime and memory are those of its most expensive test
+    result['runtime'] = max((r['cpu_time'] for r in result['test_results']), default=0.0)
+    result['memory'] = max((r['memory'] for r in result['test_results']), default=0.0)
+
+    return result
+
+
+def run_test(session, checker, test_case, cancel_event=None):
+    """Run one test case and check the output with checker (a checkers.Checker)."""
+    # Execute the code with the test case input
+    comparator = checker.comparator(test_case)
+    with test_data.open_input(test_case) as input_data:
+        run = session.run(input_data, cancel_event, comparator)
+    return classify_run(session, test_case, run, comparator)
+
+
+def classify_run(session, test_case, run, comparator):
+    """The test result for a finished run of test_case whose stdout went to comparator."""
+    limits = session.limits
+    if run.get('timed_out'):
+        metrics.inc('judge_timeouts_total', language=session.language)
+
+    # Killed at the wall-clock timeout, or used more CPU than allowed
+    if run.get('timed_out') or run.get('cpu_time', 0.0) > limits.time:
+        test_result = _test_result(test_case, '', 'Time limit exceeded', 'time_limit_exceeded')
+
+    # Wrote more than the output limit and was stopped
+    elif run.get('output_limit_exceeded'):
+        test_result = _test_result(test_case, run['partial_output'], 'Output limit exceeded', 'output_limit_exceeded')
+
+    # Went over the memory limit, an allocation failed because of it, or
+    # the cgroup's memory limit got it killed
+    elif run.get('memory', 0.0) > limits.memory or run.get('oom_killed') or (
+            run['error'] and session.config['out_of_memory'] in run['output']):
+        test_result = _test_result(test_case, '', 'Memory limit exceeded', 'memory_limit_exceeded')
+
+    # If there's an execution error, mark as runtime error
+    elif run['error']:
+        test_result = _test_result(test_case, '', run['output'], 'runtime_error')
+
+    # Compare output with expected output
+    elif run.get('mismatch') or not _finish_comparison(session, comparator):
+        if comparator.error is not None:
+            # The checker program failed; there is no verdict for the output
+            test_result = _test_result(test_case, run['output'], comparator.error, 'internal_error')
+        else:
+            test_result = _test_result(test_case, run['output'], None, 'wrong_answer')
+            # Where the output first went wrong (1-based line and column)
+            test_result['mismatch'] = comparator.mismatch
+
+    # Test case passed
+    else:
+        test_result = _test_result(test_case, run['output'], None, 'accepted')
+
+    # What a checker program had to say about the output
+    if comparator.feedback is not None:
+        test_result['checker_feedback'] = comparator.feedback
+
+    # Resource usage of the run, in seconds and MB
+    test_result['cpu_time'] = round(run.get('cpu_time', 0.0), 4)
+    test_result['wall_time'] = round(run.get('wall_time', 0.0), 4)
+    test_result['memory'] = round(run.get('memory', 0.0), 2)
+    return test_result
+
+
+def _finish_comparison(session, comparator):
+    # What is left of the comparison once the program has exited (all of it, for a checker program)
+    with metrics.timer('judge_compare_seconds', language=session.language):
+        return comparator.finish()
+
+
+def run_tests_sequential(session, checker, test_cases):
+    """Run the test cases one after another, stopping at the first failure."""
+    test_results = []
+    for test_case in test_cases:
+        test_result = run_test(session, checker, test_case)
+        test_results.append(test_result)
+        if not test_result['passed']:
+            break
+    return test_results
+
+
+def run_tests_batched(session, checker, test_cases):
+    """
+    Run the test cases through a single launch of the language's batch harness.
+    Tests the harness did not get to are run one by one.
+    """
+    comparators = [checker.comparator(test_case) for test_case in test_cases]
+    test_results = []
+
+    def on_run(index, run):
+        test_result = classify_run(session, test_cases[index], run, comparators[index])
+        test_results.append(test_result)
+        return test_result['passed']
+
+    reader = BatchReader(comparators, on_run)
+    session.run_batch([test_data.read_input(test_case) for test_case in test_cases], reader)
+
+    if test_results and not test_results[-1]['passed']:
+        return test_results
+    return test_results + run_tests_sequential(session, checker, test_cases[len(test_results):])
+
+
+def run_tests_parallel(session, checker, test_cases):
+    """
+    Run the test cases concurrently on the shared test pool, in dispatch_order().
+    Results are in test order and end at the first failing test; later tests
+    are cancelled once a test fails.
+    """
+    executor = get_test_executor()
+    cancel_events = [Event() for _ in test_cases]
+    futures = [None] * len(test_cases)
+    for i in dispatch_order(test_cases):
+        futures[i] = executor.submit(run_test, session, checker, test_cases[i], cancel_events[i])
+    index_of = {future: i for i, future in enumerate(futures)}
+
+    test_results = [None] * len(test_cases)
+    first_failure = len(test_cases)
+    for future in as_completed(futures):
+        i = index_of[future]
+        if future.cancelled() or i > first_failure:
+            continue
+
+        test_result = future.result()
+        test_results[i] = test_result
+        if not test_result['passed']:
+            first_failure = i
+            for later_future, cancel_event in zip(futures[i + 1:], cancel_events[i + 1:]):
+                later_future.cancel()
+                cancel_event.set()
+
+    return test_results[:first_failure + 1]
+
+
+def dispatch_order(test_cases):
+    """
+    The order in which to start the test cases (as indices into test_cases).
+    With JUDGE_TEST_ORDER_BY_FAILURES, the samples come first and then the
+    hidden tests that most often decided a verdict.
+    """
+    indices = range(len(test_cases))
+    if not settings.JUDGE_TEST_ORDER_BY_FAILURES:
+        return list(indices)
+
+    def priority(i):
+        test_case = test_cases[i]
+        failure_rate = test_case.failure_count / test_case.judged_count if test_case.judged_count else 0.0
+        return (test_case.is_hidden, -failure_rate, i)
+
+    return sorted(indices, key=priority)
+
+
+def _test_result(test_case, output, error, status):
+    return {
+        'test_case_id': test_case.id,
+        'passed': status == 'accepted',
+        'status': status,
+        'input': test_case.input_data,
+        'expected_output': test_case.expected_output,
+        'actual_output': _truncate(output),
+        'error': _truncate(error)
+    }
+
+
+def _truncate(text):
+    # Keeps huge outputs out of the database and the API responses
+    if text is None or len(text) <= STORED_OUTPUT_LIMIT:
+        return text
+    return text[:STORED_OUTPUT_LIMIT] + TRUNCATED_MARKER
+
+
+def record_result(submission, result):
+    """
+    Copy a judge_submission() result onto a Submission or ContestSubmission,
+    save it and count it in the history of the tests that ran.
+    """
+    submission.status = result['status']
+    # Runtime (CPU seconds) and peak memory (MB) of the slowest / largest test
+    submission.runtime = result['runtime'] if result['status'] == 'accepted' else None
+    submission.memory = result['memory'] if result['status'] == 'accepted' else None
+    # Store detailed test case results
+    submission.test_case_results = result['test_results']
+    submission.compile_output = result['compile_output']
+    with metrics.timer('judge_db_write_seconds', language=submission.language):
+        submission.save(update_fields=['status', 'runtime', 'memory', 'test_case_results', 'compile_output'])
+        record_test_history(result)
+    metrics.inc('judge_verdicts_total', language=submission.language, status=result['status'])
+
+
+def record_test_history(result):
+    """Count the run of every test in the result, and the failure of the failing one."""
+    test_results = result['test_results']
+    # Updated in the database (no signals), so counting never invalidates cached verdicts
+    TestCase.objects.filter(id__in=[r['test_case_id'] for r in test_results]).update(
+        judged_count=F('judged_count') + 1
+    )
+    if test_results and not test_results[-1]['passed']:
+        TestCase.objects.filter(id=test_results[-1]['test_case_id']).update(failure_count=F('failure_count') + 1)
+
+
+def submission_status_data(submission):
+    """The verdict fields returned by the submit and status endpoints."""
+    return {
+        'submission_id': submission.id,
+        'status': submission.status,
+        'runtime': submission.runtime,
+        'memory': submission.memory,
+        'test_results': submission.test_case_results or [],
+        'compile_output': submission.compile_output,
+    }
@@ -0,0 +1,69 @@
+"""
+Build and locate the small C helpers in runners/, such as the launcher that
+judged programs run under. They are compiled on first use and kept in the
+artifact cache; get_launcher() returns None if the launcher cannot be built.
+"""
+import atexit
+import os
+import shutil
+import subprocess
+import tempfile
+from threading import Lock
+
+from . import artifact_cache
+
+RUNNERS_DIR = os.path.join(os.path.dirname(__file__), 'runners')
+LAUNCHER_SOURCE = os.path.join(RUNNERS_DIR, 'launcher.c')
+COMPILE_COMMAND = ['gcc', '-O2', '-o', '{executable}', '{source}']
+BATCH_PRELOAD_SOURCE = os.path.join(RUNNERS_DIR, 'batch_harness.c')
+SHARED_LIBRARY_COMMAND = ['gcc', '-O2', '-shared', '-fPIC', '-o', '{executable}', '{source}']
+
+_helpers = {}
+_helpers_lock = Lock()
+
+
+def get_launcher():
+    """Path of the launcher binary for this process, or None if it could not be built."""
+    return get_helper('launcher', LAUNCHER_SOURCE, COMPILE_COMMAND)
+
+
+def get_batch_preload():
+    """Path of the batch harness library for compiled programs, or None if it could not be built."""
+    return get_helper('batch_harness.so', BATCH_PRELOAD_SOURCE, SHARED_LIBRARY_COMMAND)
+
+
+def get_helper(name, source_path, compile_command):
+    """Path of a helper built from source_path, or None if it could not be built."""
+    with _helpers_lock:
+        if name not in _helpers:
+            try:
+                _helpers[name] = _build(name, source_path, compile_command)
+            except Exception:
+                _helpers[name] = None
+        return _helpers[name]
+
+
+def _build(name, source_path, compile_command):
+    with open(source_path) as f:
+        source = f.read()
+
+    # The binary lives in a directory owned by this process
+    workdir = tempfile.mkdtemp(prefix='judge-helper-')
+    atexit.register(shutil.rmtree, workdir, True)
+    executable = os.path.join(workdir, name)
+
+    key = None
+    if artifact_cache.is_enabled():
+        key = artifact_cache.cache_key('c', source, compile_command)
+        cached = artifact_cache.lookup(key, executable)
+        if cached is not None and cached[0] == 'artifact':
+            return executable
+
+    command = [part.format(executable=executable, source=source_path) for part in compile_command]
+    process = subprocess.run(command, capture_output=True, timeout=60)
+    if process.returncode != 0:
+        return None
+
+    if key is not None:
+        artifact_cache.store(key, artifact_path=executable)
+    return executable
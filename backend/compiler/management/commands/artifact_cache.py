@@ -0,0 +1,23 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from compiler import artifact_cache
+
+
+class Command(BaseCommand):
+    help = 'Show the compiled-artifact cache counters, or clear the cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Remove every cached build')
+
+    def handle(self, *args, **options):
+        if not artifact_cache.is_enabled():
+            self.stdout.write('The artifact cache is disabled (JUDGE_ARTIFACT_CACHE_DIR is empty)')
+            return
+
+        if options['clear']:
+            removed = artifact_cache.clear()
+            self.stdout.write(f'Removed {removed} cached builds')
+
+        self.stdout.write(json.dumps(artifact_cache.stats(), indent=2))
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from compiler import toolchain
+
+
+class Command(BaseCommand):
+    help = 'Show the C++ toolchain profile, build its precompiled headers or measure what they save'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--build', action='store_true', help='Build the precompiled headers if they are missing')
+        parser.add_argument(
+            '--self-test',
+            action='store_true',
+            help='Compile a test program with and without the precompiled headers and report the times',
+        )
+
+    def handle(self, *args, **options):
+        if options['self_test']:
+            self.stdout.write(json.dumps(toolchain.self_test(), indent=2))
+            return
+
+        if options['build']:
+            timings = toolchain.build_precompiled_headers()
+            for header, seconds in timings.items():
+                result = f'{seconds:.2f}s' if seconds is not None else 'failed'
+                self.stdout.write(f'{header}: {result}')
+
+        self.stdout.write(json.dumps({
+            'compile_command': toolchain.compile_command(),
+            'static': toolchain.links_statically(),
+            'precompiled_header_dir': toolchain.pch_dir(),
+            'precompiled_headers_ready': toolchain.is_ready(),
+        }, indent=2))
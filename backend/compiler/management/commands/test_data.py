@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.db.models.functions import Length
+
+from compiler import test_data
+from problems.models import TestCase
+
+
+class Command(BaseCommand):
+    help = 'Move large test cases to the test data directory, or remove stored files nothing refers to'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', action='store_true', help='Move existing test data above the inline limit to files')
+        parser.add_argument('--prune', action='store_true', help='Remove stored files no test case refers to')
+
+    def handle(self, *args, **options):
+        if options['store']:
+            if not test_data.is_enabled():
+                self.stdout.write('File-backed test data is disabled (JUDGE_TEST_DATA_INLINE_LIMIT is 0)')
+            else:
+                # Length counts characters, so this may pick up a few tests that end up inline
+                limit = settings.JUDGE_TEST_DATA_INLINE_LIMIT
+                candidates = TestCase.objects.annotate(
+                    input_length=Length('input_data'),
+                    output_length=Length('expected_output'),
+                ).filter(
+                    Q(input_hash='', input_length__gt=limit // 4)
+                    | Q(expected_output_hash='', output_length__gt=limit // 4)
+                )
+                moved = 0
+                for test_case in candidates.iterator():
+                    # Saving runs compiler.test_data.externalize()
+                    test_case.save()
+                    moved += bool(test_case.input_hash or test_case.expected_output_hash)
+                self.stdout.write(f'Stored {moved} test cases as files')
+
+        if options['prune']:
+            self.stdout.write(f'Removed {test_data.prune()} unused files')
+
+        self.stdout.write(
+            f'{TestCase.objects.exclude(input_hash="", expected_output_hash="").count()} test cases have file-backed data'
+        )
@@ -0,0 +1,19 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from compiler import workspaces
+
+
+class Command(BaseCommand):
+    help = 'Show free space and leak counts of the judge workspaces, or remove leaked ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sweep', action='store_true', help='Remove workspaces of processes that no longer run')
+
+    def handle(self, *args, **options):
+        if options['sweep']:
+            removed = workspaces.sweep()
+            self.stdout.write(f'Removed {removed} leaked workspaces')
+
+        self.stdout.write(json.dumps(workspaces.stats(), indent=2))
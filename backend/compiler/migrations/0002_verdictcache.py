@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compiler', '0001_initial'),
+        ('problems', '0009_alter_submission_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerdictCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=20)),
+                ('code_hash', models.CharField(help_text='SHA-256 of the normalised code', max_length=64)),
+                ('tests_fingerprint', models.CharField(help_text='SHA-256 of the test cases and limits judged against', max_length=64)),
+                ('status', models.CharField(max_length=25)),
+                ('runtime', models.FloatField(blank=True, null=True)),
+                ('memory', models.FloatField(blank=True, null=True)),
+                ('test_case_results', models.JSONField(blank=True, null=True)),
+                ('compile_output', models.TextField(blank=True, default='')),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('problem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='problems.problem')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('problem', 'language', 'code_hash', 'tests_fingerprint'), name='unique_verdict_per_code_and_tests')],
+            },
+        ),
+    ]
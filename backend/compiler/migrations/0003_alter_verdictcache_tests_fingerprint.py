@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:38
+
+from django.db import migrations, models
+
+
+def drop_fingerprinted_verdicts(apps, schema_editor):
+    # Keyed by a hash of the tests that no tests_version will ever match
+    apps.get_model('compiler', 'VerdictCache').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compiler', '0002_verdictcache'),
+        ('problems', '0015_problem_tests_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='verdictcache',
+            name='tests_fingerprint',
+            field=models.CharField(help_text="The problem's tests_version when this was judged", max_length=64),
+        ),
+        migrations.RunPython(drop_fingerprinted_verdicts, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from django.utils import timezone
-from problems.models import Submission
+from problems.models import Problem, Submission
 
 class AIReview(models.Model):
     submission = models.ForeignKey(Submission, on_delete=models.CASCADE)
@@ -8,4 +8,33 @@ class AIReview(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     
     def __str__(self):
-        return f"Review for {self.submission}"
\ No newline at end of file
+        return f"Review for {self.submission}"
+
+class VerdictCache(models.Model):
+    """
+    The verdict of a piece of code on a problem's current test set.
+    Identical resubmissions are answered from here without running anything
+    (see compiler.verdict_cache).
+    """
+    problem = models.ForeignKey(Problem, on_delete=models.CASCADE)
+    language = models.CharField(max_length=20)
+    code_hash = models.CharField(max_length=64, help_text="SHA-256 of the normalised code")
+    tests_fingerprint = models.CharField(max_length=64, help_text="The problem's tests_version when this was judged")
+    status = models.CharField(max_length=25)
+    runtime = models.FloatField(null=True, blank=True)  # in seconds
+    memory = models.FloatField(null=True, blank=True)   # in MB
+    test_case_results = models.JSONField(null=True, blank=True)
+    compile_output = models.TextField(blank=True, default='')
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['problem', 'language', 'code_hash', 'tests_fingerprint'],
+                name='unique_verdict_per_code_and_tests',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.problem.title} - {self.language} - {self.status}"
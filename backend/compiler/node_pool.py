@@ -0,0 +1,151 @@
+"""
+Pool of pre-booted Node.js runners for JavaScript submissions. Each runner
+executes a single script and exits, so every test case gets a fresh process.
+"""
+import os
+import select
+import socket
+import subprocess
+import time
+from collections import deque
+from threading import Lock
+
+from django.conf import settings
+
+from .processes import Process, apply_rlimits, communicate
+
+RUNNER_SCRIPT = os.path.join(os.path.dirname(__file__), 'runners', 'node_runner.js')
+
+# Seconds to wait for a runner to report its pid
+START_TIMEOUT = 5
+
+
+class NodeRunner:
+    """A booted Node.js process waiting for the script it should run."""
+
+    def __init__(self, node):
+        self.control, runner_control = socket.socketpair()
+        try:
+            self.process = Process(
+                [node, RUNNER_SCRIPT, str(runner_control.fileno())],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                pass_fds=(runner_control.fileno(),),
+            )
+        except Exception:
+            self.control.close()
+            raise
+        finally:
+            runner_control.close()
+        self.started_at = time.monotonic()
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def start(self, script, limits=None):
+        """Apply limits and hand over the script; returns the Popen to communicate with."""
+        if limits is not None:
+            # The runner is the launcher's child, so only it knows its pid
+            apply_rlimits(self._read_pid(), limits)
+        self.control.sendall((script + '\n').encode())
+        self.control.close()
+        self.control = None
+        return self.process
+
+    def _read_pid(self):
+        data = b''
+        deadline = time.monotonic() + START_TIMEOUT
+        while not data.endswith(b'\n'):
+            readable, _, _ = select.select([self.control], [], [], max(deadline - time.monotonic(), 0))
+            if not readable:
+                raise TimeoutError('Node.js runner did not start')
+            chunk = self.control.recv(64)
+            if not chunk:
+                raise ConnectionError('Node.js runner exited')
+            data += chunk
+        return int(data)
+
+    def close(self):
+        if self.control is not None:
+            self.control.close()
+            self.control = None
+        try:
+            self.process.kill()
+        except ProcessLookupError:
+            pass
+        self.process.wait()
+        for pipe in (self.process.stdin, self.process.stdout, self.process.stderr):
+            pipe.close()
+
+
+class NodePool:
+    """Idle runners of one web process, topped up to size on every take."""
+
+    def __init__(self, size, node, max_idle):
+        self.size = size
+        self.node = node
+        self.max_idle = max_idle
+        self.idle = deque()
+        self.lock = Lock()
+
+    def take(self):
+        """The oldest usable idle runner, or None if none could be started."""
+        with self.lock:
+            self._fill()
+            while self.idle:
+                runner = self.idle.popleft()
+                if runner.alive() and time.monotonic() - runner.started_at < self.max_idle:
+                    break
+                runner.close()
+            else:
+                runner = None
+            # Start booting the replacement while this one runs
+            self._fill()
+        return runner
+
+    def _fill(self):
+        while len(self.idle) < self.size:
+            try:
+                self.idle.append(NodeRunner(self.node))
+            except Exception:
+                return
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = Lock()
+
+
+def get_pool(node):
+    """The runner pool of this process, or None when JUDGE_NODE_RUNNERS is 0."""
+    global _pool, _pool_pid
+    if settings.JUDGE_NODE_RUNNERS <= 0:
+        return None
+    with _pool_lock:
+        # A forked web worker must not share its parent's runners
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = NodePool(settings.JUDGE_NODE_RUNNERS, node, settings.JUDGE_NODE_RUNNER_MAX_IDLE)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def run(command, input_data, timeout, cancel_event=None, limits=None, comparator=None):
+    """
+    Run a [node, script] command on a pre-started runner.
+    Same result as processes.run_process(), or None when no runner is available.
+    """
+    node, script = command
+    pool = get_pool(node)
+    if pool is None:
+        return None
+    runner = pool.take()
+    if runner is None:
+        return None
+
+    try:
+        process = runner.start(script, limits)
+    except (OSError, ValueError):
+        runner.close()
+        return None
+    return communicate(process, input_data, timeout, cancel_event, limits, comparator)
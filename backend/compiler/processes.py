@@ -0,0 +1,369 @@
+"""
+Low-level helpers for running a child process under a time limit and the
+resource Limits of a judged program.
+"""
+import math
+import os
+import select
+import selectors
+import signal
+import subprocess
+import resource
+import time
+from collections import namedtuple
+from types import SimpleNamespace
+
+from . import cgroups, launcher
+
+# How often a running process checks whether it has been cancelled
+CANCEL_POLL_INTERVAL = 0.05
+
+# Size of the chunks written to and read from the child's pipes
+READ_CHUNK_SIZE = 64 * 1024
+WRITE_CHUNK_SIZE = select.PIPE_BUF
+
+# Output a program may write when no limits are given, in bytes
+DEFAULT_OUTPUT_LIMIT = 64 << 20
+
+# Only the start of stderr is kept; it is shown as the error message
+MAX_ERROR_BYTES = 64 * 1024
+
+# Only the start of stdout is kept, for showing to the user; everything the
+# program writes still counts towards its output limit
+MAX_OUTPUT_BYTES = 64 * 1024
+
+# Added to output that was cut short
+TRUNCATED_MARKER = '\n... (truncated)'
+
+# A program may take this many times its CPU time limit (plus a second) in
+# wall-clock time, to allow for waiting on input and a busy machine
+WALL_TIME_FACTOR = 2
+
+
+class Limits(namedtuple('Limits', ['time', 'memory', 'output'])):
+    """CPU time (seconds), memory (MB) and output size (MB) a program may use."""
+
+    __slots__ = ()
+
+    @property
+    def wall_timeout(self):
+        return self.time * WALL_TIME_FACTOR + 1
+
+    def rlimits(self):
+        """(resource, soft, hard) triples that enforce these limits in the child."""
+        # The kernel only counts whole CPU seconds; the exact limit is checked
+        # against the measured CPU time afterwards
+        cpu = math.ceil(self.time) + 1
+        return [
+            (resource.RLIMIT_CPU, cpu, cpu + 1),
+            (resource.RLIMIT_DATA, self.memory << 20, self.memory << 20),
+            # Pipes are not files, so this only limits files the program writes
+            (resource.RLIMIT_FSIZE, self.output << 20, self.output << 20),
+        ]
+
+    def launcher_args(self):
+        flags = {resource.RLIMIT_CPU: '-c', resource.RLIMIT_DATA: '-m', resource.RLIMIT_FSIZE: '-f'}
+        args = []
+        for limit, soft, _ in self.rlimits():
+            args += [flags[limit], str(soft)]
+        return args
+
+
+def apply_rlimits(pid, limits):
+    """Set limits on an already running process (used when there is no launcher)."""
+    for limit, soft, hard in limits.rlimits():
+        resource.prlimit(pid, limit, (soft, hard))
+
+
+class Process(subprocess.Popen):
+    """
+    Popen that runs the command under the judge launcher in its own session,
+    applying limits (and a cgroup, with the governor on). Once reaped, rusage
+    holds its CPU time and peak memory; kill() stops the whole process group.
+    """
+
+    rusage = None
+    cgroup = None
+
+    def __init__(self, command, pass_fds=(), limits=None, group_limits=None, **kwargs):
+        self.stats_fd = None
+        launcher_path = launcher.get_launcher()
+        if launcher_path is None:
+            super().__init__(command, pass_fds=pass_fds, start_new_session=True, **kwargs)
+            if limits is not None:
+                # Best effort: the program is already running at this point
+                try:
+                    apply_rlimits(self.pid, limits)
+                except OSError:
+                    pass
+            return
+
+        limit_args = limits.launcher_args() if limits is not None else []
+        self.cgroup = cgroups.create(group_limits or limits)
+        if self.cgroup is not None:
+            limit_args += ['-g', self.cgroup.procs_path]
+        self.stats_fd, stats_w = os.pipe()
+        try:
+            super().__init__(
+                [launcher_path, str(stats_w), *limit_args, '--', *command],
+                pass_fds=(*pass_fds, stats_w),
+                start_new_session=True,
+                **kwargs
+            )
+        except Exception:
+            os.close(self.stats_fd)
+            self._remove_cgroup()
+            raise
+        finally:
+            os.close(stats_w)
+
+    def kill(self):
+        if self.returncode is None:
+            try:
+                os.killpg(self.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            if self.cgroup is not None:
+                # Also whatever left the process group
+                self.cgroup.kill()
+
+    def poll(self):
+        # Popen.poll() would reap the process without collecting its usage
+        try:
+            return self.wait(timeout=0)
+        except subprocess.TimeoutExpired:
+            return None
+
+    def wait(self, timeout=None):
+        if self.returncode is not None:
+            return self.returncode
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 0.0005
+        while True:
+            flags = 0 if deadline is None else os.WNOHANG
+            try:
+                pid, status, rusage = os.wait4(self.pid, flags)
+            except ChildProcessError:
+                # Reaped elsewhere (e.g. by poll()), the usage is lost
+                pid, status, rusage = self.pid, 0, None
+            if pid == self.pid:
+                self.returncode = os.waitstatus_to_exitcode(status)
+                self.rusage = self._launcher_usage() if self.stats_fd is not None else rusage
+                if self.cgroup is not None:
+                    self.rusage = self.cgroup.usage(self.rusage)
+                    self._remove_cgroup()
+                return self.returncode
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(self.args, timeout)
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.05)
+
+    def _remove_cgroup(self):
+        if self.cgroup is not None:
+            self.cgroup.remove()
+            self.cgroup = None
+
+    def _launcher_usage(self):
+        try:
+            return read_launcher_usage(self.stats_fd)
+        finally:
+            os.close(self.stats_fd)
+            self.stats_fd = None
+
+
+def read_launcher_usage(stats_fd):
+    """The rusage-like figures an exited launcher wrote to its stats pipe, or None."""
+    # The launcher has exited, so whatever it wrote is already in the pipe
+    stats = os.read(stats_fd, 256).split()
+    if len(stats) != 3:
+        # Killed before it could report
+        return None
+    return SimpleNamespace(ru_utime=float(stats[0]), ru_stime=float(stats[1]), ru_maxrss=int(stats[2]))
+
+
+def run_process(command, input_data, timeout, cancel_event=None, limits=None, comparator=None, cwd=None):
+    """
+    Run a command, feed it input_data on stdin and collect its output (see
+    communicate()). 'spawn_time' in the result is how long starting it took.
+    """
+    started = time.perf_counter()
+    try:
+        process = Process(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            limits=limits,
+        )
+    except Exception as e:
+        return {'output': str(e), 'error': True}
+    spawn_time = time.perf_counter() - started
+
+    result = communicate(process, input_data, timeout, cancel_event, limits, comparator)
+    result['spawn_time'] = spawn_time
+    return result
+
+
+def communicate(process, input_data, timeout, cancel_event=None, limits=None, comparator=None):
+    """
+    Feed input_data (a str or bytes-like object) to a started process and wait
+    for it to finish.
+
+    Returns a dict with 'output' and 'error': stdout on a zero exit code,
+    stderr otherwise, or a message when the process timed out or failed, plus
+    'cpu_time', 'wall_time' and 'memory'. A program that writes more than the
+    output limit, or a line the comparator rejects, is killed straight away.
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    output_limit = limits.output << 20 if limits is not None else DEFAULT_OUTPUT_LIMIT
+    input_bytes = input_data.encode() if isinstance(input_data, str) else input_data
+    try:
+        outcome, stdout, stderr = _pump(process, input_bytes, deadline, cancel_event, output_limit, comparator)
+        if outcome == 'finished':
+            # The pipes are closed but the process may still be running
+            try:
+                process.wait(timeout=max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                outcome = 'timeout'
+    except Exception as e:
+        _kill(process)
+        return {'output': str(e), 'error': True, **_usage(getattr(process, 'rusage', None), started)}
+
+    if outcome != 'finished':
+        _kill(process)
+    return outcome_result(outcome, process.returncode, stdout, stderr, _usage(getattr(process, 'rusage', None), started))
+
+
+def outcome_result(outcome, returncode, stdout, stderr, usage):
+    """The communicate() result for how the run ended (see _pump()) and what it wrote."""
+    if outcome == 'timeout':
+        return {'output': 'Time limit exceeded', 'error': True, 'timed_out': True, **usage}
+    if outcome == 'cancelled':
+        return {'output': 'Cancelled', 'error': True, 'cancelled': True, **usage}
+    if outcome == 'mismatch':
+        return {'output': _shown(stdout, MAX_OUTPUT_BYTES), 'error': False, 'mismatch': True, **usage}
+    if outcome == 'output_limit':
+        return {
+            'output': 'Output limit exceeded',
+            'error': True,
+            'output_limit_exceeded': True,
+            'partial_output': _shown(stdout, MAX_OUTPUT_BYTES),
+            **usage
+        }
+
+    if returncode == 0:
+        return {'output': _shown(stdout, MAX_OUTPUT_BYTES), 'error': False, **usage}
+    else:
+        return {'output': _shown(stderr, MAX_ERROR_BYTES), 'error': True, **usage}
+
+
+def _usage(rusage, started):
+    """
+    CPU time, wall time and peak memory of a reaped process with the given
+    rusage, and whether its cgroup's memory limit got it killed.
+    """
+    usage = {
+        'cpu_time': rusage.ru_utime + rusage.ru_stime if rusage else 0.0,
+        'wall_time': time.monotonic() - started,
+        # ru_maxrss is in kilobytes on Linux
+        'memory': rusage.ru_maxrss / 1024 if rusage else 0.0,
+    }
+    if getattr(rusage, 'oom_killed', False):
+        usage['oom_killed'] = True
+    return usage
+
+
+def _pump(process, input_bytes, deadline, cancel_event, output_limit, comparator=None):
+    """
+    Write the input and read both output pipes until they are closed.
+    Returns ('finished' | 'timeout' | 'cancelled' | 'output_limit' |
+    'mismatch', stdout bytes, stderr bytes).
+    """
+    outputs = {process.stdout: bytearray(), process.stderr: bytearray()}
+    caps = {process.stdout: MAX_OUTPUT_BYTES + 1, process.stderr: MAX_ERROR_BYTES + 1}
+    written = 0
+    input_view = memoryview(input_bytes)
+    offset = 0
+
+    try:
+        with selectors.DefaultSelector() as selector:
+            selector.register(process.stdout, selectors.EVENT_READ)
+            selector.register(process.stderr, selectors.EVENT_READ)
+            if input_view:
+                selector.register(process.stdin, selectors.EVENT_WRITE)
+            else:
+                process.stdin.close()
+
+            outcome = 'finished'
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    outcome = 'timeout'
+                    break
+                if cancel_event is not None:
+                    if cancel_event.is_set():
+                        outcome = 'cancelled'
+                        break
+                    # Wait in short slices so a cancellation is noticed quickly
+                    remaining = min(remaining, CANCEL_POLL_INTERVAL)
+
+                for key, _ in selector.select(remaining):
+                    if key.fileobj is process.stdin:
+                        try:
+                            offset += os.write(key.fd, input_view[offset:offset + WRITE_CHUNK_SIZE])
+                        except BrokenPipeError:
+                            # The program exited without reading all of its input
+                            offset = len(input_view)
+                        if offset >= len(input_view):
+                            selector.unregister(key.fileobj)
+                            key.fileobj.close()
+                    else:
+                        data = os.read(key.fd, READ_CHUNK_SIZE)
+                        if not data:
+                            selector.unregister(key.fileobj)
+                            key.fileobj.close()
+                            continue
+                        buffer = outputs[key.fileobj]
+                        buffer += data[:caps[key.fileobj] - len(buffer)]
+                        written += len(data)
+                        if written > output_limit:
+                            outcome = 'output_limit'
+                            break
+                        if comparator is not None and key.fileobj is process.stdout and not comparator.feed(data):
+                            outcome = 'mismatch'
+                            break
+                if outcome != 'finished':
+                    break
+    finally:
+        for pipe in (process.stdin, process.stdout, process.stderr):
+            if not pipe.closed:
+                pipe.close()
+        # An mmap input cannot be closed while a view of it is alive
+        input_view.release()
+
+    return outcome, bytes(outputs[process.stdout]), bytes(outputs[process.stderr])
+
+
+def _kill(process):
+    try:
+        process.kill()
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+
+def _shown(data, limit):
+    """Decoded output, cut to limit bytes."""
+    if len(data) > limit:
+        return _decode(data[:limit]) + TRUNCATED_MARKER
+    return _decode(data)
+
+
+def _decode(data):
+    # Same result as text=True: newlines are normalised to '\n'
+    return data.decode(errors='replace').replace('\r\n', '\n').replace('\r', '\n')
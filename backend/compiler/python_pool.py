@@ -0,0 +1,212 @@
+"""
+Pool of pre-warmed Python interpreters ("zygotes") that fork a clean child
+per execution, saving the interpreter start-up on every test case.
+"""
+import json
+import os
+import queue
+import select
+import signal
+import socket
+import subprocess
+import time
+from threading import Lock
+from types import SimpleNamespace
+
+from django.conf import settings
+
+from .processes import communicate
+
+ZYGOTE_SCRIPT = os.path.join(os.path.dirname(__file__), 'runners', 'python_zygote.py')
+
+# Seconds to wait for a zygote to acknowledge a fork
+SPAWN_TIMEOUT = 5
+
+
+class Zygote:
+    """One warm interpreter process and its control socket."""
+
+    def __init__(self, python):
+        self.sock, zygote_sock = socket.socketpair()
+        try:
+            self.process = subprocess.Popen(
+                [python, ZYGOTE_SCRIPT, str(zygote_sock.fileno())],
+                pass_fds=(zygote_sock.fileno(),),
+                stdin=subprocess.DEVNULL,
+            )
+        finally:
+            zygote_sock.close()
+        self.buffer = b''
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def spawn(self, script, limits=None):
+        """Fork a child that runs script under limits; returns a ZygoteChild."""
+        stdin_r, stdin_w = os.pipe()
+        stdout_r, stdout_w = os.pipe()
+        stderr_r, stderr_w = os.pipe()
+        try:
+            request = json.dumps({
+                'script': script,
+                'rlimits': limits.rlimits() if limits is not None else [],
+            }).encode()
+            socket.send_fds(self.sock, [request], [stdin_r, stdout_w, stderr_w])
+        except Exception:
+            for fd in (stdin_w, stdout_r, stderr_r):
+                os.close(fd)
+            raise
+        finally:
+            # The child has its own copies now
+            for fd in (stdin_r, stdout_w, stderr_w):
+                os.close(fd)
+
+        try:
+            reply = self.receive(SPAWN_TIMEOUT)
+        except Exception:
+            for fd in (stdin_w, stdout_r, stderr_r):
+                os.close(fd)
+            raise
+        return ZygoteChild(self, reply['pid'], stdin_w, stdout_r, stderr_r)
+
+    def receive(self, timeout=None):
+        """Read the next JSON message, raising subprocess.TimeoutExpired after timeout seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b'\n' not in self.buffer:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            readable, _, _ = select.select([self.sock], [], [], remaining)
+            if not readable:
+                raise subprocess.TimeoutExpired('python zygote', timeout)
+            data = self.sock.recv(4096)
+            if not data:
+                raise ConnectionError('Python zygote exited')
+            self.buffer += data
+        line, self.buffer = self.buffer.split(b'\n', 1)
+        return json.loads(line)
+
+    def close(self):
+        self.sock.close()
+        try:
+            self.process.kill()
+        except ProcessLookupError:
+            pass
+        self.process.wait()
+
+
+class ZygoteChild:
+    """A forked child, shaped like subprocess.Popen for processes.communicate()."""
+
+    def __init__(self, zygote, pid, stdin_fd, stdout_fd, stderr_fd):
+        self.zygote = zygote
+        self.pid = pid
+        self.stdin = open(stdin_fd, 'wb', buffering=0)
+        self.stdout = open(stdout_fd, 'rb', buffering=0)
+        self.stderr = open(stderr_fd, 'rb', buffering=0)
+        self.returncode = None
+        self.rusage = None
+
+    def kill(self):
+        if self.returncode is None:
+            try:
+                os.killpg(self.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def wait(self, timeout=None):
+        if self.returncode is None:
+            # The zygote reports the exit code and usage once it has reaped the child
+            reply = self.zygote.receive(timeout)
+            self.returncode = reply['returncode']
+            self.rusage = SimpleNamespace(**reply['rusage'])
+        return self.returncode
+
+
+class PythonPool:
+    """Idle zygotes of one web process, started lazily up to size."""
+
+    def __init__(self, size, python):
+        self.size = size
+        self.python = python
+        self.idle = queue.LifoQueue()
+        self.started = 0
+        self.lock = Lock()
+
+    def acquire(self):
+        """An idle zygote, a newly started one, or None when all are busy."""
+        while True:
+            try:
+                zygote = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            if zygote.alive():
+                return zygote
+            self.discard(zygote)
+
+        with self.lock:
+            if self.started >= self.size:
+                return None
+            self.started += 1
+        try:
+            return Zygote(self.python)
+        except Exception:
+            with self.lock:
+                self.started -= 1
+            return None
+
+    def release(self, zygote, healthy=True):
+        if healthy and zygote.alive():
+            self.idle.put(zygote)
+        else:
+            self.discard(zygote)
+
+    def discard(self, zygote):
+        zygote.close()
+        with self.lock:
+            self.started -= 1
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = Lock()
+
+
+def get_pool(python):
+    """The zygote pool of this process, or None when JUDGE_PYTHON_ZYGOTES is 0."""
+    global _pool, _pool_pid
+    if settings.JUDGE_PYTHON_ZYGOTES <= 0:
+        return None
+    with _pool_lock:
+        # A forked web worker must not share its parent's zygotes
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = PythonPool(settings.JUDGE_PYTHON_ZYGOTES, python)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def run(command, input_data, timeout, cancel_event=None, limits=None, comparator=None):
+    """
+    Run a [python, script] command in a child forked from a warm zygote.
+    Same result as processes.run_process(), or None when no zygote is free.
+    """
+    python, script = command
+    pool = get_pool(python)
+    if pool is None:
+        return None
+    zygote = pool.acquire()
+    if zygote is None:
+        return None
+
+    try:
+        child = zygote.spawn(script, limits)
+    except Exception:
+        pool.discard(zygote)
+        return None
+
+    healthy = False
+    try:
+        result = communicate(child, input_data, timeout, cancel_event, limits, comparator)
+        # The zygote can only be reused once it has reported the exit code
+        healthy = child.returncode is not None
+    finally:
+        pool.release(zygote, healthy)
+    return result
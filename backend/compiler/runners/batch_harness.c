@@ -0,0 +1,225 @@
+/*
+ * Batch harness for compiled submissions, loaded into the program with
+ * LD_PRELOAD.
+ *
+ * When JUDGE_BATCH_WALL_TIMEOUT is set, this library's constructor takes
+ * over the process before main() runs. It reads every test input from
+ * stdin and forks one child per test. Each child returns from the
+ * constructor and runs the program's own main() as usual, with stdin,
+ * stdout and stderr replaced by in-memory files. The constructor never
+ * returns in the parent.
+ *
+ * Input:  "<count>\n", then for every test "<length>\n<input bytes>".
+ * Output: for every test, in order,
+ *   "<index> <exit code> <signal> <timed out> <cpu seconds> <max rss kB>
+ *    <wall seconds> <stdout length> <stderr length>\n"
+ * (one line) followed by the stdout and stderr bytes.
+ *
+ * The children inherit the rlimits the launcher set on this process, so
+ * every test is held to them separately. Writing past RLIMIT_FSIZE kills a
+ * child with SIGXFSZ, which the judge reports as an output limit.
+ */
+#define _GNU_SOURCE
+#include <errno.h>
+#include <signal.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/mman.h>
+#include <sys/resource.h>
+#include <sys/stat.h>
+#include <sys/wait.h>
+#include <time.h>
+#include <unistd.h>
+
+static int in_fd, out_fd;
+static char in_buffer[65536];
+static size_t in_start, in_end;
+
+/* Bytes buffered from stdin, reading more when the buffer is empty */
+static size_t fill(void)
+{
+    if (in_start == in_end) {
+        ssize_t n;
+        do {
+            n = read(in_fd, in_buffer, sizeof(in_buffer));
+        } while (n < 0 && errno == EINTR);
+        in_start = 0;
+        in_end = n > 0 ? n : 0;
+    }
+    return in_end - in_start;
+}
+
+static int read_byte(void)
+{
+    return fill() ? (unsigned char)in_buffer[in_start++] : -1;
+}
+
+static long read_number(void)
+{
+    long value = 0;
+    int c;
+    while ((c = read_byte()) != '\n') {
+        if (c < '0' || c > '9')
+            return -1;
+        value = value * 10 + (c - '0');
+    }
+    return value;
+}
+
+static int write_all(int fd, const char *data, size_t size)
+{
+    while (size > 0) {
+        ssize_t n = write(fd, data, size);
+        if (n < 0) {
+            if (errno == EINTR)
+                continue;
+            return -1;
+        }
+        data += n;
+        size -= n;
+    }
+    return 0;
+}
+
+/* Copy the next `size` input bytes into fd */
+static int copy_input(int fd, long size)
+{
+    while (size > 0) {
+        size_t available = fill();
+        if (available == 0)
+            return -1;
+        if (available > (size_t)size)
+            available = size;
+        if (write_all(fd, in_buffer + in_start, available) < 0)
+            return -1;
+        in_start += available;
+        size -= available;
+    }
+    return 0;
+}
+
+/* Send the contents of fd to the judge */
+static int copy_output(int fd, off_t size)
+{
+    char buffer[65536];
+    off_t offset = 0;
+    while (offset < size) {
+        ssize_t n = pread(fd, buffer, sizeof(buffer), offset);
+        if (n <= 0)
+            return -1;
+        if (write_all(out_fd, buffer, n) < 0)
+            return -1;
+        offset += n;
+    }
+    return 0;
+}
+
+static double now(void)
+{
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+static void sleep_for(double seconds)
+{
+    struct timespec ts = { (time_t)seconds, (long)((seconds - (time_t)seconds) * 1e9) };
+    nanosleep(&ts, NULL);
+}
+
+static off_t file_size(int fd)
+{
+    struct stat st;
+    return fstat(fd, &st) == 0 ? st.st_size : 0;
+}
+
+__attribute__((constructor))
+static void run_batch(void)
+{
+    const char *wall_timeout_env = getenv("JUDGE_BATCH_WALL_TIMEOUT");
+    /* Programs the submission starts must not run the harness again */
+    unsetenv("LD_PRELOAD");
+    if (wall_timeout_env == NULL)
+        return;
+    double wall_timeout = atof(wall_timeout_env);
+    unsetenv("JUDGE_BATCH_WALL_TIMEOUT");
+
+    in_fd = dup(0);
+    out_fd = dup(1);
+    long count = read_number();
+    if (count < 0)
+        _exit(2);
+
+    for (long index = 0; index < count; index++) {
+        long input_size = read_number();
+        int input = memfd_create("stdin", 0);
+        int output = memfd_create("stdout", 0);
+        int error = memfd_create("stderr", 0);
+        if (input_size < 0 || input < 0 || output < 0 || error < 0 || copy_input(input, input_size) < 0)
+            _exit(2);
+        lseek(input, 0, SEEK_SET);
+
+        double started = now();
+        pid_t pid = fork();
+        if (pid < 0)
+            _exit(2);
+        if (pid == 0) {
+            dup2(input, 0);
+            dup2(output, 1);
+            dup2(error, 2);
+            close(input);
+            close(output);
+            close(error);
+            close(in_fd);
+            close(out_fd);
+            /* On to the program's main() */
+            return;
+        }
+
+        int status = 0, timed_out = 0;
+        struct rusage usage;
+        double delay = 0.0005;
+        for (;;) {
+            pid_t reaped = wait4(pid, &status, WNOHANG, &usage);
+            if (reaped == pid)
+                break;
+            if (reaped < 0 && errno != EINTR)
+                _exit(2);
+            double remaining = started + wall_timeout - now();
+            if (remaining <= 0) {
+                kill(pid, SIGKILL);
+                while (wait4(pid, &status, 0, &usage) < 0 && errno == EINTR)
+                    ;
+                timed_out = 1;
+                break;
+            }
+            sleep_for(delay < remaining ? delay : remaining);
+            if (delay < 0.01)
+                delay *= 2;
+        }
+        double wall_time = now() - started;
+
+        off_t output_size = file_size(output), error_size = file_size(error);
+        char header[256];
+        int header_size = snprintf(header, sizeof(header), "%ld %d %d %d %.6f %ld %.6f %lld %lld\n",
+                                   index,
+                                   WIFEXITED(status) ? WEXITSTATUS(status) : 0,
+                                   WIFSIGNALED(status) ? WTERMSIG(status) : 0,
+                                   timed_out,
+                                   usage.ru_utime.tv_sec + usage.ru_utime.tv_usec / 1e6 +
+                                   usage.ru_stime.tv_sec + usage.ru_stime.tv_usec / 1e6,
+                                   usage.ru_maxrss,
+                                   wall_time,
+                                   (long long)output_size,
+                                   (long long)error_size);
+        if (write_all(out_fd, header, header_size) < 0 ||
+            copy_output(output, output_size) < 0 ||
+            copy_output(error, error_size) < 0)
+            _exit(2);
+        close(input);
+        close(output);
+        close(error);
+    }
+    _exit(0);
+}
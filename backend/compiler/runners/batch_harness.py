@@ -0,0 +1,144 @@
+"""
+Batch harness for Python submissions (see compiler.batching).
+
+Usage: python batch_harness.py WALL_TIMEOUT OUTPUT_LIMIT_BYTES SCRIPT
+
+This file runs outside Django and must only use the standard library.
+"""
+import os
+import select
+import signal
+import sys
+import time
+
+from python_zygote import PRELOAD, run_child
+
+# Largest chunk of a child's stdout sent on at once
+CHUNK_BYTES = 65536
+
+# How often a running child is checked on, in seconds
+POLL_SECONDS = 0.01
+
+
+def read_line(stream):
+    line = stream.readline()
+    if not line.endswith(b'\n'):
+        raise EOFError('Truncated batch input')
+    return int(line)
+
+
+def send_chunk(stdout, index, data):
+    stdout.write(b'%d %d\n' % (index, len(data)))
+    stdout.write(data)
+    stdout.flush()
+
+
+def run_test(index, script, input_data, wall_timeout, output_limit, stdout):
+    """
+    Run one test, sending its stdout on in chunk frames; returns
+    (status, rusage, timed_out, output_exceeded, wall time, stderr).
+    """
+    input_fd = os.memfd_create('stdin')
+    error_fd = os.memfd_create('stderr')
+    os.write(input_fd, input_data)
+    os.lseek(input_fd, 0, os.SEEK_SET)
+    read_fd, write_fd = os.pipe()
+
+    started = time.monotonic()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        # Python ignores SIGXFSZ; going over the output limit must kill the test
+        signal.signal(signal.SIGXFSZ, signal.SIG_DFL)
+        run_child(script, [input_fd, write_fd, error_fd], [])
+    os.close(write_fd)
+
+    timed_out = False
+    written = 0
+    pipe_open = True
+    delay = 0.0005
+    while True:
+        reaped, status, rusage = os.wait4(pid, os.WNOHANG)
+        if reaped == pid:
+            break
+        remaining = started + wall_timeout - time.monotonic()
+        if remaining <= 0:
+            timed_out = True
+            break
+        if not pipe_open:
+            # The child closed its stdout, most likely on the way out
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, POLL_SECONDS)
+        elif select.select([read_fd], [], [], min(remaining, POLL_SECONDS))[0]:
+            data = os.read(read_fd, CHUNK_BYTES)[:output_limit + 1 - written]
+            pipe_open = bool(data)
+            if data:
+                send_chunk(stdout, index, data)
+                written += len(data)
+                if written > output_limit:
+                    break
+
+    if reaped != pid:
+        os.kill(pid, signal.SIGKILL)
+        _, status, rusage = os.wait4(pid, 0)
+    else:
+        # What the child wrote just before exiting; a process it started may
+        # still hold the pipe, so this does not wait for the end of it
+        os.set_blocking(read_fd, False)
+        while pipe_open and written <= output_limit:
+            try:
+                data = os.read(read_fd, CHUNK_BYTES)[:output_limit + 1 - written]
+            except BlockingIOError:
+                break
+            pipe_open = bool(data)
+            if data:
+                send_chunk(stdout, index, data)
+                written += len(data)
+    wall_time = time.monotonic() - started
+
+    size = os.fstat(error_fd).st_size
+    error = os.pread(error_fd, size, 0) if size else b''
+    for fd in (input_fd, error_fd, read_fd):
+        os.close(fd)
+    return status, rusage, timed_out, written > output_limit, wall_time, error
+
+
+def main():
+    wall_timeout = float(sys.argv[1])
+    output_limit = int(sys.argv[2])
+    script = os.path.abspath(sys.argv[3])
+    for name in PRELOAD:
+        __import__(name)
+
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    count = read_line(stdin)
+    for index in range(count):
+        input_data = stdin.read(read_line(stdin))
+        status, rusage, timed_out, output_exceeded, wall_time, error = run_test(
+            index, script, input_data, wall_timeout, output_limit, stdout
+        )
+        if output_exceeded:
+            exit_code, signal_number = 0, signal.SIGXFSZ
+        elif os.WIFSIGNALED(status):
+            exit_code, signal_number = 0, os.WTERMSIG(status)
+        else:
+            exit_code, signal_number = os.WEXITSTATUS(status), 0
+        header = '%d %d %d %d %.6f %d %.6f %d %d\n' % (
+            index,
+            exit_code,
+            signal_number,
+            timed_out,
+            rusage.ru_utime + rusage.ru_stime,
+            rusage.ru_maxrss,
+            wall_time,
+            0,
+            len(error),
+        )
+        stdout.write(header.encode())
+        stdout.write(error)
+        stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
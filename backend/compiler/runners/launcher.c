@@ -0,0 +1,122 @@
+/*
+ * Launcher for judged programs.
+ *
+ * Usage: launcher STATS_FD [-c CPU_SECONDS] [-m DATA_BYTES] [-f FILE_BYTES]
+ *                 [-g CGROUP_PROCS] -- COMMAND [ARGS...]
+ *
+ * Forks and execs COMMAND with the launcher's stdin, stdout and stderr,
+ * after applying the requested limits (RLIMIT_CPU, RLIMIT_DATA and
+ * RLIMIT_FSIZE) to the child only. With -g, the child first joins the
+ * cgroup whose cgroup.procs file is CGROUP_PROCS. It then waits for it and writes "<user seconds> <system seconds> <max rss kB>\n"
+ * to STATS_FD. The launcher then exits the same way the command did.
+ *
+ * Measuring from this small process matters: a child's peak RSS starts at
+ * the size of the process it was forked from, which for the web worker is
+ * tens of megabytes.
+ */
+#include <errno.h>
+#include <fcntl.h>
+#include <signal.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/resource.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+static int usage(const char *name)
+{
+    fprintf(stderr, "usage: %s STATS_FD [-c CPU_SECONDS] [-m DATA_BYTES] [-f FILE_BYTES] [-g CGROUP_PROCS]"
+            " -- COMMAND [ARGS...]\n", name);
+    return 127;
+}
+
+static int set_limit(int resource, rlim_t soft, rlim_t hard)
+{
+    struct rlimit limit = { soft, hard };
+    return setrlimit(resource, &limit);
+}
+
+/* Move the calling process into a cgroup ("0" stands for the writer) */
+static int join_cgroup(const char *procs_path)
+{
+    int fd = open(procs_path, O_WRONLY);
+    if (fd < 0)
+        return -1;
+    int ok = write(fd, "0", 1) == 1;
+    close(fd);
+    return ok ? 0 : -1;
+}
+
+int main(int argc, char **argv)
+{
+    if (argc < 4)
+        return usage(argv[0]);
+    int stats_fd = atoi(argv[1]);
+
+    /* 0 means no limit */
+    rlim_t cpu = 0, data = 0, fsize = 0;
+    const char *cgroup = NULL;
+    int i = 2;
+    for (; i + 1 < argc && strcmp(argv[i], "--") != 0; i += 2) {
+        rlim_t value = strtoull(argv[i + 1], NULL, 10);
+        if (strcmp(argv[i], "-g") == 0)
+            cgroup = argv[i + 1];
+        else if (strcmp(argv[i], "-c") == 0)
+            cpu = value;
+        else if (strcmp(argv[i], "-m") == 0)
+            data = value;
+        else if (strcmp(argv[i], "-f") == 0)
+            fsize = value;
+        else
+            return usage(argv[0]);
+    }
+    if (i + 1 >= argc || strcmp(argv[i], "--") != 0)
+        return usage(argv[0]);
+    char **command = argv + i + 1;
+
+    pid_t pid = fork();
+    if (pid < 0) {
+        perror("fork");
+        return 127;
+    }
+    if (pid == 0) {
+        close(stats_fd);
+        if (cgroup && join_cgroup(cgroup) < 0) {
+            perror("cgroup");
+            _exit(127);
+        }
+        /* SIGXCPU at the soft CPU limit, SIGKILL a second later if ignored */
+        if ((cpu && set_limit(RLIMIT_CPU, cpu, cpu + 1) < 0) ||
+            (data && set_limit(RLIMIT_DATA, data, data) < 0) ||
+            (fsize && set_limit(RLIMIT_FSIZE, fsize, fsize) < 0)) {
+            perror("setrlimit");
+            _exit(127);
+        }
+        execvp(command[0], command);
+        fprintf(stderr, "%s: %s\n", command[0], strerror(errno));
+        _exit(127);
+    }
+
+    int status;
+    struct rusage usage;
+    while (wait4(pid, &status, 0, &usage) < 0) {
+        if (errno != EINTR) {
+            perror("wait4");
+            return 127;
+        }
+    }
+
+    dprintf(stats_fd, "%ld.%06ld %ld.%06ld %ld\n",
+            (long)usage.ru_utime.tv_sec, (long)usage.ru_utime.tv_usec,
+            (long)usage.ru_stime.tv_sec, (long)usage.ru_stime.tv_usec,
+            usage.ru_maxrss);
+    close(stats_fd);
+
+    if (WIFSIGNALED(status)) {
+        /* Die from the same signal so the judge sees the same exit status */
+        signal(WTERMSIG(status), SIG_DFL);
+        kill(getpid(), WTERMSIG(status));
+    }
+    return WIFEXITED(status) ? WEXITSTATUS(status) : 1;
+}
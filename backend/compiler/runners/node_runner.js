@@ -0,0 +1,37 @@
+/*
+ * Pre-started Node.js process for running one JavaScript submission.
+ *
+ * Started by compiler.node_pool with the number of a control socket as its only
+ * argument. The runner writes its pid to the socket so the judge can set its
+ * rlimits, and V8 and the Node.js runtime boot while the process waits. The
+ * judge then writes the path of the script to the socket and the script runs
+ * as the main module on this process's stdin, stdout and stderr, exactly as
+ * `node script.js` would. Each runner serves a single execution.
+ */
+const fs = require('fs');
+const Module = require('module');
+const path = require('path');
+
+// Warm up the built-in modules solutions usually read their input with
+require('readline');
+
+const controlFd = Number(process.argv[2]);
+fs.writeSync(controlFd, `${process.pid}\n`);
+
+// Block until the judge sends the script path, terminated by a newline
+let request = '';
+const chunk = Buffer.alloc(4096);
+while (!request.includes('\n')) {
+  const bytesRead = fs.readSync(controlFd, chunk, 0, chunk.length, null);
+  if (bytesRead === 0) {
+    // The judge went away without sending a job
+    process.exit(0);
+  }
+  request += chunk.toString('utf8', 0, bytesRead);
+}
+fs.closeSync(controlFd);
+
+const script = request.split('\n')[0];
+process.chdir(path.dirname(script));
+process.argv = [process.argv[0], script];
+Module.runMain();
@@ -0,0 +1,113 @@
+"""
+Pre-initialised Python interpreter that forks a fresh child per execution,
+driven by compiler.python_pool over the Unix socket on the fd it is given.
+
+This file runs outside Django and must only use the standard library.
+"""
+import json
+import os
+import random
+import resource
+import runpy
+import socket
+import sys
+import traceback
+
+# Modules commonly imported by solutions, loaded once so children start warm
+PRELOAD = (
+    'array', 'bisect', 'collections', 'copy', 'dataclasses', 'decimal',
+    'fractions', 'functools', 'heapq', 'io', 'itertools', 'math', 'operator',
+    're', 'statistics', 'string', 'typing',
+)
+
+
+def run_child(script, fds, rlimits):
+    """Runs in the forked child; never returns."""
+    code = 0
+    try:
+        for limit, soft, hard in rlimits:
+            resource.setrlimit(limit, (soft, hard))
+
+        # Wire the passed pipes up as the standard streams
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        sys.stdin = open(0, 'r', closefd=False)
+        sys.stdout = open(1, 'w', closefd=False)
+        sys.stderr = open(2, 'w', closefd=False)
+
+        # Match `python script.py` run from the script's directory
+        os.chdir(os.path.dirname(script))
+        sys.argv = [script]
+        sys.path[0] = os.path.dirname(script)
+        random.seed()
+
+        runpy.run_path(script, run_name='__main__')
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException as e:
+        # Hide the zygote's own frames so the traceback matches a cold start
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != script:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb)
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except Exception:
+            pass
+        os._exit(code)
+
+
+def send(sock, message):
+    sock.sendall((json.dumps(message) + '\n').encode())
+
+
+def serve(sock):
+    while True:
+        # The request line arrives with the three stream descriptors
+        message, fds, _, _ = socket.recv_fds(sock, 4096, 3)
+        if not message:
+            return
+        request = json.loads(message)
+
+        pid = os.fork()
+        if pid == 0:
+            sock.close()
+            # Own process group, so the judge can kill anything the script forks
+            os.setsid()
+            run_child(request['script'], fds, request.get('rlimits', []))
+
+        for fd in fds:
+            os.close(fd)
+        send(sock, {'pid': pid})
+
+        _, status, rusage = os.wait4(pid, 0)
+        send(sock, {
+            'pid': pid,
+            'returncode': os.waitstatus_to_exitcode(status),
+            'rusage': {
+                'ru_utime': rusage.ru_utime,
+                'ru_stime': rusage.ru_stime,
+                'ru_maxrss': rusage.ru_maxrss,
+            },
+        })
+
+
+def main():
+    for name in PRELOAD:
+        __import__(name)
+    sock = socket.socket(fileno=int(sys.argv[1]))
+    serve(sock)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from problems.models import Problem, TestCase
+
+from . import test_data, verdict_cache
+
+
+# Large test data is kept in files instead of the database
+
+@receiver(pre_save, sender=TestCase)
+def store_large_test_data(sender, instance, **kwargs):
+    test_data.externalize(instance)
+
+
+# Cached verdicts no longer apply once the tests, limits or checker of a problem change
+
+@receiver(post_save, sender=TestCase)
+@receiver(post_delete, sender=TestCase)
+def invalidate_verdicts_for_test_case(sender, instance, **kwargs):
+    verdict_cache.invalidate(instance.problem_id)
+
+
+@receiver(post_save, sender=Problem)
+def invalidate_verdicts_for_problem(sender, instance, created, **kwargs):
+    if not created:
+        verdict_cache.invalidate(instance.id)
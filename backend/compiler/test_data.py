@@ -0,0 +1,153 @@
+"""
+File-backed storage for test data longer than JUDGE_TEST_DATA_INLINE_LIMIT.
+The data is stored once per SHA-256 under JUDGE_TEST_DATA_DIR and the
+TestCase keeps its hash and a short preview.
+"""
+import hashlib
+import mmap
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Characters of a stored value kept in the TestCase text field
+PREVIEW_CHARS = 1024
+
+# Appended to that preview, so nobody mistakes it for the whole value
+PREVIEW_MARKER = '\n... (stored in the test data directory)'
+
+# prune() leaves files this recent alone: their test case may not be committed yet
+PRUNE_GRACE_SECONDS = 3600
+
+
+def is_enabled():
+    return settings.JUDGE_TEST_DATA_INLINE_LIMIT > 0
+
+
+def data_root():
+    return str(settings.JUDGE_TEST_DATA_DIR)
+
+
+def data_path(content_hash):
+    return os.path.join(data_root(), content_hash[:2], content_hash)
+
+
+def store(data):
+    """Write data (bytes) to the store unless it is already there; returns its hash."""
+    content_hash = hashlib.sha256(data).hexdigest()
+    path = data_path(content_hash)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written to a temporary file and renamed, so a reader never sees half a file
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    return content_hash
+
+
+def preview(text):
+    return text[:PREVIEW_CHARS] + PREVIEW_MARKER
+
+
+def stored_preview(content_hash):
+    """The preview of a stored value, read from the start of its file."""
+    with open(data_path(content_hash), 'rb') as f:
+        # A character is at most 4 bytes in UTF-8
+        start = f.read(PREVIEW_CHARS * 4)
+    return preview(start.decode(errors='ignore'))
+
+
+def _stored_preview_or_none(content_hash):
+    try:
+        return stored_preview(content_hash)
+    except OSError:
+        return None
+
+
+def _same_preview(text, stored):
+    # Browsers send textarea line breaks as \r\n
+    return stored is not None and text.replace('\r\n', '\n') == stored.replace('\r\n', '\n')
+
+
+def externalize(test_case):
+    """
+    Move the large fields of an unsaved TestCase to the store, or bring them
+    back inline when they were edited below the limit. A preview saved as
+    the new value raises ValueError.
+    """
+    for field, hash_field in (('input_data', 'input_hash'), ('expected_output', 'expected_output_hash')):
+        text = getattr(test_case, field)
+        content_hash = getattr(test_case, hash_field)
+        if content_hash and _same_preview(text, _stored_preview_or_none(content_hash)):
+            # Unchanged since it was stored
+            continue
+        if text.endswith(PREVIEW_MARKER):
+            # Saving a preview back would replace the stored data with its start
+            raise ValueError(f'{field} holds the preview of stored test data, not the data')
+
+        data = text.encode()
+        if is_enabled() and len(data) > settings.JUDGE_TEST_DATA_INLINE_LIMIT:
+            setattr(test_case, hash_field, store(data))
+            setattr(test_case, field, preview(text))
+        else:
+            setattr(test_case, hash_field, '')
+
+
+@contextmanager
+def open_input(test_case):
+    """
+    The test case's input, ready to be written to a program's stdin: the
+    inline text, or a read-only memory map of the stored file.
+    """
+    if not test_case.input_hash:
+        yield test_case.input_data
+        return
+    with open(data_path(test_case.input_hash), 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def read_input(test_case):
+    """The whole input as bytes or str, for callers that need it in memory."""
+    if not test_case.input_hash:
+        return test_case.input_data
+    with open(data_path(test_case.input_hash), 'rb') as f:
+        return f.read()
+
+
+def expected_output(test_case):
+    """The whole expected output of the test case."""
+    if not test_case.expected_output_hash:
+        return test_case.expected_output
+    with open(data_path(test_case.expected_output_hash), 'rb') as f:
+        return f.read().decode(errors='replace')
+
+
+def prune():
+    """Remove the stored files no test case refers to; returns how many were removed."""
+    from problems.models import TestCase
+
+    referenced = set()
+    for input_hash, output_hash in TestCase.objects.values_list('input_hash', 'expected_output_hash'):
+        referenced.update((input_hash, output_hash))
+
+    removed = 0
+    root = data_root()
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - PRUNE_GRACE_SECONDS
+    for prefix in os.listdir(root):
+        directory = os.path.join(root, prefix)
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if name not in referenced and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+    return removed
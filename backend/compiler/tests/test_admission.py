@@ -0,0 +1,58 @@
+import json
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from compiler import admission
+
+
+class ClientIdentityTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user('alice', password='secret')
+
+    def identity(self, **headers):
+        return admission.client_identity(self.factory.get('/', REMOTE_ADDR='10.0.0.1', **headers))
+
+    def test_token_of_a_user(self):
+        token = AccessToken.for_user(self.user)
+        self.assertEqual(self.identity(HTTP_AUTHORIZATION=f'Bearer {token}'), f'user:{self.user.pk}')
+
+    def test_bad_tokens_count_as_anonymous(self):
+        token = AccessToken.for_user(self.user)
+        inactive = User.objects.create_user('bob', is_active=False)
+        inactive_token = AccessToken.for_user(inactive)
+        deleted = User.objects.create_user('carol')
+        deleted_token = AccessToken.for_user(deleted)
+        deleted.delete()
+        for header in ('Bearer a b', 'Bearer nonsense', f'Bearer {inactive_token}', f'Bearer {deleted_token}',
+                       f'Bearer {str(token)[:-2]}'):
+            with self.subTest(header=header):
+                self.assertEqual(self.identity(HTTP_AUTHORIZATION=header), 'address:10.0.0.1')
+
+    def test_address_without_a_proxy_header(self):
+        self.assertEqual(self.identity(HTTP_X_REAL_IP='192.0.2.7'), 'address:10.0.0.1')
+
+    @override_settings(JUDGE_ADMISSION_CLIENT_ADDRESS_HEADER='X-Forwarded-For')
+    def test_address_from_the_proxy_header(self):
+        self.assertEqual(self.identity(HTTP_X_FORWARDED_FOR='203.0.113.9, 192.0.2.7'), 'address:192.0.2.7')
+        self.assertEqual(self.identity(), 'address:10.0.0.1')
+
+
+class RunCodeAdmissionTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(JUDGE_ADMISSION_DIR=directory.name))
+
+    def test_malformed_authorization_runs_as_anonymous(self):
+        response = self.client.post(
+            '/api/compiler/run-code/',
+            json.dumps({'code': 'print(1)', 'language': 'python'}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION='Bearer a b',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['output'], '1\n')
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from compiler import artifact_cache
+
+
+class ArtifactCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(
+            JUDGE_ARTIFACT_CACHE_DIR=os.path.join(self.directory, 'cache'), JUDGE_ARTIFACT_CACHE_MAX_BYTES=1000
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        artifact_cache._pending.clear()
+
+    def build(self, name, size):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(b'x' * size)
+        return path
+
+    def test_stored_builds_are_found(self):
+        artifact_cache.store('a' * 64, artifact_path=self.build('main', 10))
+        artifact_cache.store('b' * 64, compile_error='main.cpp:1: error')
+        destination = os.path.join(self.directory, 'copy')
+        self.assertEqual(artifact_cache.lookup('a' * 64, destination), ('artifact', destination))
+        self.assertEqual(artifact_cache.lookup('b' * 64, destination), ('compile_error', 'main.cpp:1: error'))
+        self.assertIsNone(artifact_cache.lookup('c' * 64, destination))
+
+        stats = artifact_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['stores'], stats['entries']), (2, 1, 2, 2))
+
+    def test_lookups_do_not_take_the_lock(self):
+        artifact_cache.store('a' * 64, artifact_path=self.build('main', 10))
+        artifact_cache._flush()
+        with mock.patch.object(artifact_cache, '_locked') as locked:
+            for _ in range(10):
+                artifact_cache.lookup('a' * 64, os.path.join(self.directory, 'copy'))
+                os.remove(os.path.join(self.directory, 'copy'))
+        locked.assert_not_called()
+        self.assertEqual(artifact_cache.stats()['hits'], 10)
+
+    def test_stores_under_the_limit_do_not_walk_the_cache(self):
+        artifact_cache.store('a' * 64, artifact_path=self.build('main', 10))
+        with mock.patch.object(artifact_cache, '_entries', wraps=artifact_cache._entries) as entries:
+            for key in 'bcd':
+                artifact_cache.store(key * 64, artifact_path=self.build('main', 10))
+        entries.assert_not_called()
+
+    def test_least_recently_used_builds_are_evicted(self):
+        for key in 'abc':
+            artifact_cache.store(key * 64, artifact_path=self.build('main', 400))
+            os.utime(artifact_cache._entry_dir(key * 64), (0, 0) if key == 'a' else None)
+        self.assertIsNone(artifact_cache.lookup('a' * 64, os.path.join(self.directory, 'copy')))
+        self.assertIsNotNone(artifact_cache.lookup('b' * 64, os.path.join(self.directory, 'copy')))
+        self.assertLessEqual(artifact_cache.stats()['bytes'], 1000)
+
+    def test_written_binary_does_not_change_the_cache(self):
+        artifact_cache.store('a' * 64, artifact_path=self.build('main', 10))
+        destination = os.path.join(self.directory, 'copy')
+        artifact_cache.lookup('a' * 64, destination)
+        with open(destination, 'wb') as f:
+            f.write(b'changed')
+        os.remove(destination)
+        artifact_cache.lookup('a' * 64, destination)
+        with open(destination, 'rb') as f:
+            self.assertEqual(f.read(), b'x' * 10)
@@ -0,0 +1,69 @@
+import asyncio
+import os
+import signal
+import sys
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from compiler.async_execution import run_process_async
+from compiler.processes import MAX_OUTPUT_BYTES, TRUNCATED_MARKER
+
+# Leaves a child in a session of its own that holds stdout and stderr open,
+# writing its pid to the file named by argv[1]
+ESCAPING_CHILD = '''
+import os, sys, time
+if os.fork() == 0:
+    os.setsid()
+    with open(sys.argv[1], 'w') as f:
+        f.write(str(os.getpid()))
+    time.sleep(30)
+    os._exit(0)
+'''
+
+
+class RunProcessAsyncTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.pid_file = os.path.join(directory.name, 'child.pid')
+        self.addCleanup(self.kill_escaped_child)
+
+    def kill_escaped_child(self):
+        try:
+            with open(self.pid_file) as f:
+                os.kill(int(f.read()), signal.SIGKILL)
+        except (OSError, ValueError):
+            pass
+
+    def run_python(self, code, input_data='', timeout=2):
+        command = [sys.executable, '-c', code, self.pid_file]
+        return asyncio.run(run_process_async(command, input_data, timeout))
+
+    def test_output(self):
+        result = self.run_python('print(input()[::-1])', 'abc')
+        self.assertFalse(result['error'])
+        self.assertEqual(result['output'], 'cba\n')
+
+    def test_long_output_is_cut_for_showing(self):
+        result = self.run_python(f'print("x" * {MAX_OUTPUT_BYTES * 4})')
+        self.assertEqual(result['output'], 'x' * MAX_OUTPUT_BYTES + TRUNCATED_MARKER)
+
+    def test_timeout(self):
+        result = self.run_python('while True: pass')
+        self.assertTrue(result['timed_out'])
+
+    def test_child_holding_the_pipes_does_not_outlive_the_timeout(self):
+        for code in (ESCAPING_CHILD + 'while True: pass\n', ESCAPING_CHILD + 'print("done")\n'):
+            started = time.monotonic()
+            result = self.run_python(code)
+            self.assertTrue(result['timed_out'])
+            self.assertLess(time.monotonic() - started, 5)
+            self.kill_escaped_child()
+
+    def test_unread_input_does_not_block_the_kill(self):
+        started = time.monotonic()
+        result = self.run_python(ESCAPING_CHILD + 'while True: pass\n', 'x' * (8 << 20))
+        self.assertTrue(result['timed_out'])
+        self.assertLess(time.monotonic() - started, 5)
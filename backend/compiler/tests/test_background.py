@@ -0,0 +1,79 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from compiler import background
+from judge import queue
+from judge.models import JudgeJob
+from problems.models import Problem, Submission, TestCase as ProblemTestCase
+
+SOLUTION = 'a, b = map(int, input().split())\nprint(a + b)\n'
+
+
+class ImmediateExecutor:
+    def submit(self, function, *args):
+        function(*args)
+
+
+@override_settings(JUDGE_QUEUE='local', JUDGE_JOB_LEASE=3600)
+@mock.patch('compiler.background.get_executor', ImmediateExecutor)
+class LocalQueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice')
+        self.problem = Problem.objects.create(title='Sum', description='Add', difficulty='easy')
+        for a, b in ((1, 2), (3, 4)):
+            ProblemTestCase.objects.create(problem=self.problem, input_data=f'{a} {b}', expected_output=str(a + b))
+
+    def submit(self, code=SOLUTION):
+        return Submission.objects.create(
+            user=self.user, problem=self.problem, code=code, language='python', status='pending'
+        )
+
+    def test_submission_is_judged_under_a_lease(self):
+        submission = self.submit()
+        with self.captureOnCommitCallbacks(execute=True):
+            background.enqueue_submission(submission)
+        submission.refresh_from_db()
+        self.assertEqual(submission.status, 'accepted')
+        job = JudgeJob.objects.get(submission_id=submission.id)
+        self.assertEqual((job.status, job.attempts, job.worker), ('done', 1, queue.worker_name()))
+        self.assertEqual(background._held, {})
+
+    def test_judge_failure_is_an_internal_error(self):
+        submission = self.submit()
+        with mock.patch('compiler.background.judge_stored_submission', side_effect=RuntimeError('disk full')):
+            with self.assertLogs('compiler.background', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+                background.enqueue_submission(submission)
+        submission.refresh_from_db()
+        self.assertEqual(submission.status, 'internal_error')
+        job = JudgeJob.objects.get(submission_id=submission.id)
+        self.assertEqual((job.status, job.error), ('failed', 'disk full'))
+
+    def test_job_of_a_dead_process_is_taken_over(self):
+        submission = self.submit()
+        job = queue.enqueue(submission, worker='gone:1')
+        JudgeJob.objects.filter(id=job.id).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        background.recover_lost_jobs()
+        submission.refresh_from_db()
+        self.assertEqual(submission.status, 'accepted')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.worker), ('done', 2, queue.worker_name()))
+
+    def test_held_job_is_left_alone(self):
+        submission = self.submit()
+        queue.enqueue(submission, worker='busy:1')
+        background.recover_lost_jobs()
+        submission.refresh_from_db()
+        self.assertEqual(submission.status, 'pending')
+
+    @override_settings(JUDGE_JOB_MAX_ATTEMPTS=1)
+    def test_job_is_given_up_after_its_last_attempt(self):
+        submission = self.submit()
+        job = queue.enqueue(submission, worker='gone:1')
+        JudgeJob.objects.filter(id=job.id).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        background.recover_lost_jobs()
+        submission.refresh_from_db()
+        self.assertEqual(submission.status, 'internal_error')
@@ -0,0 +1,79 @@
+import time
+
+from django.test import SimpleTestCase
+
+from compiler.batching import BatchReader, encode_inputs
+from compiler.comparison import OutputComparator
+from compiler.execution import ExecutionSession
+from compiler.judging import judge_submission
+from compiler.processes import Limits
+from compiler.tests.utils import FakeTest
+
+LIMITS = Limits(time=1, memory=256, output=64)
+
+TESTS = [FakeTest(1, '1', '1'), FakeTest(2, '2', '2'), FakeTest(3, '3', '3')]
+
+
+class BatchReaderTests(SimpleTestCase):
+    def test_frames_become_runs(self):
+        runs = []
+        reader = BatchReader([OutputComparator('ab'), OutputComparator('')], lambda i, run: runs.append(run))
+        output = b'0 0 0 0 0.010000 2048 0.020000 2 0\nab1 1 0 0 0.000000 1024 0.000000 0 4\noops'
+        for start in range(0, len(output), 5):
+            reader.feed(output[start:start + 5])
+        self.assertEqual(runs[0]['output'], 'ab')
+        self.assertFalse(runs[0]['error'])
+        self.assertEqual(runs[0]['memory'], 2.0)
+        self.assertEqual(runs[1], {'output': 'oops', 'error': True, 'cpu_time': 0.0, 'wall_time': 0.0, 'memory': 1.0})
+
+    def test_chunks_are_compared_as_they_arrive(self):
+        runs = []
+        reader = BatchReader([OutputComparator('abc')], lambda i, run: runs.append(run))
+        self.assertTrue(reader.feed(b'0 2\nab'))
+        self.assertFalse(reader.feed(b'0 1\nX'))
+        self.assertEqual(runs, [{'output': 'abX', 'error': False, 'mismatch': True, 'cpu_time': 0.0,
+                                 'wall_time': 0.0, 'memory': 0.0}])
+
+    def test_inputs_are_framed(self):
+        self.assertEqual(encode_inputs(['1 2', b'']), b'2\n3\n1 20\n')
+
+
+class BatchedVerdictTests(SimpleTestCase):
+    def judge(self, code, language='python', batched=True):
+        return judge_submission(code, language, TESTS, LIMITS, batched=batched)
+
+    def assertSameVerdict(self, code, status):
+        for batched in (False, True):
+            result = self.judge(code, batched=batched)
+            self.assertEqual(result['status'], status, f'batched={batched}')
+            self.assertEqual(len(result['test_results']), 2, f'batched={batched}')
+
+    def test_accepted(self):
+        self.assertEqual(self.judge('print(input())\n')['status'], 'accepted')
+
+    def test_wrong_answer_then_hang(self):
+        # A per-test run is stopped at the wrong line, so this is not a time limit
+        code = 'import sys\nn = input()\nif n == "2":\n    print(5, flush=True)\n    while True: pass\nprint(n)\n'
+        self.assertSameVerdict(code, 'wrong_answer')
+
+    def test_wrong_answer_is_stopped_early(self):
+        code = 'import sys\nn = input()\nif n == "2":\n    print(5, flush=True)\n    while True: pass\nprint(n)\n'
+        started = time.monotonic()
+        result = self.judge(code)
+        self.assertEqual(result['status'], 'wrong_answer')
+        self.assertLess(time.monotonic() - started, LIMITS.wall_timeout)
+
+    def test_output_limit(self):
+        limits = LIMITS._replace(output=1)
+        tests = [FakeTest(1, '', 'x' * 2000000), FakeTest(2, '', 'x' * 2000000)]
+        code = 'import sys\nwhile True: sys.stdout.write("x")\n'
+        for batched in (False, True):
+            result = judge_submission(code, 'python', tests, limits, batched=batched)
+            self.assertEqual(result['status'], 'output_limit_exceeded', f'batched={batched}')
+
+    def test_runtime_error(self):
+        self.assertSameVerdict('n = input()\nassert n != "2"\nprint(n)\n', 'runtime_error')
+
+    def test_javascript_is_not_batched(self):
+        with ExecutionSession('', 'javascript', LIMITS) as session:
+            self.assertFalse(session.supports_batch())
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from compiler import cgroups
+from compiler.processes import Limits
+
+
+def write(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+class ControlGroupTests(SimpleTestCase):
+    """Against a plain directory laid out like a delegated cgroup."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        write(os.path.join(self.root, 'cgroup.controllers'), 'cpuset cpu io memory pids\n')
+        write(os.path.join(self.root, 'cgroup.subtree_control'), 'memory\n')
+        settings_override = override_settings(
+            JUDGE_CGROUP_ROOT=self.root, JUDGE_CGROUP_PIDS_MAX=32, JUDGE_CGROUP_CPUS=1.5
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        patcher = mock.patch.object(cgroups, '_available', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_group_holds_the_limits(self):
+        group = cgroups.create(Limits(time=1, memory=64, output=1))
+        self.assertEqual(read(os.path.join(self.root, 'cgroup.subtree_control')), '+cpu +pids')
+        self.assertEqual(read(os.path.join(group.path, 'memory.max')), str(64 << 20))
+        self.assertEqual(read(os.path.join(group.path, 'pids.max')), '32')
+        self.assertEqual(read(os.path.join(group.path, 'cpu.max')), '150000 100000')
+
+    def test_usage_comes_from_the_group_counters(self):
+        group = cgroups.create(Limits(time=1, memory=64, output=1))
+        write(os.path.join(group.path, 'cpu.stat'), 'usage_usec 300000\nuser_usec 200000\nsystem_usec 100000\n')
+        write(os.path.join(group.path, 'memory.peak'), f'{10 << 20}\n')
+        write(os.path.join(group.path, 'memory.events'), 'low 0\nhigh 0\nmax 3\noom 1\noom_kill 1\n')
+        usage = group.usage()
+        self.assertEqual((usage.ru_utime, usage.ru_stime, usage.ru_maxrss), (0.2, 0.1, 10 << 10))
+        self.assertTrue(usage.oom_killed)
+
+    def test_missing_counters_fall_back_to_the_launcher(self):
+        group = cgroups.create(Limits(time=1, memory=64, output=1))
+        usage = group.usage(SimpleNamespace(ru_utime=0.5, ru_stime=0.25, ru_maxrss=2048))
+        self.assertEqual((usage.ru_utime, usage.ru_stime, usage.ru_maxrss), (0.5, 0.25, 2048))
+        self.assertFalse(usage.oom_killed)
+
+    def test_disabled_without_the_controllers(self):
+        write(os.path.join(self.root, 'cgroup.controllers'), 'cpu\n')
+        with self.assertLogs('compiler.cgroups', 'WARNING'):
+            self.assertFalse(cgroups.is_enabled())
+        self.assertIsNone(cgroups.create(Limits(time=1, memory=64, output=1)))
@@ -0,0 +1,53 @@
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from compiler.checkers import Checker, CheckerSpec
+from compiler.judging import judge_submission
+from problems.models import Problem, TestCase as ProblemTestCase
+
+SOLUTION = 'print(int(input()) * 2)\n'
+
+# Accepts an output within 1 of the expected number
+NEAR_CHECKER = '''import sys
+expected = int(open(sys.argv[2]).read())
+output = open(sys.argv[3]).read().split()
+sys.exit(0 if output and abs(int(output[0]) - expected) <= 1 else 1)
+'''
+
+
+class CustomCheckerTests(TestCase):
+    def setUp(self):
+        self.problem = Problem.objects.create(title='Double', description='Double it', difficulty='easy')
+        self.test_cases = [
+            ProblemTestCase.objects.create(problem=self.problem, input_data='2', expected_output='5'),
+        ]
+
+    def judge(self, code, checker_code):
+        checker = CheckerSpec('custom', 0.0, checker_code, 'python')
+        return judge_submission(code, 'python', self.test_cases, checker=checker)
+
+    def test_checker_decides_the_verdict(self):
+        self.assertEqual(self.judge(SOLUTION, NEAR_CHECKER)['status'], 'accepted')
+        self.assertEqual(self.judge('print(9)\n', NEAR_CHECKER)['status'], 'wrong_answer')
+
+    def test_missing_checker_is_a_judge_error(self):
+        result = self.judge(SOLUTION, '  \n')
+        self.assertEqual(result['status'], 'internal_error')
+        self.assertEqual(result['test_results'][0]['error'], 'The problem has no checker program')
+
+    def test_crashing_checker_is_a_judge_error(self):
+        result = self.judge(SOLUTION, 'raise SystemExit(3)\n')
+        self.assertEqual(result['status'], 'internal_error')
+
+    def test_unfinished_output_is_closed_with_the_checker(self):
+        with Checker(CheckerSpec('custom', 0.0, NEAR_CHECKER, 'python')) as checker:
+            comparator = checker.comparator(self.test_cases[0])
+            comparator.feed(b'4')
+            output_file = comparator.file
+        self.assertTrue(output_file.closed)
+
+    def test_custom_checker_needs_code(self):
+        self.problem.checker = 'custom'
+        with self.assertRaises(ValidationError) as raised:
+            self.problem.full_clean()
+        self.assertIn('checker_code', raised.exception.message_dict)
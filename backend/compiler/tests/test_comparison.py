@@ -0,0 +1,53 @@
+from django.test import SimpleTestCase
+
+from compiler.comparison import OutputComparator, TokenComparator
+
+CASES = [
+    ('3\n', '3'),
+    ('  3  \n\n', '3'),
+    ('1 2\r\n3\r\n', '1 2\n3'),
+    ('1 2\n3', '1 2\n4'),
+    ('1 2', '1 2\n3'),
+    ('1 2\n3\n4', '1 2\n3'),
+    ('1  2', '1 2'),
+    ('', ''),
+    ('\n', '0'),
+    ('héllo wörld\n', 'héllo wörld'),
+]
+
+
+def compare(comparator, output, chunk_size):
+    data = output.encode()
+    for start in range(0, len(data), chunk_size):
+        if not comparator.feed(data[start:start + chunk_size]):
+            return False
+    return comparator.finish()
+
+
+class OutputComparatorTests(SimpleTestCase):
+    def test_same_as_comparing_stripped_output(self):
+        for output, expected in CASES:
+            for chunk_size in (1, 3, 1024):
+                with self.subTest(output=output, expected=expected, chunk_size=chunk_size):
+                    expected_result = output.replace('\r\n', '\n').strip() == expected.strip()
+                    self.assertEqual(compare(OutputComparator(expected), output, chunk_size), expected_result)
+
+    def test_stops_at_the_first_wrong_line(self):
+        comparator = OutputComparator('1\n2\n3')
+        self.assertTrue(comparator.feed(b'1\n'))
+        self.assertFalse(comparator.feed(b'5\n' + b'x' * 1000))
+        self.assertEqual(comparator.mismatch, {'line': 2, 'column': 1})
+
+
+class TokenComparatorTests(SimpleTestCase):
+    def test_same_as_comparing_tokens(self):
+        for output, expected in CASES:
+            for chunk_size in (1, 3, 1024):
+                with self.subTest(output=output, expected=expected, chunk_size=chunk_size):
+                    expected_result = output.split() == expected.split()
+                    self.assertEqual(compare(TokenComparator(expected), output, chunk_size), expected_result)
+
+    def test_numbers_within_the_tolerance(self):
+        self.assertTrue(compare(TokenComparator('0.3333333 2', 1e-6), '0.33333331\n2.0000001\n', 2))
+        self.assertFalse(compare(TokenComparator('0.3333333 2', 1e-6), '0.3334 2\n', 2))
+        self.assertFalse(compare(TokenComparator('yes', 1e-6), 'no\n', 2))
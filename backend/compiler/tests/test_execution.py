@@ -0,0 +1,28 @@
+import subprocess
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from compiler.execution import ExecutionSession
+
+CPP = '#include <iostream>\nint main() { int n; std::cin >> n; std::cout << n * 2 << std::endl; }\n'
+
+
+@override_settings(JUDGE_ARTIFACT_CACHE_DIR='')
+class ExecutionSessionTests(SimpleTestCase):
+    def test_compiled_once_for_every_run(self):
+        with mock.patch('compiler.execution.subprocess.run', wraps=subprocess.run) as compile_run:
+            with ExecutionSession(CPP, 'cpp') as session:
+                outputs = [session.run(str(n))['output'] for n in range(3)]
+        self.assertEqual(outputs, ['0\n', '2\n', '4\n'])
+        compiles = [call for call in compile_run.call_args_list if any('main.cpp' in part for part in call.args[0])]
+        self.assertEqual(len(compiles), 1)
+
+    def test_compile_error(self):
+        with ExecutionSession('int main() { return x; }', 'cpp') as session:
+            self.assertIn('x', session.compile_error)
+            self.assertEqual(session.run('')['error'], True)
+
+    def test_unsupported_language(self):
+        with self.assertRaises(ValueError):
+            ExecutionSession('', 'cobol')
@@ -0,0 +1,64 @@
+from django.test import SimpleTestCase, override_settings
+
+from compiler.judging import dispatch_order, judge_submission
+from compiler.processes import Limits
+from compiler.tests.utils import FakeTest
+
+LIMITS = Limits(time=1, memory=256, output=64)
+
+# Echoes its input, but fails on "3" and hangs on "5"
+CODE = '''n = input()
+if n == "3":
+    raise SystemExit(1)
+while n == "5":
+    pass
+print(n)
+'''
+
+
+def make_tests(count):
+    return [FakeTest(i, str(i), str(i)) for i in range(1, count + 1)]
+
+
+class JudgeSubmissionTests(SimpleTestCase):
+    def judge(self, test_cases, workers):
+        with override_settings(JUDGE_TEST_WORKERS=workers):
+            return judge_submission(CODE, 'python', test_cases, LIMITS)
+
+    def test_parallel_and_sequential_agree(self):
+        for test_cases in (make_tests(2), make_tests(6)):
+            sequential = self.judge(test_cases, workers=1)
+            parallel = self.judge(test_cases, workers=4)
+            self.assertEqual(parallel['status'], sequential['status'])
+            self.assertEqual(
+                [r['test_case_id'] for r in parallel['test_results']],
+                [r['test_case_id'] for r in sequential['test_results']],
+            )
+
+    def test_results_end_at_the_first_failure(self):
+        result = self.judge(make_tests(6), workers=4)
+        self.assertEqual(result['status'], 'runtime_error')
+        self.assertEqual([r['test_case_id'] for r in result['test_results']], [1, 2, 3])
+
+    def test_unsupported_language(self):
+        result = judge_submission('', 'cobol', make_tests(2), LIMITS)
+        self.assertEqual(result['status'], 'runtime_error')
+        self.assertEqual(len(result['test_results']), 1)
+
+
+class DispatchOrderTests(SimpleTestCase):
+    def setUp(self):
+        self.test_cases = [
+            FakeTest(1, '', '', is_hidden=True, judged_count=10, failure_count=1),
+            FakeTest(2, '', ''),
+            FakeTest(3, '', '', is_hidden=True, judged_count=10, failure_count=5),
+            FakeTest(4, '', '', is_hidden=True),
+        ]
+
+    @override_settings(JUDGE_TEST_ORDER_BY_FAILURES=True)
+    def test_samples_then_likely_failures(self):
+        self.assertEqual(dispatch_order(self.test_cases), [1, 2, 0, 3])
+
+    @override_settings(JUDGE_TEST_ORDER_BY_FAILURES=False)
+    def test_test_order_when_off(self):
+        self.assertEqual(dispatch_order(self.test_cases), [0, 1, 2, 3])
@@ -0,0 +1,31 @@
+from django.test import SimpleTestCase
+
+from compiler.judging import judge_submission
+from compiler.processes import Limits
+from compiler.tests.utils import FakeTest
+
+
+class LimitTests(SimpleTestCase):
+    def judge(self, code, limits, expected_output='ok', language='python'):
+        result = judge_submission(code, language, [FakeTest(1, '', expected_output)], limits)
+        return result['status'], result['test_results'][0]
+
+    def test_time_limit(self):
+        status, _ = self.judge('while True: pass\n', Limits(time=0.5, memory=256, output=64))
+        self.assertEqual(status, 'time_limit_exceeded')
+
+    def test_memory_limit(self):
+        status, _ = self.judge('data = bytearray(200 << 20)\nprint("ok")\n', Limits(time=2, memory=64, output=64))
+        self.assertEqual(status, 'memory_limit_exceeded')
+
+    def test_output_limit(self):
+        code = 'import sys\nwhile True: sys.stdout.write("x" * 4096)\n'
+        status, _ = self.judge(code, Limits(time=2, memory=256, output=1), expected_output='x' * (4 << 20))
+        self.assertEqual(status, 'output_limit_exceeded')
+
+    def test_usage_is_measured(self):
+        code = 'data = bytearray(40 << 20)\nn = 0\nfor i in range(200000): n += i\nprint("ok")\n'
+        _, test_result = self.judge(code, Limits(time=5, memory=256, output=64))
+        self.assertGreater(test_result['cpu_time'], 0)
+        self.assertGreater(test_result['wall_time'], 0)
+        self.assertGreater(test_result['memory'], 40)
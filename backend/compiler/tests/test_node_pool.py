@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from compiler import node_pool
+from compiler.processes import Limits, run_process
+
+LIMITS = Limits(time=2, memory=256, output=64)
+
+SCRIPTS = {
+    'echo': 'process.stdout.write(require("fs").readFileSync(0, "utf8").toUpperCase());\n',
+    'exit_code': 'process.exit(3);\n',
+    'global_state': 'console.log(typeof globalThis.leaked);\nglobalThis.leaked = 1;\n',
+}
+
+
+class NodePoolTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def run_both(self, name, input_data='abc'):
+        path = os.path.join(self.directory, f'{name}.js')
+        with open(path, 'w') as f:
+            f.write(SCRIPTS[name])
+        warm = node_pool.run(['node', path], input_data, LIMITS.wall_timeout, limits=LIMITS)
+        cold = run_process(['node', path], input_data, LIMITS.wall_timeout, limits=LIMITS)
+        self.assertIsNotNone(warm)
+        return warm, cold
+
+    def test_same_result_as_a_cold_start(self):
+        for name in ('echo', 'exit_code'):
+            with self.subTest(name):
+                warm, cold = self.run_both(name)
+                self.assertEqual((warm['output'], warm['error']), (cold['output'], cold['error']))
+
+    def test_runs_do_not_share_globals(self):
+        for _ in range(3):
+            warm, _ = self.run_both('global_state')
+            self.assertEqual(warm['output'], 'undefined\n')
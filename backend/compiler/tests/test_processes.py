@@ -0,0 +1,39 @@
+import sys
+
+from django.test import SimpleTestCase
+
+from compiler.comparison import OutputComparator
+from compiler.processes import MAX_OUTPUT_BYTES, TRUNCATED_MARKER, Limits, run_process
+
+LIMITS = Limits(time=2, memory=256, output=1)
+
+
+def run_python(code, input_data='', limits=LIMITS, comparator=None):
+    return run_process([sys.executable, '-c', code], input_data, limits.wall_timeout, None, limits, comparator)
+
+
+class RunProcessTests(SimpleTestCase):
+    def test_output_and_errors(self):
+        self.assertEqual(run_python('print(input() * 2)', 'ab')['output'], 'abab\n')
+        result = run_python('import sys; sys.exit("bad")')
+        self.assertTrue(result['error'])
+        self.assertEqual(result['output'], 'bad\n')
+
+    def test_long_output_is_cut_for_showing(self):
+        result = run_python(f'print("x" * {MAX_OUTPUT_BYTES * 4})')
+        self.assertFalse(result['error'])
+        self.assertEqual(result['output'], 'x' * MAX_OUTPUT_BYTES + TRUNCATED_MARKER)
+
+    def test_output_limit_counts_everything_written(self):
+        result = run_python('while True: print("x" * 1000)')
+        self.assertTrue(result['output_limit_exceeded'])
+        self.assertLessEqual(len(result['partial_output']), MAX_OUTPUT_BYTES + len(TRUNCATED_MARKER))
+
+    def test_timeout(self):
+        self.assertTrue(run_python('while True: pass', limits=LIMITS._replace(time=0.5))['timed_out'])
+
+    def test_mismatch_stops_the_program(self):
+        comparator = OutputComparator('1\n2\n')
+        result = run_python('import time\nprint(1)\nprint(3, flush=True)\ntime.sleep(10)', comparator=comparator)
+        self.assertTrue(result['mismatch'])
+        self.assertLess(result['wall_time'], 5)
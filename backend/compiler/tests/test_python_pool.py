@@ -0,0 +1,49 @@
+import os
+import shutil
+import sys
+import tempfile
+
+from django.test import SimpleTestCase
+
+from compiler import python_pool
+from compiler.processes import Limits, run_process
+
+LIMITS = Limits(time=2, memory=256, output=64)
+
+SCRIPTS = {
+    'echo': 'import sys\nprint(sys.stdin.read().upper(), end="")\n',
+    'main': 'print(__name__)\n',
+    'exit_code': 'import sys\nsys.exit(3)\n',
+    'exception': 'def f():\n    raise ValueError("bad")\nf()\n',
+    'global_state': 'import json\nprint(hasattr(json, "leaked"))\njson.leaked = True\n',
+}
+
+
+class PythonPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def script(self, name):
+        path = os.path.join(self.directory, f'{name}.py')
+        with open(path, 'w') as f:
+            f.write(SCRIPTS[name])
+        return path
+
+    def run_both(self, name, input_data='abc'):
+        command = [sys.executable, self.script(name)]
+        warm = python_pool.run(command, input_data, LIMITS.wall_timeout, limits=LIMITS)
+        cold = run_process(command, input_data, LIMITS.wall_timeout, limits=LIMITS)
+        self.assertIsNotNone(warm)
+        return warm, cold
+
+    def test_same_result_as_a_cold_start(self):
+        for name in ('echo', 'main', 'exit_code', 'exception'):
+            with self.subTest(name):
+                warm, cold = self.run_both(name)
+                self.assertEqual((warm['output'], warm['error']), (cold['output'], cold['error']))
+
+    def test_runs_do_not_share_module_state(self):
+        for _ in range(3):
+            warm, _ = self.run_both('global_state')
+            self.assertEqual(warm['output'], 'False\n')
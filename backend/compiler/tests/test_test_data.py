@@ -0,0 +1,47 @@
+import shutil
+import tempfile
+
+from django.contrib.admin.sites import site
+from django.test import RequestFactory, TestCase, override_settings
+
+from compiler import test_data
+from problems.models import Problem, TestCase as ProblemTestCase
+
+LARGE_INPUT = 'line\n' * 1000
+
+
+class TestDataTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(JUDGE_TEST_DATA_DIR=directory, JUDGE_TEST_DATA_INLINE_LIMIT=100)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.problem = Problem.objects.create(title='Echo', description='Echo', difficulty='easy')
+        self.test_case = ProblemTestCase.objects.create(
+            problem=self.problem, input_data=LARGE_INPUT, expected_output='ok'
+        )
+
+    def test_large_input_is_stored_as_a_file(self):
+        self.assertTrue(self.test_case.input_hash)
+        self.assertTrue(self.test_case.input_data.endswith(test_data.PREVIEW_MARKER))
+        self.assertEqual(test_data.read_input(self.test_case), LARGE_INPUT.encode())
+
+    def test_saving_the_preview_back_keeps_the_data(self):
+        # As a browser posts it
+        self.test_case.input_data = self.test_case.input_data.replace('\n', '\r\n')
+        self.test_case.is_hidden = True
+        self.test_case.save()
+        self.test_case.refresh_from_db()
+        self.assertEqual(test_data.read_input(self.test_case), LARGE_INPUT.encode())
+
+    def test_edited_preview_is_refused(self):
+        self.test_case.input_data = 'more\n' + self.test_case.input_data
+        with self.assertRaises(ValueError):
+            self.test_case.save()
+
+    def test_admin_shows_stored_values_read_only(self):
+        request = RequestFactory().get('/')
+        readonly = site._registry[ProblemTestCase].get_readonly_fields(request, self.test_case)
+        self.assertIn('input_data', readonly)
+        self.assertNotIn('expected_output', readonly)
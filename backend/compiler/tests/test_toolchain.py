@@ -0,0 +1,37 @@
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from compiler import toolchain
+from compiler.execution import ExecutionSession
+
+PROGRAM = '#include <cstdio>\nint main() { int a, b; scanf("%d %d", &a, &b); printf("%d\\n", a + b); }\n'
+
+
+class ToolchainTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(
+            JUDGE_CPP_PCH_DIR=directory, JUDGE_CPP_PRECOMPILED_HEADERS=['cstdio'], JUDGE_ARTIFACT_CACHE_DIR=''
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_precompiled_headers_are_used_once_built(self):
+        command = toolchain.compile_command()
+        self.assertFalse(toolchain.is_ready())
+        toolchain.build_precompiled_headers()
+        self.assertEqual(toolchain.with_precompiled_headers(command)[1:3], ['-I', toolchain.pch_dir()])
+
+    def test_program_builds_with_the_headers(self):
+        toolchain.build_precompiled_headers()
+        with ExecutionSession(PROGRAM, 'cpp') as session:
+            self.assertIsNone(session.compile_error)
+            self.assertEqual(session.run('40 2')['output'], '42\n')
+
+    def test_headers_are_kept_per_profile(self):
+        directory = toolchain.pch_dir()
+        with override_settings(JUDGE_CPP_OPTIMIZATION='-O0'):
+            self.assertNotEqual(toolchain.pch_dir(), directory)
@@ -0,0 +1,64 @@
+from django.test import TestCase, override_settings
+
+from compiler import verdict_cache
+from compiler.execution import COMPILE_TIMED_OUT
+from problems.models import Problem, TestCase as ProblemTestCase
+
+CODE = 'print(3)\n'
+
+
+def verdict(status, compile_output=''):
+    return {
+        'status': status,
+        'runtime': 0.01,
+        'memory': 4.0,
+        'test_results': [],
+        'compile_output': compile_output,
+    }
+
+
+@override_settings(JUDGE_VERDICT_CACHE=True)
+class VerdictCacheTests(TestCase):
+    def setUp(self):
+        self.problem = Problem.objects.create(title='Sum', description='Add', difficulty='easy')
+        self.test_case = ProblemTestCase.objects.create(problem=self.problem, input_data='1 2', expected_output='3')
+        self.problem.refresh_from_db()
+
+    def test_stored_verdict_is_found(self):
+        verdict_cache.store(self.problem, 'python', CODE, verdict('accepted'))
+        entry = verdict_cache.lookup(self.problem, 'python', CODE + '\n  ')
+        self.assertEqual(entry.status, 'accepted')
+
+    def test_lookup_does_not_load_the_tests(self):
+        verdict_cache.store(self.problem, 'python', CODE, verdict('accepted'))
+        # The entry, and its hit count
+        with self.assertNumQueries(2):
+            verdict_cache.lookup(self.problem, 'python', CODE)
+
+    def test_editing_a_test_invalidates(self):
+        verdict_cache.store(self.problem, 'python', CODE, verdict('accepted'))
+        self.test_case.expected_output = '4'
+        self.test_case.save()
+        self.problem.refresh_from_db()
+        self.assertIsNone(verdict_cache.lookup(self.problem, 'python', CODE))
+
+    def test_editing_the_problem_invalidates(self):
+        verdict_cache.store(self.problem, 'python', CODE, verdict('accepted'))
+        self.problem.time_limit = 1.0
+        self.problem.save()
+        self.problem.refresh_from_db()
+        self.assertIsNone(verdict_cache.lookup(self.problem, 'python', CODE))
+
+    def test_verdict_judged_on_old_tests_is_not_served(self):
+        stale = Problem.objects.get(id=self.problem.id)
+        ProblemTestCase.objects.create(problem=self.problem, input_data='2 2', expected_output='4')
+        verdict_cache.store(stale, 'python', CODE, verdict('accepted'))
+        self.problem.refresh_from_db()
+        self.assertIsNone(verdict_cache.lookup(self.problem, 'python', CODE))
+
+    def test_machine_dependent_verdicts_are_not_cached(self):
+        for status in ('runtime_error', 'time_limit_exceeded', 'internal_error'):
+            verdict_cache.store(self.problem, 'python', CODE, verdict(status))
+        verdict_cache.store(self.problem, 'cpp', CODE, verdict('compilation_error', COMPILE_TIMED_OUT))
+        self.assertIsNone(verdict_cache.lookup(self.problem, 'python', CODE))
+        self.assertIsNone(verdict_cache.lookup(self.problem, 'cpp', CODE))
@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from compiler import workspaces
+
+MB = 1024 * 1024
+
+Usage = namedtuple('Usage', 'total used free')
+
+
+class WorkspaceManagerTests(SimpleTestCase):
+    def setUp(self):
+        base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base)
+        self.root = os.path.join(base, 'ram')
+        self.fallback_root = os.path.join(base, 'disk')
+
+    def manager(self, min_free=0, max_idle=2):
+        return workspaces.WorkspaceManager(self.root, self.fallback_root, min_free, max_idle)
+
+    def test_directories_are_reused(self):
+        manager = self.manager(min_free=1)
+        path = manager.acquire()
+        open(os.path.join(path, 'main.py'), 'w').close()
+        manager.release(path)
+        self.assertEqual(manager.acquire(), path)
+        self.assertEqual(os.listdir(path), [])
+        self.assertEqual(manager.counters['reused'], 1)
+
+    def test_small_shm_is_used_by_default(self):
+        # Docker's default /dev/shm
+        with mock.patch.object(workspaces, '_disk_usage', return_value=Usage(64 * MB, 4 * MB, 60 * MB)):
+            path = self.manager().acquire()
+        self.assertEqual(os.path.dirname(path), self.root)
+
+    def test_full_root_falls_back_to_disk(self):
+        with mock.patch.object(workspaces, '_disk_usage', return_value=Usage(64 * MB, 60 * MB, 4 * MB)):
+            path = self.manager().acquire()
+        self.assertEqual(os.path.dirname(path), self.fallback_root)
+
+    def test_free_space_is_not_checked_on_every_run(self):
+        manager = self.manager()
+        full = Usage(64 * MB, 60 * MB, 4 * MB)
+        with mock.patch.object(workspaces, '_disk_usage', return_value=full) as disk_usage:
+            paths = [manager.acquire() for _ in range(3)]
+            for path in paths:
+                manager.release(path)
+        self.assertEqual(disk_usage.call_count, 1)
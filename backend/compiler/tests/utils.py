@@ -0,0 +1,12 @@
+class FakeTest:
+    """Stands in for a problems.TestCase with its data stored inline."""
+
+    def __init__(self, id, input_data, expected_output, is_hidden=False, judged_count=0, failure_count=0):
+        self.id = id
+        self.input_data = input_data
+        self.expected_output = expected_output
+        self.input_hash = ''
+        self.expected_output_hash = ''
+        self.is_hidden = is_hidden
+        self.judged_count = judged_count
+        self.failure_count = failure_count
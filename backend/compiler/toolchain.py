@@ -0,0 +1,203 @@
+"""
+The C++ toolchain profile: the standard, optimisation and linking every C++
+program is built with, and the headers precompiled once for it.
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from threading import Lock, Thread
+
+from django.conf import settings
+
+from . import artifact_cache
+
+COMPILER = 'g++'
+
+# Time allowed for precompiling one header, in seconds
+PCH_BUILD_TIMEOUT = 120
+
+# Written into the precompiled header directory once every header is built
+READY_MARKER = '.ready'
+
+_build_lock = Lock()
+_build_thread = None
+
+
+def flags():
+    """The compiler flags of the profile that precompiled headers depend on."""
+    return [f'-std={settings.JUDGE_CPP_STANDARD}', settings.JUDGE_CPP_OPTIMIZATION]
+
+
+def links_statically():
+    return settings.JUDGE_CPP_STATIC
+
+
+def compile_command():
+    """The profile's compile command, without the precompiled headers."""
+    link_flags = ['-static'] if links_statically() else []
+    return [COMPILER, *flags(), '-pipe', '{source}', '-o', '{executable}', *link_flags]
+
+
+def with_precompiled_headers(command):
+    """command plus the include path of the precompiled headers, once they are built."""
+    include_dir = precompiled_include_dir()
+    if include_dir is None:
+        return command
+    return [command[0], '-I', include_dir, *command[1:]]
+
+
+def pch_dir():
+    """Where the precompiled headers of the current profile live."""
+    digest = hashlib.sha256()
+    for part in (artifact_cache.compiler_version(COMPILER), *flags(), *settings.JUDGE_CPP_PRECOMPILED_HEADERS):
+        digest.update(part.encode())
+        digest.update(b'\0')
+    return os.path.join(str(settings.JUDGE_CPP_PCH_DIR), digest.hexdigest()[:16])
+
+
+def is_ready():
+    return os.path.exists(os.path.join(pch_dir(), READY_MARKER))
+
+
+def precompiled_include_dir():
+    """
+    The include directory holding the precompiled headers, or None while
+    they are not built. The first call starts the build in the background.
+    """
+    if not settings.JUDGE_CPP_PRECOMPILED_HEADERS:
+        return None
+    if is_ready():
+        return pch_dir()
+    start_build()
+    return None
+
+
+def start_build():
+    """Build the precompiled headers in a background thread (once per process)."""
+    global _build_thread
+    with _build_lock:
+        if _build_thread is None:
+            _build_thread = Thread(target=build_precompiled_headers, name='judge-pch', daemon=True)
+            _build_thread.start()
+
+
+def build_precompiled_headers():
+    """
+    Build the precompiled headers now unless they already exist.
+    Returns {header: seconds taken, or None if it failed to build}.
+    """
+    path = pch_dir()
+    if is_ready():
+        return {}
+    root = os.path.dirname(path)
+    os.makedirs(root, exist_ok=True)
+
+    # Built out of sight and published with a rename, since several web
+    # processes may build at the same time
+    staging = tempfile.mkdtemp(prefix='build-', dir=root)
+    try:
+        include_dir = os.path.join(staging, 'include')
+        timings = {}
+        for header in settings.JUDGE_CPP_PRECOMPILED_HEADERS:
+            timings[header] = _precompile(header, staging, include_dir)
+        with open(os.path.join(include_dir, READY_MARKER), 'w'):
+            pass
+        try:
+            os.rename(include_dir, path)
+        except OSError:
+            # Another process published the same headers first
+            pass
+        return timings
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _precompile(header, staging, include_dir):
+    # GCC looks for <header>.gch in each include directory before <header>,
+    # so the directory must hold nothing but the .gch files
+    wrapper = os.path.join(staging, 'wrapper.h')
+    with open(wrapper, 'w') as f:
+        f.write(f'#include <{header}>\n')
+    output = os.path.join(include_dir, header + '.gch')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    started = time.monotonic()
+    try:
+        process = subprocess.run(
+            [COMPILER, *flags(), '-x', 'c++-header', wrapper, '-o', output],
+            capture_output=True,
+            timeout=PCH_BUILD_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if process.returncode != 0:
+        return None
+    return time.monotonic() - started
+
+
+SELF_TEST_PROGRAM = '''#include <bits/stdc++.h>
+using namespace std;
+int main() {
+    long long a, b;
+    cin >> a >> b;
+    vector<long long> values = {a, b};
+    cout << accumulate(values.begin(), values.end(), 0LL) << endl;
+}
+'''
+
+# Start-up time is the average of this many runs of the test program
+SELF_TEST_RUNS = 20
+
+
+def self_test():
+    """
+    Compile a typical program with and without the precompiled headers and
+    report the time each build took.
+    """
+    pch_timings = build_precompiled_headers()
+    workdir = tempfile.mkdtemp(prefix='judge-toolchain-')
+    try:
+        source = os.path.join(workdir, 'main.cpp')
+        with open(source, 'w') as f:
+            f.write(SELF_TEST_PROGRAM)
+
+        report = {
+            'compile_command': compile_command(),
+            'precompiled_headers': {header: _round(seconds) for header, seconds in pch_timings.items()},
+            'precompiled_headers_ready': is_ready(),
+        }
+        for name, command in (('without_pch', compile_command()), ('with_pch', with_precompiled_headers(compile_command()))):
+            executable = os.path.join(workdir, name)
+            command = [part.format(source=source, executable=executable) for part in command]
+            started = time.monotonic()
+            process = subprocess.run(command, capture_output=True, timeout=PCH_BUILD_TIMEOUT)
+            report[f'{name}_seconds'] = _round(time.monotonic() - started)
+            report[f'{name}_ok'] = process.returncode == 0 and _runs_correctly(executable)
+
+        report['saved_seconds'] = _round(report['without_pch_seconds'] - report['with_pch_seconds'])
+        report['startup_seconds'] = _round(_startup_time(os.path.join(workdir, 'with_pch')))
+        return report
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _runs_correctly(executable):
+    try:
+        process = subprocess.run([executable], input=b'40 2\n', capture_output=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return process.stdout.strip() == b'42'
+
+
+def _startup_time(executable):
+    started = time.monotonic()
+    for _ in range(SELF_TEST_RUNS):
+        subprocess.run([executable], input=b'1 1\n', capture_output=True, timeout=10)
+    return (time.monotonic() - started) / SELF_TEST_RUNS
+
+
+def _round(seconds):
+    return round(seconds, 3) if seconds is not None else None
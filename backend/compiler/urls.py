@@ -4,5 +4,6 @@ from . import views
 urlpatterns = [
     path('run-code/', views.run_code, name='run_code'),
     path('submit-solution/', views.submit_solution, name='submit_solution'),
+    path('submissions/<int:submission_id>/status/', views.submission_status, name='submission_status'),
     
 ]
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Verdicts of earlier submissions, reused for identical resubmissions while
+the problem's tests_version is unchanged. Only verdicts that depend on
+nothing but the code are cached.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+
+from problems.models import Problem, new_tests_version
+
+from .execution import COMPILE_TIMED_OUT
+from .models import VerdictCache
+
+# Not cached: time limits depend on how busy the machine was, and runtime and
+# judge errors may come from the machine too (e.g. a program that could not start)
+CACHEABLE_STATUSES = (
+    'accepted',
+    'wrong_answer',
+    'compilation_error',
+    'memory_limit_exceeded',
+    'output_limit_exceeded',
+)
+
+
+def is_enabled():
+    return settings.JUDGE_VERDICT_CACHE
+
+
+def code_hash(code):
+    """Hash of the code with line endings and trailing whitespace normalised."""
+    normalised = code.replace('\r\n', '\n').replace('\r', '\n').rstrip()
+    return hashlib.sha256(normalised.encode()).hexdigest()
+
+
+def lookup(problem, language, code):
+    """The cached verdict for this code on the problem's current tests, or None."""
+    if not is_enabled():
+        return None
+    entry = VerdictCache.objects.filter(
+        problem=problem,
+        language=language,
+        code_hash=code_hash(code),
+        tests_fingerprint=problem.tests_version,
+    ).first()
+    if entry is not None:
+        VerdictCache.objects.filter(id=entry.id).update(hits=F('hits') + 1)
+    return entry
+
+
+def store(problem, language, code, result):
+    """
+    Remember a judge_submission() result. problem must have been loaded
+    before the test cases the code was judged on.
+    """
+    if not is_enabled() or result['status'] not in CACHEABLE_STATUSES:
+        return
+    if result['compile_output'] == COMPILE_TIMED_OUT:
+        # The next attempt may be luckier
+        return
+    try:
+        VerdictCache.objects.update_or_create(
+            problem=problem,
+            language=language,
+            code_hash=code_hash(code),
+            tests_fingerprint=problem.tests_version,
+            defaults={
+                'status': result['status'],
+                'runtime': result['runtime'] if result['status'] == 'accepted' else None,
+                'memory': result['memory'] if result['status'] == 'accepted' else None,
+                'test_case_results': result['test_results'],
+                'compile_output': result['compile_output'],
+            },
+        )
+    except IntegrityError:
+        # Another worker stored the same verdict at the same time
+        pass
+
+
+def submission_fields(entry):
+    """Field values for a new Submission or ContestSubmission answered from the cache."""
+    return {
+        'status': entry.status,
+        'runtime': entry.runtime,
+        'memory': entry.memory,
+        'test_case_results': entry.test_case_results,
+        'compile_output': entry.compile_output,
+    }
+
+
+def invalidate(problem_id):
+    """Renew the problem's tests_version and drop its cached verdicts."""
+    Problem.objects.filter(id=problem_id).update(tests_version=new_tests_version())
+    VerdictCache.objects.filter(problem_id=problem_id).delete()
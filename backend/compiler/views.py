@@ -1,153 +1,70 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import get_object_or_404
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 import json
-import subprocess
-import tempfile
-import os
 
 # Import models from the problems app
-from problems.models import Problem, Submission, TestCase
+from problems.models import Problem, Submission
+from .async_execution import AsyncExecutionSession
+from .execution import ExecutionSession
+from .background import enqueue_submission
+from .judging import submission_status_data
+from . import admission, verdict_cache
 
 @csrf_exempt
-def run_code(request):
+async def run_code(request):
+    # Async, so under ASGI a single worker can supervise many running programs
     if request.method == 'POST':
         data = json.loads(request.body)
         code = data.get('code', '')
         language = data.get('language', 'python')
         input_data = data.get('input', '')
         
+        # Turn the request away early when the user or the judge is over budget
+        rejection = await sync_to_async(admission.check_rate)(request, 'playground')
+        if rejection is not None:
+            return rejection
+        slot = admission.acquire_slot('playground')
+        if slot is None:
+            return admission.busy_response('playground')
+        
         # Run code based on language
         try:
-            if language == 'python':
-                result = run_python_code(code, input_data)
-            elif language == 'javascript':
-                result = run_javascript_code(code, input_data)
-            elif language == 'cpp':
-                result = run_cpp_code(code, input_data)
+            if language in ('python', 'javascript', 'cpp'):
+                result = await run_single_async(code, language, input_data)
             else:
                 result = {'output': 'Unsupported language', 'error': True}
         except Exception as e:
             result = {'output': str(e), 'error': True}
+        finally:
+            slot.release()
         
         return JsonResponse(result)
 
 def run_python_code(code, input_data):
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-        f.write(code)
-        code_file = f.name
-    
-    try:
-        # Run the code
-        process = subprocess.run(
-            ['python', code_file],
-            input=input_data,
-            text=True,
-            capture_output=True,
-            timeout=10
-        )
-        
-        # Clean up
-        os.unlink(code_file)
-        
-        if process.returncode == 0:
-            return {'output': process.stdout, 'error': False}
-        else:
-            return {'output': process.stderr, 'error': True}
-    except subprocess.TimeoutExpired:
-        os.unlink(code_file)
-        return {'output': 'Time limit exceeded', 'error': True}
-    except Exception as e:
-        os.unlink(code_file)
-        return {'output': str(e), 'error': True}
+    return run_single(code, 'python', input_data)
 
 def run_javascript_code(code, input_data):
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.js', delete=False) as f:
-        f.write(code)
-        code_file = f.name
-    
-    try:
-        # Run the code
-        process = subprocess.run(
-            ['node', code_file],
-            input=input_data,
-            text=True,
-            capture_output=True,
-            timeout=10
-        )
-        
-        # Clean up
-        os.unlink(code_file)
-        
-        if process.returncode == 0:
-            return {'output': process.stdout, 'error': False}
-        else:
-            return {'output': process.stderr, 'error': True}
-    except subprocess.TimeoutExpired:
-        os.unlink(code_file)
-        return {'output': 'Time limit exceeded', 'error': True}
-    except Exception as e:
-        os.unlink(code_file)
-        return {'output': str(e), 'error': True}
+    return run_single(code, 'javascript', input_data)
 
 def run_cpp_code(code, input_data):
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.cpp', delete=False) as f:
-        f.write(code)
-        code_file = f.name
-    
-    try:
-        # Compile the code
-        executable = code_file.replace('.cpp', '')
-        compile_process = subprocess.run(
-            ['g++', code_file, '-o', executable],
-            capture_output=True,
-            timeout=30
-        )
-        
-        # Clean up source file
-        os.unlink(code_file)
-        
-        if compile_process.returncode != 0:
-            return {'output': compile_process.stderr.decode(), 'error': True}
-        
-        # Run the executable
-        process = subprocess.run(
-            [executable],
-            input=input_data,
-            text=True,
-            capture_output=True,
-            timeout=10
-        )
-        
-        # Clean up executable
-        os.unlink(executable)
-        
-        if process.returncode == 0:
-            return {'output': process.stdout, 'error': False}
-        else:
-            return {'output': process.stderr, 'error': True}
-    except subprocess.TimeoutExpired:
-        try:
-            os.unlink(code_file)
-        except:
-            pass
-        try:
-            os.unlink(executable)
-        except:
-            pass
-        return {'output': 'Time limit exceeded', 'error': True}
-    except Exception as e:
-        try:
-            os.unlink(code_file)
-        except:
-            pass
-        try:
-            os.unlink(executable)
-        except:
-            pass
-        return {'output': str(e), 'error': True}
+    return run_single(code, 'cpp', input_data)
+
+def run_single(code, language, input_data):
+    """
+    Run the code once with the given input.
+    Compilation errors are reported as the output, like runtime errors.
+    """
+    with ExecutionSession(code, language) as session:
+        return session.run(input_data)
+
+async def run_single_async(code, language, input_data):
+    """run_single() for async views."""
+    async with AsyncExecutionSession(code, language) as session:
+        return await session.run_async(input_data)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -161,8 +78,26 @@ def submit_solution(request):
         # Get problem
         problem = get_object_or_404(Problem, id=problem_id)
         
-        # Get all test cases for the problem (both shown and hidden)
-        test_cases = problem.test_cases.all()
+        rejection = admission.check_rate(request, 'submission')
+        if rejection is not None:
+            return rejection
+        
+        # Identical code was already judged on the current tests
+        cached = verdict_cache.lookup(problem, language, code)
+        if cached is not None:
+            submission = Submission.objects.create(
+                user=request.user,
+                problem=problem,
+                code=code,
+                language=language,
+                **verdict_cache.submission_fields(cached)
+            )
+            return JsonResponse(submission_status_data(submission), status=201)
+        
+        # Held until the background judge is done with the submission
+        slot = admission.acquire_slot('submission')
+        if slot is None:
+            return admission.busy_response('submission')
         
         # Create submission with pending status
         submission = Submission.objects.create(
@@ -173,64 +108,24 @@ def submit_solution(request):
             status='pending',
         )
         
-        # Initialize result
-        result = {
-            'status': 'accepted',  # Default to accepted, change if any test fails
-            'runtime': 0.0,
-            'memory': 0.0,
-            'test_results': []  # Store detailed test case results
-        }
-        
-        # Run the code against each test case
-        for i, test_case in enumerate(test_cases):
-            # Execute the code with the test case input
-            output, error = execute_code_submission(code, language, test_case.input_data)
-            
-            # Create test result entry
-            test_result = {
-                'test_case_id': test_case.id,
-                'passed': True,
-                'input': test_case.input_data,
-                'expected_output': test_case.expected_output,
-                'actual_output': output,
-                'error': error
-            }
-            
-            # If there's an execution error, mark as runtime error and break
-            if error:
-                result['status'] = 'runtime_error'
-                test_result['passed'] = False
-                result['test_results'].append(test_result)
-                break
-            
-            # Compare output with expected output
-            if output.strip() != test_case.expected_output.strip():
-                result['status'] = 'wrong_answer'
-                test_result['passed'] = False
-                result['test_results'].append(test_result)
-                break
-            else:
-                # Test case passed
-                result['test_results'].append(test_result)
+        # Judge in the background so the request returns straight away.
+        # Clients poll submission_status (or submission_detail) for the verdict.
+        enqueue_submission(submission, slot)
         
-        # Update submission with results
-        submission.status = result['status']
-        # In a real implementation, we would also capture actual runtime and memory
-        # For now, we'll use placeholder values
-        submission.runtime = result['runtime'] if result['status'] == 'accepted' else None
-        submission.memory = result['memory'] if result['status'] == 'accepted' else None
-        # Store detailed test case results
-        submission.test_case_results = result['test_results']
-        submission.save()
+        return JsonResponse(submission_status_data(submission), status=202)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def submission_status(request, submission_id):
+    if request.method == 'GET':
+        # Only load the verdict columns, not the code
+        submission = get_object_or_404(
+            Submission.objects.only('id', 'status', 'runtime', 'memory', 'test_case_results', 'compile_output'),
+            id=submission_id,
+            user=request.user,
+        )
         
-        # Return detailed results
-        return JsonResponse({
-            'submission_id': submission.id,
-            'status': submission.status,
-            'runtime': submission.runtime,
-            'memory': submission.memory,
-            'test_results': result['test_results']
-        })
+        return JsonResponse(submission_status_data(submission))
 
 # This is a helper function for code execution
 def execute_code_submission(code, language, input_data):
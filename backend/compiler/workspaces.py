@@ -0,0 +1,241 @@
+"""
+Reusable working directories for the code being judged, on the RAM-backed
+JUDGE_WORKSPACE_DIR while it has room and in the system temp directory
+otherwise.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+import time
+from threading import Lock
+
+from django.conf import settings
+
+PREFIX = 'ws-'
+FALLBACK_ROOT = os.path.join(tempfile.gettempdir(), 'judgeflow-workspaces')
+
+# Free space kept in the root when JUDGE_WORKSPACE_MIN_FREE_BYTES is 0: a
+# fraction of its size, up to a cap
+MIN_FREE_FRACTION = 0.25
+MAX_MIN_FREE_BYTES = 256 * 1024 * 1024
+
+# How long a free space check of the root stays good, in seconds
+ROOM_CHECK_SECONDS = 1.0
+
+COUNTERS = ('created', 'reused', 'released', 'discarded', 'cleanup_failures', 'reclaimed', 'fallbacks')
+
+
+class WorkspaceManager:
+    """The workspaces of one web process."""
+
+    def __init__(self, root, fallback_root, min_free, max_idle):
+        self.root = root
+        self.fallback_root = fallback_root
+        self.min_free = min_free
+        self.max_idle = max_idle
+        self.pid = os.getpid()
+        self.idle = []
+        self.in_use = set()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.lock = Lock()
+        self._has_room = False
+        self._room_checked_at = None
+
+    def acquire(self):
+        """An empty directory for one session."""
+        with self.lock:
+            if self.idle:
+                path = self.idle.pop()
+                self.counters['reused'] += 1
+            else:
+                path = tempfile.mkdtemp(prefix=f'{PREFIX}{self.pid}-', dir=self._pick_root())
+                self.counters['created'] += 1
+            self.in_use.add(path)
+        return path
+
+    def release(self, path):
+        """Empty a directory from acquire() and keep it for the next session."""
+        emptied = _empty(path)
+        with self.lock:
+            self.in_use.discard(path)
+            self.counters['released'] += 1
+            if not emptied:
+                self.counters['cleanup_failures'] += 1
+            # Directories on the fallback disk are not kept once RAM is available again
+            on_root = os.path.dirname(path) == self.root
+            if emptied and len(self.idle) < self.max_idle and (on_root or not self._root_has_room()):
+                self.idle.append(path)
+                return
+            self.counters['discarded'] += 1
+        shutil.rmtree(path, ignore_errors=True)
+
+    def close(self):
+        """Remove every directory of this process; called at exit."""
+        with self.lock:
+            paths = self.idle + list(self.in_use)
+            self.idle = []
+            self.in_use = set()
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _pick_root(self):
+        if self._root_has_room():
+            os.makedirs(self.root, exist_ok=True)
+            return self.root
+        self.counters['fallbacks'] += 1
+        os.makedirs(self.fallback_root, exist_ok=True)
+        return self.fallback_root
+
+    def _root_has_room(self):
+        # Called with the lock held
+        now = time.monotonic()
+        if self._room_checked_at is None or now - self._room_checked_at >= ROOM_CHECK_SECONDS:
+            self._room_checked_at = now
+            self._has_room = self._check_room()
+        return self._has_room
+
+    def _check_room(self):
+        try:
+            os.makedirs(self.root, exist_ok=True)
+        except OSError:
+            return False
+        usage = _disk_usage(self.root)
+        if usage is None:
+            return False
+        min_free = self.min_free or min(int(usage.total * MIN_FREE_FRACTION), MAX_MIN_FREE_BYTES)
+        return usage.free >= min_free
+
+
+_manager = None
+_manager_lock = Lock()
+
+
+def get_manager():
+    """The workspace manager of this process, created (after a sweep) on first use."""
+    global _manager
+    with _manager_lock:
+        # A forked web worker must not hand out its parent's directories
+        if _manager is None or _manager.pid != os.getpid():
+            _manager = WorkspaceManager(
+                str(settings.JUDGE_WORKSPACE_DIR),
+                FALLBACK_ROOT,
+                settings.JUDGE_WORKSPACE_MIN_FREE_BYTES,
+                settings.JUDGE_WORKSPACE_IDLE,
+            )
+            atexit.register(_manager.close)
+            _manager.counters['reclaimed'] += sweep()
+        return _manager
+
+
+def acquire():
+    return get_manager().acquire()
+
+
+def release(path):
+    get_manager().release(path)
+
+
+def sweep():
+    """Remove directories left behind by processes that no longer run; returns how many."""
+    removed = 0
+    for path, pid in _workspaces():
+        if not _process_alive(pid):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def stats():
+    """Space and directory counts of both roots, plus this process's counters."""
+    manager = get_manager()
+    roots = {}
+    for root in (manager.root, manager.fallback_root):
+        usage = _disk_usage(root)
+        roots[root] = {
+            'ram_backed': _is_ram_backed(root),
+            'free_bytes': usage.free if usage else None,
+            'total_bytes': usage.total if usage else None,
+        }
+
+    workspaces = _workspaces()
+    with manager.lock:
+        return {
+            'roots': roots,
+            'in_use': len(manager.in_use),
+            'idle': len(manager.idle),
+            'all_processes': len(workspaces),
+            # Directories of dead processes that the next sweep will remove
+            'leaked': sum(1 for _, pid in workspaces if not _process_alive(pid)),
+            **manager.counters,
+        }
+
+
+def _workspaces():
+    """(path, owner pid) of every workspace under both roots."""
+    found = []
+    for root in (str(settings.JUDGE_WORKSPACE_DIR), FALLBACK_ROOT):
+        try:
+            entries = list(os.scandir(root))
+        except OSError:
+            continue
+        for entry in entries:
+            if not entry.name.startswith(PREFIX):
+                continue
+            try:
+                pid = int(entry.name[len(PREFIX):].split('-', 1)[0])
+            except ValueError:
+                continue
+            found.append((entry.path, pid))
+    return found
+
+
+def _empty(path):
+    """Remove everything inside path; False if something could not be removed."""
+    ok = True
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return False
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+        except OSError:
+            ok = False
+    return ok
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _disk_usage(path):
+    try:
+        return shutil.disk_usage(path)
+    except OSError:
+        return None
+
+
+def _is_ram_backed(path):
+    """True if path is on a tmpfs or ramfs mount."""
+    path = os.path.realpath(path)
+    best, fstype = '', None
+    try:
+        with open('/proc/mounts') as f:
+            for line in f:
+                fields = line.split()
+                mount_point = fields[1]
+                if (path == mount_point or path.startswith(mount_point.rstrip('/') + '/')) and len(mount_point) > len(best):
+                    best, fstype = mount_point, fields[2]
+    except OSError:
+        return False
+    return fstype in ('tmpfs', 'ramfs')
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contests', '0002_alter_contestsubmission_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contestsubmission',
+            name='compile_output',
+            field=models.TextField(blank=True, default='', help_text='Compiler output when the build failed'),
+        ),
+        migrations.AddField(
+            model_name='contestsubmission',
+            name='test_case_results',
+            field=models.JSONField(blank=True, help_text='Detailed results for each test case', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contests', '0004_alter_contestsubmission_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contestsubmission',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('wrong_answer', 'Wrong Answer'), ('runtime_error', 'Runtime Error'), ('time_limit_exceeded', 'Time Limit Exceeded'), ('memory_limit_exceeded', 'Memory Limit Exceeded'), ('output_limit_exceeded', 'Output Limit Exceeded'), ('compilation_error', 'Compilation Error')], default='pending', max_length=25),
+        ),
+    ]
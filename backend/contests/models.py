@@ -26,6 +26,11 @@ class ContestSubmission(models.Model):
         ('wrong_answer', 'Wrong Answer'),
         ('runtime_error', 'Runtime Error'),
         ('time_limit_exceeded', 'Time Limit Exceeded'),
+        ('memory_limit_exceeded', 'Memory Limit Exceeded'),
+        ('output_limit_exceeded', 'Output Limit Exceeded'),
+        ('compilation_error', 'Compilation Error'),
+        # The judge failed; the code got no verdict
+        ('internal_error', 'Judge Error'),
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -33,10 +38,14 @@ class ContestSubmission(models.Model):
     problem = models.ForeignKey(Problem, on_delete=models.CASCADE)
     code = models.TextField()
     language = models.CharField(max_length=20, choices=LANGUAGE_CHOICES)
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    status = models.CharField(max_length=25, choices=STATUS_CHOICES, default='pending')
     runtime = models.FloatField(null=True, blank=True)  # in seconds
     memory = models.FloatField(null=True, blank=True)   # in MB
     submitted_at = models.DateTimeField(default=timezone.now)
     
+    # Fields for storing detailed test case results
+    test_case_results = models.JSONField(null=True, blank=True, help_text="Detailed results for each test case")
+    compile_output = models.TextField(blank=True, default='', help_text="Compiler output when the build failed")
+    
     def __str__(self):
         return f"{self.user.username} - {self.contest.name} - {self.problem.title}"
\ No newline at end of file
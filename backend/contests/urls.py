@@ -7,4 +7,5 @@ urlpatterns = [
     path('<int:contest_id>/submissions/', views.contest_submissions, name='contest_submissions'),
     path('create/', views.create_contest, name='create_contest'),
     path('submit/', views.submit_contest_solution, name='submit_contest_solution'),
+    path('submissions/<int:submission_id>/status/', views.contest_submission_status, name='contest_submission_status'),
 ]
\ No newline at end of file
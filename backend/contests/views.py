@@ -8,6 +8,9 @@ from rest_framework.permissions import IsAuthenticated
 import json
 from .models import Contest, ContestSubmission
 from problems.models import Problem
+from compiler.background import enqueue_submission
+from compiler.judging import submission_status_data
+from compiler import admission, verdict_cache
 
 @csrf_exempt
 def contests_list(request):
@@ -151,8 +154,27 @@ def submit_contest_solution(request):
         if not (contest.start_time <= timezone.now() <= contest.end_time):
             return JsonResponse({'error': 'Contest is not active'}, status=400)
         
-        # Import the compiler functions
-        from compiler.views import execute_code_submission
+        rejection = admission.check_rate(request, 'submission')
+        if rejection is not None:
+            return rejection
+        
+        # Identical code was already judged on the current tests
+        cached = verdict_cache.lookup(problem, language, code)
+        if cached is not None:
+            submission = ContestSubmission.objects.create(
+                user=request.user,
+                contest=contest,
+                problem=problem,
+                code=code,
+                language=language,
+                **verdict_cache.submission_fields(cached)
+            )
+            return JsonResponse(submission_status_data(submission), status=201)
+        
+        # Held until the background judge is done with the submission
+        slot = admission.acquire_slot('submission')
+        if slot is None:
+            return admission.busy_response('submission')
         
         # Create contest submission with pending status
         submission = ContestSubmission.objects.create(
@@ -164,63 +186,20 @@ def submit_contest_solution(request):
             status='pending',
         )
         
-        # Get all test cases for the problem (both shown and hidden)
-        test_cases = problem.test_cases.all()
+        # Judge in the background so the request returns straight away
+        enqueue_submission(submission, slot)
         
-        # Initialize result
-        result = {
-            'status': 'accepted',  # Default to accepted, change if any test fails
-            'runtime': 0.0,
-            'memory': 0.0,
-            'test_results': []  # Store detailed test case results
-        }
+        return JsonResponse(submission_status_data(submission), status=202)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def contest_submission_status(request, submission_id):
+    if request.method == 'GET':
+        # Only load the verdict columns, not the code
+        submission = get_object_or_404(
+            ContestSubmission.objects.only('id', 'status', 'runtime', 'memory', 'test_case_results', 'compile_output'),
+            id=submission_id,
+            user=request.user,
+        )
         
-        # Run the code against each test case
-        for i, test_case in enumerate(test_cases):
-            # Execute the code with the test case input
-            output, error = execute_code_submission(code, language, test_case.input_data)
-            
-            # Create test result entry
-            test_result = {
-                'test_case_id': test_case.id,
-                'passed': True,
-                'input': test_case.input_data,
-                'expected_output': test_case.expected_output,
-                'actual_output': output,
-                'error': error
-            }
-            
-            # If there's an execution error, mark as runtime error and break
-            if error:
-                result['status'] = 'runtime_error'
-                test_result['passed'] = False
-                result['test_results'].append(test_result)
-                break
-            
-            # Compare output with expected output
-            if output.strip() != test_case.expected_output.strip():
-                result['status'] = 'wrong_answer'
-                test_result['passed'] = False
-                result['test_results'].append(test_result)
-                break
-            else:
-                # Test case passed
-                result['test_results'].append(test_result)
-        
-        # Update submission with results
-        submission.status = result['status']
-        # In a real implementation, we would also capture actual runtime and memory
-        # For now, we'll use placeholder values
-        submission.runtime = result['runtime'] if result['status'] == 'accepted' else None
-        submission.memory = result['memory'] if result['status'] == 'accepted' else None
-        # Store detailed test case results
-        submission.test_case_results = result['test_results']
-        submission.save()
-        
-        return JsonResponse({
-            'submission_id': submission.id,
-            'status': submission.status,
-            'runtime': submission.runtime,
-            'memory': submission.memory,
-            'test_results': result['test_results']
-        })
\ No newline at end of file
+        return JsonResponse(submission_status_data(submission))
\ No newline at end of file
@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import JudgeJob
 
-# Register your models here.
+@admin.register(JudgeJob)
+class JudgeJobAdmin(admin.ModelAdmin):
+    list_display = ('submission_model', 'submission_id', 'status', 'attempts', 'worker', 'created_at', 'finished_at')
+    list_filter = ('status', 'submission_model')
+    search_fields = ('worker', 'submission_id')
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'heartbeat_at')
@@ -0,0 +1,250 @@
+import json
+import math
+import random
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from compiler import verdict_cache
+from compiler.background import judge_stored_submission
+from compiler.judging import record_result
+from compiler.models import VerdictCache
+from problems.models import Problem, Submission, TestCase
+
+BENCH_USERNAME = 'judge-bench'
+BENCH_PROBLEM_TITLE = 'Benchmark: A + B'
+
+# One program per language and kind; every test is one line "a b", answered with a + b
+SAMPLES = {
+    'python': {
+        'accepted': 'a, b = map(int, input().split())\nprint(a + b)\n',
+        'wrong_answer': 'a, b = map(int, input().split())\nprint(a - b)\n',
+        'time_limit_exceeded': 'while True:\n    pass\n',
+        'compilation_error': 'print(\n',
+    },
+    'javascript': {
+        'accepted': 'const [a, b] = require("fs").readFileSync(0, "utf8").trim().split(/\\s+/).map(Number);\n'
+                    'console.log(a + b);\n',
+        'wrong_answer': 'const [a, b] = require("fs").readFileSync(0, "utf8").trim().split(/\\s+/).map(Number);\n'
+                        'console.log(a - b);\n',
+        'time_limit_exceeded': 'while (true) {}\n',
+        'compilation_error': 'console.log(;\n',
+    },
+    'cpp': {
+        'accepted': '#include <iostream>\nint main() { long long a, b; std::cin >> a >> b; std::cout << a + b; }\n',
+        'wrong_answer': '#include <iostream>\nint main() { long long a, b; std::cin >> a >> b; std::cout << a - b; }\n',
+        'time_limit_exceeded': 'int main() { volatile long long x = 0; while (true) x++; }\n',
+        'compilation_error': 'int main() { return x; }\n',
+    },
+}
+
+# Line comments, used to make every submitted program unique
+COMMENTS = {'python': '#', 'javascript': '//', 'cpp': '//'}
+
+# Interpreted languages only find a syntax error when the program runs
+EXPECTED_STATUS = {
+    ('python', 'compilation_error'): 'runtime_error',
+    ('javascript', 'compilation_error'): 'runtime_error',
+}
+
+KINDS = tuple(SAMPLES['python'])
+
+DEFAULT_MIX = 'accepted=6,wrong_answer=2,time_limit_exceeded=1,compilation_error=1'
+
+PHASES = ('submit', 'prepare', 'tests', 'record', 'total')
+
+PERCENTILES = (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+
+
+class Command(BaseCommand):
+    help = 'Judge a mix of synthetic submissions and report throughput and latency as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submissions', type=int, default=60, help='Submissions to judge')
+        parser.add_argument(
+            '--languages', default=','.join(SAMPLES), help='Comma-separated languages to submit in'
+        )
+        parser.add_argument(
+            '--mix', default=DEFAULT_MIX, help=f'Relative weights of the submission kinds (default {DEFAULT_MIX})'
+        )
+        parser.add_argument('--tests', type=int, default=10, help='Test cases of the benchmark problem')
+        parser.add_argument(
+            '--concurrency', type=int, default=None,
+            help='Submissions judged at the same time (default JUDGE_BACKGROUND_WORKERS)'
+        )
+        parser.add_argument('--time-limit', type=float, default=1.0, help='Time limit of the benchmark problem')
+        parser.add_argument('--seed', type=int, default=None, help='Seed for the order of the submissions')
+        parser.add_argument('--output', help='Write the report to this file instead of stdout')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark submissions afterwards')
+
+    def handle(self, *args, **options):
+        languages = [language.strip() for language in options['languages'].split(',') if language.strip()]
+        unknown = [language for language in languages if language not in SAMPLES]
+        if unknown or not languages:
+            raise CommandError(f'Unknown languages: {", ".join(unknown)} (choose from {", ".join(SAMPLES)})')
+        mix = parse_mix(options['mix'])
+        if options['submissions'] < 1 or options['tests'] < 1:
+            raise CommandError('--submissions and --tests must be at least 1')
+        concurrency = options['concurrency'] or settings.JUDGE_BACKGROUND_WORKERS
+
+        problem = self.set_up_problem(options['tests'], options['time_limit'])
+        user = self.set_up_user()
+
+        rng = random.Random(options['seed'])
+        kinds = list(mix)
+        jobs = [
+            (rng.choice(languages), rng.choices(kinds, weights=[mix[kind] for kind in kinds])[0])
+            for _ in range(options['submissions'])
+        ]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='bench') as executor:
+            samples = list(executor.map(lambda job: self.submit(problem, user, *job), jobs))
+        elapsed = time.perf_counter() - started
+
+        report = {
+            'submissions': len(samples),
+            'concurrency': concurrency,
+            'tests_per_submission': options['tests'],
+            'elapsed': elapsed,
+            'submissions_per_second': len(samples) / elapsed if elapsed else None,
+            'settings': {
+                'JUDGE_TEST_WORKERS': settings.JUDGE_TEST_WORKERS,
+                'JUDGE_QUEUE': settings.JUDGE_QUEUE,
+                'JUDGE_CGROUP_ROOT': str(settings.JUDGE_CGROUP_ROOT),
+            },
+            'phases': summarize_phases(samples),
+            'languages': {},
+        }
+        for language in languages:
+            language_samples = [sample for sample in samples if sample['language'] == language]
+            if not language_samples:
+                continue
+            report['languages'][language] = {
+                'submissions': len(language_samples),
+                'statuses': dict(Counter(sample['status'] for sample in language_samples)),
+                'unexpected_statuses': sum(1 for sample in language_samples if sample['unexpected']),
+                'phases': summarize_phases(language_samples),
+            }
+
+        if not options['keep']:
+            Submission.objects.filter(user=user, problem=problem).delete()
+            VerdictCache.objects.filter(problem=problem).delete()
+
+        text = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(text + '\n')
+        else:
+            self.stdout.write(text)
+
+    def set_up_problem(self, test_count, time_limit):
+        problem, _ = Problem.objects.update_or_create(
+            title=BENCH_PROBLEM_TITLE,
+            defaults={
+                'description': 'Print the sum of the two integers on the input line. Used by bench_judge.',
+                'difficulty': 'easy',
+                'time_limit': time_limit,
+                'checker': 'exact',
+                'batched_execution': False,
+            },
+        )
+        TestCase.objects.filter(problem=problem).delete()
+        rng = random.Random(0)
+        for i in range(test_count):
+            a, b = rng.randint(-10 ** 9, 10 ** 9), rng.randint(-10 ** 9, 10 ** 9)
+            TestCase.objects.create(
+                problem=problem, input_data=f'{a} {b}', expected_output=str(a + b), is_hidden=i >= 2
+            )
+        # Picks up the tests_version the new tests gave it
+        problem.refresh_from_db()
+        return problem
+
+    def set_up_user(self):
+        user, created = User.objects.get_or_create(username=BENCH_USERNAME, defaults={'is_active': False})
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=['password'])
+        return user
+
+    def submit(self, problem, user, language, kind):
+        """
+        One submission, through the same steps as submit_solution() and the
+        background judge. Returns its phase times and verdict.
+        """
+        close_old_connections()
+        try:
+            # Unique code, so the verdict cache never answers it
+            code = f'{SAMPLES[language][kind]}{COMMENTS[language]} {uuid.uuid4()}\n'
+            started = time.perf_counter()
+            # Looked up like submit_solution() does; the unique code always misses
+            verdict_cache.lookup(problem, language, code)
+            submission = Submission.objects.create(
+                user=user, problem=problem, code=code, language=language, status='pending'
+            )
+            submitted = time.perf_counter()
+
+            result, _ = judge_stored_submission(submission)
+            judged = time.perf_counter()
+            record_result(submission, result)
+            verdict_cache.store(problem, language, code, result)
+            finished = time.perf_counter()
+        finally:
+            connection.close()
+
+        phase_times = result['phase_times']
+        expected = EXPECTED_STATUS.get((language, kind), kind)
+        return {
+            'language': language,
+            'kind': kind,
+            'status': result['status'],
+            'unexpected': result['status'] != expected,
+            'times': {
+                'submit': submitted - started,
+                'prepare': phase_times.get('prepare', judged - submitted),
+                'tests': phase_times.get('tests', 0.0),
+                'record': finished - judged,
+                'total': finished - started,
+            },
+        }
+
+
+def parse_mix(text):
+    """'accepted=6,wrong_answer=2' -> {'accepted': 6.0, 'wrong_answer': 2.0}"""
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise CommandError(f'Unknown submission kind {kind!r} in --mix')
+        try:
+            mix[kind] = float(weight) if weight else 1.0
+        except ValueError:
+            raise CommandError(f'Bad weight {weight!r} for {kind} in --mix')
+    if not any(weight > 0 for weight in mix.values()):
+        raise CommandError('--mix needs at least one kind with a positive weight')
+    return mix
+
+
+def summarize_phases(samples):
+    """Latency figures of every phase, in seconds."""
+    summary = {}
+    for phase in PHASES:
+        values = sorted(sample['times'][phase] for sample in samples)
+        summary[phase] = {
+            'mean': sum(values) / len(values),
+            **{name: percentile(values, fraction) for name, fraction in PERCENTILES},
+            'max': values[-1],
+        }
+    return summary
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values."""
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
@@ -0,0 +1,54 @@
+import signal
+from threading import Event, Thread
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from compiler.background import judge_job
+from judge import queue
+
+
+class Command(BaseCommand):
+    help = 'Take queued submissions from the judge job table and judge them (JUDGE_QUEUE = "database")'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=1, help='Jobs judged at the same time')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit as soon as the queue is empty')
+
+    def handle(self, *args, **options):
+        self.stopping = Event()
+        self.worker = queue.worker_name()
+        # Stop taking jobs on SIGTERM / Ctrl-C; the jobs in hand are finished first
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self.stop)
+
+        self.stdout.write(f'Judge worker {self.worker} started with {options["concurrency"]} thread(s)')
+        threads = [
+            Thread(target=self.work, args=(options['poll_interval'], options['once']), name=f'judge-worker-{i}')
+            for i in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        # Joined with a timeout so the main thread keeps handling signals
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(0.5)
+        self.stdout.write(f'Judge worker {self.worker} stopped')
+
+    def stop(self, signum, frame):
+        self.stopping.set()
+
+    def work(self, poll_interval, once):
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                job = queue.claim(self.worker)
+                if job is None:
+                    if once:
+                        return
+                    self.stopping.wait(poll_interval)
+                    continue
+                judge_job(job, self.worker)
+        finally:
+            connection.close()
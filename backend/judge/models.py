@@ -0,0 +1,34 @@
+from django.db import models
+from django.utils import timezone
+
+
+class JudgeJob(models.Model):
+    """A submission queued for the judge worker fleet (see judge.queue)."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    # 'problems.Submission' or 'contests.ContestSubmission'
+    submission_model = models.CharField(max_length=50)
+    submission_id = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0, help_text="Times a worker has claimed this job")
+    worker = models.CharField(max_length=100, blank=True, default='', help_text="Worker holding or last holding the job")
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='judge_job_queue_idx'),
+            models.Index(fields=['status', 'lease_expires_at'], name='judge_job_lease_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.submission_model} {self.submission_id} - {self.status}"
@@ -0,0 +1,139 @@
+"""
+Database-backed job queue for a fleet of judge workers. A worker claims a
+job under a lease of JUDGE_JOB_LEASE seconds and keeps it alive with
+heartbeat(); a job whose lease ran out is claimed again, up to
+JUDGE_JOB_MAX_ATTEMPTS times.
+"""
+import os
+import socket
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import JudgeJob
+
+
+def enqueue(submission, worker=None):
+    """
+    Queue a saved, pending submission for the workers; given a worker, the
+    job is claimed for it straight away.
+    """
+    job = JudgeJob.objects.create(
+        submission_model=submission._meta.label,
+        submission_id=submission.id,
+    )
+    if worker is not None:
+        _take(JudgeJob.objects.filter(id=job.id), worker, timezone.now())
+        job.refresh_from_db()
+    return job
+
+
+def worker_name():
+    """How a worker process identifies itself in the job table."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def get_submission_model(job):
+    return apps.get_model(job.submission_model)
+
+
+def claim(worker):
+    """Take the oldest claimable job for worker; returns the JudgeJob or None."""
+    give_up_expired()
+    now = timezone.now()
+    claimable = JudgeJob.objects.filter(
+        Q(status='queued') | Q(status='running', lease_expires_at__lt=now),
+        attempts__lt=settings.JUDGE_JOB_MAX_ATTEMPTS,
+    ).order_by('created_at', 'id')
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = claimable.select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            _take(JudgeJob.objects.filter(id=job.id), worker, now)
+        job.refresh_from_db()
+        return job
+
+    # No row locks: whoever bumps the attempt counter first has the job
+    for job in claimable[:10]:
+        taken = _take(JudgeJob.objects.filter(id=job.id, attempts=job.attempts, status=job.status), worker, now)
+        if taken:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def _take(jobs, worker, now):
+    return jobs.update(
+        status='running',
+        attempts=F('attempts') + 1,
+        worker=worker,
+        started_at=now,
+        heartbeat_at=now,
+        lease_expires_at=now + timedelta(seconds=settings.JUDGE_JOB_LEASE),
+    )
+
+
+def _held(job, worker):
+    """The job's row, as long as worker still holds it."""
+    return JudgeJob.objects.filter(id=job.id, worker=worker, attempts=job.attempts, status='running')
+
+
+def heartbeat(job, worker):
+    """Extend the lease; False if the job has been taken over in the meantime."""
+    now = timezone.now()
+    return _held(job, worker).update(
+        heartbeat_at=now,
+        lease_expires_at=now + timedelta(seconds=settings.JUDGE_JOB_LEASE),
+    ) == 1
+
+
+def complete(job, worker):
+    """
+    Mark the job done; False if worker no longer holds it. Call inside the
+    transaction that saves the verdict, and only save it if this is True.
+    """
+    return _held(job, worker).update(status='done', finished_at=timezone.now(), lease_expires_at=None) == 1
+
+
+def fail(job, worker, error):
+    """Give up on a job that raised, and mark its submission as an internal error."""
+    with transaction.atomic():
+        if _held(job, worker).update(status='failed', finished_at=timezone.now(), error=error) == 1:
+            _fail_submission(job)
+
+
+def give_up_expired():
+    """Fail the jobs whose last allowed attempt ran out of lease."""
+    expired = JudgeJob.objects.filter(
+        status='running',
+        lease_expires_at__lt=timezone.now(),
+        attempts__gte=settings.JUDGE_JOB_MAX_ATTEMPTS,
+    )
+    for job in expired:
+        with transaction.atomic():
+            gone = JudgeJob.objects.filter(id=job.id, attempts=job.attempts, status='running').update(
+                status='failed',
+                finished_at=timezone.now(),
+                error=f'Lease expired on attempt {job.attempts} (worker {job.worker})',
+            )
+            if gone:
+                _fail_submission(job)
+
+
+def _fail_submission(job):
+    get_submission_model(job).objects.filter(id=job.submission_id, status='pending').update(status='internal_error')
+
+
+def queue_stats():
+    """Number of jobs in each status, plus how many running jobs have an expired lease."""
+    counts = dict.fromkeys(dict(JudgeJob.STATUS_CHOICES), 0)
+    for row in JudgeJob.objects.values('status').annotate(count=Count('id')):
+        counts[row['status']] = row['count']
+    counts['expired'] = JudgeJob.objects.filter(status='running', lease_expires_at__lt=timezone.now()).count()
+    return counts
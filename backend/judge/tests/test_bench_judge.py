@@ -0,0 +1,37 @@
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TransactionTestCase
+
+from judge.management.commands.bench_judge import parse_mix
+from problems.models import Submission
+
+
+class ParseMixTests(SimpleTestCase):
+    def test_weights(self):
+        self.assertEqual(parse_mix('accepted=6, wrong_answer'), {'accepted': 6.0, 'wrong_answer': 1.0})
+
+    def test_bad_mixes(self):
+        for text in ('accepted=x', 'segfault=1', 'accepted=0'):
+            with self.subTest(text=text), self.assertRaises(CommandError):
+                parse_mix(text)
+
+
+class BenchJudgeTests(TransactionTestCase):
+    def test_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'report.json')
+            call_command(
+                'bench_judge', submissions=4, languages='python', mix='accepted=1,wrong_answer=1',
+                tests=2, concurrency=1, seed=1, output=output,
+            )
+            with open(output) as f:
+                report = json.load(f)
+
+        self.assertEqual(report['submissions'], 4)
+        self.assertEqual(report['languages']['python']['unexpected_statuses'], 0)
+        self.assertEqual(set(report['phases']), {'submit', 'prepare', 'tests', 'record', 'total'})
+        self.assertFalse(Submission.objects.exists())
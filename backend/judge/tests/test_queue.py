@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from judge import queue
+from judge.models import JudgeJob
+from problems.models import Problem, Submission
+
+
+@override_settings(JUDGE_JOB_LEASE=60, JUDGE_JOB_MAX_ATTEMPTS=3)
+class QueueTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('alice')
+        problem = Problem.objects.create(title='Sum', description='Add', difficulty='easy')
+        self.submissions = [
+            Submission.objects.create(user=user, problem=problem, code='', language='python') for _ in range(2)
+        ]
+
+    def expire(self, job):
+        JudgeJob.objects.filter(id=job.id).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+
+    def test_jobs_are_claimed_oldest_first_and_once(self):
+        first, second = (queue.enqueue(submission) for submission in self.submissions)
+        self.assertEqual(queue.claim('a:1').id, first.id)
+        self.assertEqual(queue.claim('b:1').id, second.id)
+        self.assertIsNone(queue.claim('c:1'))
+
+    def test_taken_over_job_cannot_be_completed_by_its_old_worker(self):
+        queue.enqueue(self.submissions[0])
+        job = queue.claim('a:1')
+        self.expire(job)
+        taken_over = queue.claim('b:1')
+        self.assertEqual((taken_over.id, taken_over.attempts), (job.id, 2))
+        self.assertFalse(queue.heartbeat(job, 'a:1'))
+        self.assertFalse(queue.complete(job, 'a:1'))
+        self.assertTrue(queue.complete(taken_over, 'b:1'))
+
+    def test_failed_job_marks_its_submission(self):
+        queue.enqueue(self.submissions[0])
+        job = queue.claim('a:1')
+        queue.fail(job, 'a:1', 'boom')
+        self.submissions[0].refresh_from_db()
+        self.assertEqual(self.submissions[0].status, 'internal_error')
+        self.assertEqual(queue.queue_stats()['failed'], 1)
+
+    def test_stats_count_expired_leases(self):
+        queue.enqueue(self.submissions[0])
+        self.expire(queue.claim('a:1'))
+        stats = queue.queue_stats()
+        self.assertEqual((stats['running'], stats['expired']), (1, 1))
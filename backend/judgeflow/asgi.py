@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'judgeflow.settings')
 
 application = get_asgi_application()
+
+# Takes over the submissions of web processes that died while judging them (local judge queue)
+from compiler.background import start_recovery  # noqa: E402
+
+start_recovery()
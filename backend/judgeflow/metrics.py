@@ -0,0 +1,278 @@
+"""
+Counters, gauges and histograms in the Prometheus text format. Each process
+writes its values to METRICS_DIR and /api/metrics/ adds up the files of all
+processes on the machine; it needs the METRICS_TOKEN bearer token.
+"""
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Most seconds between a change and its being written out
+FLUSH_INTERVAL = 1.0
+
+# Upper bounds of the histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+DEAD_NAME = 'dead.json'
+LOCK_NAME = '.lock'
+
+METRICS = {
+    'judge_compile_seconds': ('histogram', 'Time spent compiling a submission'),
+    'judge_spawn_seconds': ('histogram', 'Time spent starting a judged program'),
+    'judge_run_seconds': ('histogram', 'Wall-clock time of one run of a judged program'),
+    'judge_compare_seconds': ('histogram', 'Time spent checking the output of a run after it ended'),
+    'judge_db_write_seconds': ('histogram', 'Time spent saving a verdict'),
+    'judge_verdicts_total': ('counter', 'Judged submissions by verdict'),
+    'judge_timeouts_total': ('counter', 'Runs killed at the wall-clock timeout'),
+    'judge_executions_in_flight': ('gauge', 'Judged programs running now'),
+    'gemini_request_seconds': ('histogram', 'Duration of Gemini API calls'),
+    'gemini_failures_total': ('counter', 'Gemini API calls that failed or returned no text'),
+}
+
+
+def is_enabled():
+    return bool(settings.METRICS_DIR)
+
+
+def metrics_root():
+    root = str(settings.METRICS_DIR)
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+class _Registry:
+    """The values of this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.name = f'{os.getpid()}-{time.time_ns()}.json'
+        self.timer = None
+        # Serialises the writes of the timer thread and of collect()
+        self.flush_lock = threading.Lock()
+
+    def add(self, name, labels, amount):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+            self._schedule_flush()
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.values.get(key)
+            if histogram is None:
+                histogram = self.values[key] = {'buckets': [0] * (len(BUCKETS) + 1), 'sum': 0.0, 'count': 0}
+            histogram['buckets'][_bucket_index(value)] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self.timer is None:
+            self.timer = threading.Timer(FLUSH_INTERVAL, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        """Write this process's values out now."""
+        with self.flush_lock:
+            with self.lock:
+                self.timer = None
+                rows = [[name, dict(labels), _copy(value)] for (name, labels), value in self.values.items()]
+            if not rows:
+                return
+            try:
+                path = os.path.join(metrics_root(), self.name)
+                with open(path + '.tmp', 'w') as f:
+                    json.dump(rows, f)
+                os.replace(path + '.tmp', path)
+            except OSError:
+                # Metrics never get in the way of judging
+                pass
+
+
+def _copy(value):
+    # Histograms keep changing while the copy is written out
+    return {**value, 'buckets': list(value['buckets'])} if isinstance(value, dict) else value
+
+
+def _bucket_index(value):
+    for i, bound in enumerate(BUCKETS):
+        if value <= bound:
+            return i
+    return len(BUCKETS)
+
+
+_registry = _Registry()
+
+
+def _reset_after_fork():
+    # A forked worker starts with its own empty values and file
+    global _registry
+    _registry = _Registry()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(lambda: is_enabled() and _registry.flush())
+
+
+def inc(name, amount=1, **labels):
+    """Add to a counter or gauge."""
+    if is_enabled():
+        _registry.add(name, labels, amount)
+
+
+def observe(name, value, **labels):
+    """Record one value (seconds) in a histogram."""
+    if is_enabled():
+        _registry.observe(name, labels, value)
+
+
+@contextmanager
+def timer(name, **labels):
+    """Observe how long the with block took."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+@contextmanager
+def in_flight(name, **labels):
+    """Count the with block in a gauge while it runs."""
+    inc(name, 1, **labels)
+    try:
+        yield
+    finally:
+        inc(name, -1, **labels)
+
+
+def collect():
+    """
+    The values of every process on this machine, added up:
+    {(name, labels): value}. Folds in the files of exited processes.
+    """
+    if not is_enabled():
+        return {}
+    _registry.flush()
+    root = metrics_root()
+    totals = {}
+    with _locked(root):
+        dead = _read_values(os.path.join(root, DEAD_NAME))
+        gone = []
+        for entry in os.scandir(root):
+            if not entry.name.endswith('.json') or entry.name == DEAD_NAME:
+                continue
+            values = _read_values(entry.path)
+            if _process_alive(entry.name):
+                _add_values(totals, values)
+            else:
+                # Gauges of an exited process no longer mean anything
+                _add_values(dead, {
+                    key: value for key, value in values.items() if METRICS.get(key[0], ('gauge',))[0] != 'gauge'
+                })
+                gone.append(entry.path)
+        if gone:
+            _write_values(os.path.join(root, DEAD_NAME), dead)
+            for path in gone:
+                os.remove(path)
+        _add_values(totals, dead)
+    return totals
+
+
+def _read_values(path):
+    try:
+        with open(path) as f:
+            rows = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    values = {}
+    _add_values(values, {(name, tuple(sorted(labels.items()))): value for name, labels, value in rows})
+    return values
+
+
+def _write_values(path, values):
+    with open(path + '.tmp', 'w') as f:
+        json.dump([[name, dict(labels), value] for (name, labels), value in values.items()], f)
+    os.replace(path + '.tmp', path)
+
+
+def _add_values(totals, values):
+    for key, value in values.items():
+        if isinstance(value, dict):
+            total = totals.setdefault(key, {'buckets': [0] * (len(BUCKETS) + 1), 'sum': 0.0, 'count': 0})
+            total['buckets'] = [a + b for a, b in zip(total['buckets'], value['buckets'])]
+            total['sum'] += value['sum']
+            total['count'] += value['count']
+        else:
+            totals[key] = totals.get(key, 0.0) + value
+
+
+def _process_alive(file_name):
+    try:
+        os.kill(int(file_name.split('-')[0]), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@contextmanager
+def _locked(root):
+    with open(os.path.join(root, LOCK_NAME), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def render(extra=()):
+    """
+    The Prometheus text exposition of collect(), plus extra
+    (name, type, help, [(labels, value)]) families measured at scrape time.
+    """
+    families = {}
+    for (name, labels), value in sorted(collect().items(), key=lambda item: (item[0][0], item[0][1])):
+        families.setdefault(name, []).append((dict(labels), value))
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for labels, value in families.get(name, []):
+            if kind == 'histogram':
+                cumulative = 0
+                for bound, count in zip((*BUCKETS, '+Inf'), value['buckets']):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_labels({**labels, "le": str(bound)})} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {value["sum"]}')
+                lines.append(f'{name}_count{_labels(labels)} {value["count"]}')
+            else:
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+    for name, kind, help_text, samples in extra:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        lines += [f'{name}{_labels(labels)} {_number(value)}' for labels, value in samples]
+    return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items())) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return int(value) if float(value).is_integer() else value
@@ -0,0 +1,145 @@
+"""
+Opt-in request profiling, turned on with PROFILING_ENABLED.
+
+Reports the wall time, CPU time and database queries of every request in a
+Server-Timing header, and keeps cProfile dumps of sampled slow requests in
+PROFILING_DIR.
+"""
+import cProfile
+import logging
+import os
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Repeated queries named in the log line of a slow request
+LOGGED_DUPLICATES = 3
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+
+
+def signature(sql):
+    """The SQL of a query without its values, so repeats of it compare equal."""
+    return _PLACEHOLDER_LISTS.sub('(...)', _LITERALS.sub('?', sql))
+
+
+class QueryLog:
+    """Database execute wrapper that counts and times the queries run through it."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.signatures = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - started
+            self.count += 1
+            self.signatures[signature(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """Queries that repeated an earlier one."""
+        return sum(count - 1 for count in self.signatures.values())
+
+    def most_duplicated(self, limit):
+        return [(count, sql) for sql, count in self.signatures.most_common(limit) if count > 1]
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryLog()
+        profiler = _start_profiler()
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            with ExitStack() as stack:
+                for db in connections.all():
+                    stack.enter_context(db.execute_wrapper(queries))
+                response = self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+        wall = (time.perf_counter() - started) * 1000
+        cpu = (time.thread_time() - cpu_started) * 1000
+
+        timings = [
+            f'total;dur={wall:.1f}',
+            f'cpu;dur={cpu:.1f}',
+            f'db;dur={queries.time * 1000:.1f};desc="{queries.count} queries, {queries.duplicates} duplicates"',
+        ]
+        if response.has_header('Server-Timing'):
+            timings.insert(0, response['Server-Timing'])
+        response['Server-Timing'] = ', '.join(timings)
+        # Lets the frontend's Performance API see the header of cross-origin responses
+        origin = request.headers.get('Origin')
+        if origin and origin in settings.CORS_ALLOWED_ORIGINS:
+            response['Timing-Allow-Origin'] = origin
+
+        logger.info(
+            '%s %s %s: %.0f ms (%.0f ms CPU), %d queries in %.0f ms, %d duplicates',
+            request.method, request.path, response.status_code, wall, cpu,
+            queries.count, queries.time * 1000, queries.duplicates,
+        )
+        if wall > settings.PROFILING_SLOW_MS:
+            self.report_slow(request, response, wall, cpu, queries, profiler)
+        return response
+
+    def report_slow(self, request, response, wall, cpu, queries, profiler):
+        repeated = ''.join(
+            f'\n  {count}x {sql[:300]}' for count, sql in queries.most_duplicated(LOGGED_DUPLICATES)
+        )
+        dump = _write_profile(profiler, request, wall) if profiler is not None else None
+        logger.warning(
+            'Slow request %s %s %s: %.0f ms (%.0f ms CPU), %d queries in %.0f ms, %d duplicates%s%s',
+            request.method, request.path, response.status_code, wall, cpu,
+            queries.count, queries.time * 1000, queries.duplicates,
+            f'; profile in {dump}' if dump else '', repeated,
+        )
+
+
+def _start_profiler():
+    if random.random() >= settings.PROFILING_SAMPLE_RATE:
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ allows one profiler per process; another thread is using it
+        return None
+    return profiler
+
+
+def _write_profile(profiler, request, wall):
+    """Save a profile to PROFILING_DIR and drop the oldest ones over the limit."""
+    root = str(settings.PROFILING_DIR)
+    name = re.sub(r'[^A-Za-z0-9]+', '_', request.path).strip('_')[:80] or 'root'
+    path = os.path.join(root, f'{time.time_ns()}-{request.method}-{name}-{wall:.0f}ms.prof')
+    try:
+        os.makedirs(root, exist_ok=True)
+        profiler.dump_stats(path)
+        # Names start with the time, so they sort oldest first
+        dumps = sorted(entry for entry in os.listdir(root) if entry.endswith('.prof'))
+        for entry in dumps[:max(len(dumps) - settings.PROFILING_MAX_DUMPS, 0)]:
+            os.remove(os.path.join(root, entry))
+    except OSError as e:
+        logger.warning('Could not write the profile of %s: %s', request.path, e)
+        return None
+    return path
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,9 +47,12 @@ INSTALLED_APPS = [
     'contests',
     'compiler',
     'ai_review',
+    'judge',
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest; does nothing unless PROFILING_ENABLED
+    'judgeflow.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -85,6 +90,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # The judge threads write verdicts concurrently. Taking the write lock when
+        # a transaction starts lets them wait for each other (up to timeout seconds)
+        # instead of failing with "database is locked".
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -204,7 +216,7 @@ CORS_ALLOW_CREDENTIALS = False  # Not needed with JWT
 CORS_ALLOW_ALL_ORIGINS = False  # Keep this False for security
 
 # Additional CORS settings for better cookie handling
-CORS_EXPOSE_HEADERS = ['Content-Disposition']
+CORS_EXPOSE_HEADERS = ['Content-Disposition', 'Server-Timing']
 
 # CORS allowed headers
 CORS_ALLOW_HEADERS = [
@@ -242,3 +254,102 @@ CSRF_COOKIE_SAMESITE = 'Lax'
 CSRF_COOKIE_SECURE = False  # Should be True in production with HTTPS
 CSRF_COOKIE_DOMAIN = None
 CSRF_COOKIE_HTTPONLY = False  # Required for CSRF to work with JavaScript
+
+# Judge settings
+# Number of threads per web process that judge submissions in the background
+JUDGE_BACKGROUND_WORKERS = int(os.environ.get('JUDGE_BACKGROUND_WORKERS', 2))
+# Test cases of one submission that may run at the same time in each web process.
+# 1 runs them one after another; 0 uses one per CPU core.
+JUDGE_TEST_WORKERS = int(os.environ.get('JUDGE_TEST_WORKERS', 1))
+# Start the parallel test runs that failed most often first (the reported failing test does not change)
+JUDGE_TEST_ORDER_BY_FAILURES = os.environ.get('JUDGE_TEST_ORDER_BY_FAILURES', '1') == '1'
+# Shared on-disk cache of compiled submissions; set the directory to '' to disable it
+JUDGE_ARTIFACT_CACHE_DIR = os.environ.get('JUDGE_ARTIFACT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'judgeflow-artifacts'))
+JUDGE_ARTIFACT_CACHE_MAX_BYTES = int(os.environ.get('JUDGE_ARTIFACT_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+# Test inputs / expected outputs above this many bytes are kept as files instead of in the
+# database; 0 keeps all test data inline
+JUDGE_TEST_DATA_INLINE_LIMIT = int(os.environ.get('JUDGE_TEST_DATA_INLINE_LIMIT', 0))
+# Where that test data is stored, by content hash; every judge node must see the same files
+JUDGE_TEST_DATA_DIR = os.environ.get('JUDGE_TEST_DATA_DIR', os.path.join(BASE_DIR, 'test-data'))
+# Answer identical resubmissions from the verdict cache instead of judging them again
+JUDGE_VERDICT_CACHE = os.environ.get('JUDGE_VERDICT_CACHE', '1') == '1'
+# Working directories of running submissions; RAM-backed /dev/shm when the system has it
+JUDGE_WORKSPACE_DIR = os.environ.get(
+    'JUDGE_WORKSPACE_DIR',
+    os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'judgeflow-workspaces')
+)
+# Below this much free space in JUDGE_WORKSPACE_DIR, new workspaces go to the system temp directory;
+# 0 means a quarter of its size, at most 256 MB (see compiler.workspaces)
+JUDGE_WORKSPACE_MIN_FREE_BYTES = int(os.environ.get('JUDGE_WORKSPACE_MIN_FREE_BYTES', 0))
+# Emptied workspaces each web process keeps for reuse
+JUDGE_WORKSPACE_IDLE = int(os.environ.get('JUDGE_WORKSPACE_IDLE', 8))
+# Run every judged program in its own cgroup v2 group under this directory, which must be
+# writable by the judge and offer the cpu, memory and pids controllers; '' turns the governor off
+JUDGE_CGROUP_ROOT = os.environ.get('JUDGE_CGROUP_ROOT', '')
+# CPUs a program's cgroup may use at once, and how many processes and threads it may hold
+JUDGE_CGROUP_CPUS = float(os.environ.get('JUDGE_CGROUP_CPUS', 1))
+JUDGE_CGROUP_PIDS_MAX = int(os.environ.get('JUDGE_CGROUP_PIDS_MAX', 64))
+# Pre-warmed Python interpreters per web process; 0 starts a fresh interpreter for every run
+JUDGE_PYTHON_ZYGOTES = int(os.environ.get('JUDGE_PYTHON_ZYGOTES', 2))
+# Pre-started Node.js processes per web process (each runs one script); 0 starts node for every run
+JUDGE_NODE_RUNNERS = int(os.environ.get('JUDGE_NODE_RUNNERS', 2))
+# Idle Node.js runners older than this many seconds are replaced
+JUDGE_NODE_RUNNER_MAX_IDLE = int(os.environ.get('JUDGE_NODE_RUNNER_MAX_IDLE', 300))
+# C++ toolchain profile: language standard, optimisation level and static linking
+JUDGE_CPP_STANDARD = os.environ.get('JUDGE_CPP_STANDARD', 'c++17')
+JUDGE_CPP_OPTIMIZATION = os.environ.get('JUDGE_CPP_OPTIMIZATION', '-O2')
+JUDGE_CPP_STATIC = os.environ.get('JUDGE_CPP_STATIC', '0') == '1'
+# Headers precompiled for the profile (space separated; empty disables) and where they are kept
+JUDGE_CPP_PRECOMPILED_HEADERS = os.environ.get('JUDGE_CPP_PRECOMPILED_HEADERS', 'bits/stdc++.h iostream').split()
+JUDGE_CPP_PCH_DIR = os.environ.get('JUDGE_CPP_PCH_DIR', os.path.join(tempfile.gettempdir(), 'judgeflow-pch'))
+# Admission control for code execution, with separate budgets for playground runs and
+# graded submissions: how many may be in flight at once across all web processes, the
+# Retry-After (seconds) sent when all are taken, and each user's token bucket (burst
+# size and refill rate). Requests over either limit get a 429.
+JUDGE_ADMISSION_DIR = os.environ.get('JUDGE_ADMISSION_DIR', os.path.join(tempfile.gettempdir(), 'judgeflow-admission'))
+JUDGE_ADMISSION = {
+    'playground': {
+        'slots': int(os.environ.get('JUDGE_PLAYGROUND_SLOTS', 4)),
+        'retry_after': int(os.environ.get('JUDGE_PLAYGROUND_RETRY_AFTER', 2)),
+        'burst': int(os.environ.get('JUDGE_PLAYGROUND_BURST', 10)),
+        'per_minute': float(os.environ.get('JUDGE_PLAYGROUND_PER_MINUTE', 30)),
+    },
+    'submission': {
+        'slots': int(os.environ.get('JUDGE_SUBMISSION_SLOTS', 32)),
+        'retry_after': int(os.environ.get('JUDGE_SUBMISSION_RETRY_AFTER', 5)),
+        'burst': int(os.environ.get('JUDGE_SUBMISSION_BURST', 10)),
+        'per_minute': float(os.environ.get('JUDGE_SUBMISSION_PER_MINUTE', 10)),
+    },
+}
+# Header in which the reverse proxy passes on the client's address (X-Real-IP with
+# nginx_ssl.conf), used to tell anonymous clients apart; for X-Forwarded-For the last
+# address is used. Only set it behind a proxy that sets the header, as clients could forge
+# it otherwise. '' uses the address of the connection, which behind a proxy is the proxy's.
+JUDGE_ADMISSION_CLIENT_ADDRESS_HEADER = os.environ.get('JUDGE_ADMISSION_CLIENT_ADDRESS_HEADER', '')
+# Where submissions are judged: 'local' on background threads of the web process that took
+# them (the other web processes take over if it dies), 'database' through the judge app's
+# job table by `manage.py run_judge_worker` processes
+JUDGE_QUEUE = os.environ.get('JUDGE_QUEUE', 'local')
+# Seconds a worker or web process holds a job without a heartbeat before another may take it over
+JUDGE_JOB_LEASE = int(os.environ.get('JUDGE_JOB_LEASE', 60))
+# Claims of one job before it is given up and its submission marked as an internal error
+JUDGE_JOB_MAX_ATTEMPTS = int(os.environ.get('JUDGE_JOB_MAX_ATTEMPTS', 3))
+
+# Metrics served at /api/metrics/ (see judgeflow.metrics): every process on the machine
+# writes its values to this directory; '' stops recording them
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'judgeflow-metrics'))
+# Bearer token a scraper must send to /api/metrics/; without one the endpoint is closed
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Serve /api/metrics/ to anyone when no token is set; only where nothing outside can reach it
+METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', '0') == '1'
+
+# Request profiling (see judgeflow.profiling): per-request query counts, SQL, CPU and
+# wall-clock time in a Server-Timing header, and slow requests logged
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0') == '1'
+# Fraction of requests run under cProfile, and the duration (milliseconds) above which
+# a request is logged as slow and its profile kept
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0.1))
+PROFILING_SLOW_MS = float(os.environ.get('PROFILING_SLOW_MS', 500))
+# Where the kept profiles are written, and how many of the newest stay there
+PROFILING_DIR = os.environ.get('PROFILING_DIR', os.path.join(tempfile.gettempdir(), 'judgeflow-profiles'))
+PROFILING_MAX_DUMPS = int(os.environ.get('PROFILING_MAX_DUMPS', 200))
@@ -0,0 +1,74 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from judgeflow import metrics
+
+# No process has this id
+DEAD_PID = 2 ** 22 + 1
+
+
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(METRICS_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        patcher = mock.patch.object(metrics, '_registry', metrics._Registry())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_values_of_this_process(self):
+        metrics.inc('judge_verdicts_total', language='python', status='accepted')
+        metrics.observe('judge_run_seconds', 0.02, language='python')
+        metrics.observe('judge_run_seconds', 3, language='python')
+        text = metrics.render()
+        self.assertIn('judge_verdicts_total{language="python",status="accepted"} 1', text)
+        self.assertIn('judge_run_seconds_bucket{language="python",le="0.025"} 1', text)
+        self.assertIn('judge_run_seconds_bucket{language="python",le="+Inf"} 2', text)
+        self.assertIn('judge_run_seconds_count{language="python"} 2', text)
+
+    def test_counters_of_exited_processes_are_kept(self):
+        rows = [
+            ['judge_timeouts_total', {'language': 'cpp'}, 4],
+            ['judge_executions_in_flight', {'language': 'cpp'}, 2],
+        ]
+        with open(os.path.join(self.directory, f'{DEAD_PID}-1.json'), 'w') as f:
+            json.dump(rows, f)
+        for _ in range(2):
+            values = metrics.collect()
+            self.assertEqual(values[('judge_timeouts_total', (('language', 'cpp'),))], 4)
+            self.assertNotIn(('judge_executions_in_flight', (('language', 'cpp'),)), values)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, f'{DEAD_PID}-1.json')))
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(METRICS_DIR=directory, JUDGE_ARTIFACT_CACHE_DIR='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    @override_settings(METRICS_TOKEN='', METRICS_PUBLIC=False)
+    def test_closed_without_a_token(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret', METRICS_PUBLIC=False)
+    def test_token_is_required(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+        self.assertEqual(
+            self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401
+        )
+        response = self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'# TYPE', response.content)
+
+    @override_settings(METRICS_TOKEN='', METRICS_PUBLIC=True)
+    def test_public_when_opted_in(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 200)
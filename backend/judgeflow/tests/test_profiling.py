@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from judgeflow.profiling import ProfilingMiddleware, signature
+
+
+def list_users(request):
+    # One query per user: the N+1 pattern the duplicates count shows
+    for user_id in User.objects.values_list('id', flat=True):
+        User.objects.get(id=user_id)
+    return HttpResponse('ok')
+
+
+class SignatureTests(TestCase):
+    def test_values_are_taken_out(self):
+        self.assertEqual(
+            signature("SELECT * FROM t WHERE id = 12 AND name = 'it''s' AND x IN (%s, %s, %s)"),
+            'SELECT * FROM t WHERE id = ? AND name = ? AND x IN (...)',
+        )
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        for name in ('a', 'b', 'c'):
+            User.objects.create_user(name)
+
+    def request(self, **settings):
+        with override_settings(PROFILING_ENABLED=True, PROFILING_DIR=self.directory, **settings):
+            return ProfilingMiddleware(list_users)(RequestFactory().get('/api/problems/'))
+
+    def test_server_timing_counts_duplicate_queries(self):
+        response = self.request(PROFILING_SAMPLE_RATE=0, PROFILING_SLOW_MS=60000)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('desc="4 queries, 2 duplicates"', response['Server-Timing'])
+
+    def test_slow_request_profile_is_kept(self):
+        with self.assertLogs('judgeflow.profiling', 'WARNING'):
+            for _ in range(3):
+                self.request(PROFILING_SAMPLE_RATE=1, PROFILING_SLOW_MS=0, PROFILING_MAX_DUMPS=2)
+        dumps = os.listdir(self.directory)
+        self.assertEqual(len(dumps), 2)
+        self.assertTrue(all('GET-api_problems' in name for name in dumps))
@@ -35,6 +35,7 @@ urlpatterns = [
     path('api/ai-review/', include('ai_review.urls')),
     
     path('api/health/', views.health_check, name='health_check'),
+    path('api/metrics/', views.metrics, name='metrics'),
     path('api/csrf/', get_csrf_token, name='csrf'),
 ]
 
@@ -2,8 +2,11 @@ from django.shortcuts import render
 from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.conf import settings
+import hmac
 import os
 
+from . import metrics as judge_metrics
+
 @ensure_csrf_cookie
 def frontend(request):
     """
@@ -32,4 +35,49 @@ def health_check(request):
     """
     Health check endpoint
     """
-    return JsonResponse({"status": "ok", "message": "JudgeFlow backend is running"})
\ No newline at end of file
+    return JsonResponse({"status": "ok", "message": "JudgeFlow backend is running"})
+
+def metrics(request):
+    """
+    Prometheus metrics of every process on this machine (see judgeflow.metrics),
+    plus the state of the judge's caches and queue at the time of the scrape
+    """
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return HttpResponse('Unauthorized', status=401)
+    elif not settings.METRICS_PUBLIC:
+        return HttpResponse('Set METRICS_TOKEN (or METRICS_PUBLIC) to serve metrics', status=403)
+    return HttpResponse(
+        judge_metrics.render(scrape_time_metrics()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+def scrape_time_metrics():
+    """(name, type, help, samples) of the judge state read for each scrape."""
+    from compiler import artifact_cache, workspaces
+
+    families = []
+    if artifact_cache.is_enabled():
+        stats = artifact_cache.stats()
+        families += [
+            ('judge_artifact_cache_events_total', 'counter', 'Artifact cache lookups and changes',
+             [({'event': event}, stats[event]) for event in artifact_cache.COUNTERS]),
+            ('judge_artifact_cache_entries', 'gauge', 'Builds in the artifact cache', [({}, stats['entries'])]),
+            ('judge_artifact_cache_bytes', 'gauge', 'Size of the artifact cache', [({}, stats['bytes'])]),
+        ]
+
+    stats = workspaces.stats()
+    families += [
+        ('judge_workspace_free_bytes', 'gauge', 'Free space where workspaces are created',
+         [({'root': root}, usage['free_bytes']) for root, usage in stats['roots'].items()
+          if usage['free_bytes'] is not None]),
+        ('judge_workspaces', 'gauge', 'Workspaces on this machine',
+         [({'state': 'all'}, stats['all_processes']), ({'state': 'leaked'}, stats['leaked'])]),
+    ]
+
+    from judge.queue import queue_stats
+
+    families.append(('judge_jobs', 'gauge', 'Judge jobs by status',
+                     [({'status': status}, count) for status, count in queue_stats().items()]))
+    return families
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'judgeflow.settings')
 
 application = get_wsgi_application()
+
+# Takes over the submissions of web processes that died while judging them (local judge queue)
+from compiler.background import start_recovery  # noqa: E402
+
+start_recovery()
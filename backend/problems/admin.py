@@ -8,16 +8,26 @@ class TagAdmin(admin.ModelAdmin):
 
 @admin.register(Problem)
 class ProblemAdmin(admin.ModelAdmin):
-    list_display = ('title', 'difficulty', 'created_at')
-    list_filter = ('difficulty', 'tags')
+    list_display = ('title', 'difficulty', 'time_limit', 'memory_limit', 'created_at')
+    list_filter = ('difficulty', 'batched_execution', 'checker', 'tags')
     search_fields = ('title', 'description')
     filter_horizontal = ('tags',)
 
 @admin.register(TestCase)
 class TestCaseAdmin(admin.ModelAdmin):
-    list_display = ('problem', 'is_hidden')
+    list_display = ('problem', 'is_hidden', 'judged_count', 'failure_count')
     list_filter = ('is_hidden', 'problem')
     search_fields = ('problem__title',)
+    readonly_fields = ('judged_count', 'failure_count')
+
+    def get_readonly_fields(self, request, obj=None):
+        # Values kept in the test data directory only show their preview here
+        readonly = list(self.readonly_fields)
+        if obj is not None and obj.input_hash:
+            readonly.append('input_data')
+        if obj is not None and obj.expected_output_hash:
+            readonly.append('expected_output')
+        return readonly
 
 @admin.register(Submission)
 class SubmissionAdmin(admin.ModelAdmin):
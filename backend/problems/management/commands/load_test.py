@@ -0,0 +1,370 @@
+import http.client
+import json
+import math
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from contests.models import Contest
+from problems.models import Problem, Submission, Tag, TestCase
+
+# Names of the seeded rows, so they can be told apart from real data and cleared
+USERNAME_PREFIX = 'loadtest-'
+PROBLEM_PREFIX = 'Load test problem '
+CONTEST_PREFIX = 'Load test contest '
+
+TAG_NAMES = ['Array', 'String', 'Dynamic Programming', 'Tree', 'Graph', 'Sorting']
+
+# Relative frequency of the statuses of seeded submissions
+SUBMISSION_STATUSES = {
+    'accepted': 45,
+    'wrong_answer': 30,
+    'time_limit_exceeded': 8,
+    'runtime_error': 8,
+    'compilation_error': 6,
+    'memory_limit_exceeded': 3,
+}
+
+BATCH_SIZE = 1000
+
+# The read-heavy endpoints a contest start hits, with the path of one request
+ENDPOINTS = {
+    'problems_list': lambda problem_ids: reverse('problems_list'),
+    'problem_detail': lambda problem_ids: reverse('problem_detail', args=[random.choice(problem_ids)]),
+    'contests_list': lambda problem_ids: reverse('contests_list'),
+    'dashboard_data': lambda problem_ids: reverse('dashboard_data'),
+    'user_submissions': lambda problem_ids: reverse('user_submissions'),
+}
+
+DEFAULT_MIX = 'problems_list=3,problem_detail=5,contests_list=2,dashboard_data=2,user_submissions=3'
+
+PERCENTILES = (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+
+# The db entry of the Server-Timing header written by judgeflow.profiling
+SERVER_TIMING_QUERIES = re.compile(r'\bdb;[^,]*desc="(\d+) queries')
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large synthetic dataset and replay a weighted mix of read requests with JWT auth, '
+        'reporting throughput, latency and database queries per endpoint as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help='Replace the load-test data with a new dataset first')
+        parser.add_argument('--clear', action='store_true', help='Remove the load-test data and exit')
+        parser.add_argument('--problems', type=int, default=2000, help='Problems to seed')
+        parser.add_argument('--users', type=int, default=1000, help='Users to seed')
+        parser.add_argument('--submissions', type=int, default=50000, help='Submissions to seed')
+        parser.add_argument('--contests', type=int, default=100, help='Contests to seed')
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running server (runserver, gunicorn). '
+                 'Without it, requests go through the Django test client in this process, '
+                 'which also counts the database queries of every request. A server running with '
+                 'PROFILING_ENABLED reports its query counts in the Server-Timing header.'
+        )
+        parser.add_argument('--requests', type=int, default=2000, help='Requests to send')
+        parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at the same time')
+        parser.add_argument(
+            '--mix', default=DEFAULT_MIX, help=f'Relative weights of the endpoints (default {DEFAULT_MIX})'
+        )
+        parser.add_argument('--output', help='Write the report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.clear()
+            return
+        mix = parse_mix(options['mix'])
+        if options['seed']:
+            self.clear()
+            self.seed(options['problems'], options['users'], options['submissions'], options['contests'])
+
+        user_ids = list(User.objects.filter(username__startswith=USERNAME_PREFIX).values_list('id', flat=True))
+        problem_ids = list(Problem.objects.filter(title__startswith=PROBLEM_PREFIX).values_list('id', flat=True))
+        if not user_ids or not problem_ids:
+            raise CommandError('There is no load-test data; run with --seed first')
+
+        # Tokens for up to 200 of the users, minted here rather than by logging in
+        # (which would hash passwords)
+        tokens = [str(AccessToken.for_user(user)) for user in User.objects.filter(id__in=user_ids[:200])]
+        endpoints = list(mix)
+        requests = [
+            (endpoint, ENDPOINTS[endpoint](problem_ids), random.choice(tokens))
+            for endpoint in random.choices(endpoints, weights=[mix[e] for e in endpoints], k=options['requests'])
+        ]
+
+        sender = HttpSender(options['url']) if options['url'] else ClientSender()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency'], thread_name_prefix='load') as executor:
+            samples = list(executor.map(lambda request: sender.send(*request), requests))
+        elapsed = time.perf_counter() - started
+        sender.close()
+
+        report = {
+            'target': options['url'] or 'in-process test client',
+            'requests': len(samples),
+            'concurrency': options['concurrency'],
+            'elapsed': elapsed,
+            'requests_per_second': len(samples) / elapsed if elapsed else None,
+            'errors': sum(1 for sample in samples if sample['error']),
+            'dataset': {
+                'problems': len(problem_ids),
+                'users': len(user_ids),
+                'submissions': Submission.objects.filter(user_id__in=user_ids).count(),
+                'contests': Contest.objects.filter(name__startswith=CONTEST_PREFIX).count(),
+            },
+            'endpoints': {},
+        }
+        for endpoint in endpoints:
+            endpoint_samples = [sample for sample in samples if sample['endpoint'] == endpoint]
+            if endpoint_samples:
+                report['endpoints'][endpoint] = summarize(endpoint_samples, elapsed)
+
+        text = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(text + '\n')
+        else:
+            self.stdout.write(text)
+
+    def clear(self):
+        # Submissions, test cases and contest links go with their users and problems
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        Problem.objects.filter(title__startswith=PROBLEM_PREFIX).delete()
+        Contest.objects.filter(name__startswith=CONTEST_PREFIX).delete()
+
+    @transaction.atomic
+    def seed(self, problem_count, user_count, submission_count, contest_count):
+        rng = random.Random(0)
+        now = timezone.now()
+        tags = [Tag.objects.get_or_create(name=name)[0] for name in TAG_NAMES]
+
+        Problem.objects.bulk_create(
+            (
+                Problem(
+                    title=f'{PROBLEM_PREFIX}{i}',
+                    description=' '.join(rng.choices(WORDS, k=rng.randint(60, 200))),
+                    difficulty=rng.choice(('easy', 'medium', 'hard')),
+                    constraints='1 <= n <= 10^5\n-10^9 <= a[i] <= 10^9',
+                )
+                for i in range(problem_count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        problem_ids = list(Problem.objects.filter(title__startswith=PROBLEM_PREFIX).values_list('id', flat=True))
+        Problem.tags.through.objects.bulk_create(
+            (
+                Problem.tags.through(problem_id=problem_id, tag_id=tag.id)
+                for problem_id in problem_ids
+                for tag in rng.sample(tags, rng.randint(1, 3))
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        TestCase.objects.bulk_create(
+            (
+                TestCase(
+                    problem_id=problem_id,
+                    input_data=' '.join(str(rng.randint(-1000, 1000)) for _ in range(20)),
+                    expected_output=str(rng.randint(-20000, 20000)),
+                    is_hidden=i >= 2,
+                )
+                for problem_id in problem_ids
+                for i in range(4)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+        # One unusable password hash for all, since hashing is slow on purpose
+        password = make_password(None)
+        User.objects.bulk_create(
+            (
+                User(username=f'{USERNAME_PREFIX}{i:05d}', email=f'{USERNAME_PREFIX}{i}@example.com', password=password)
+                for i in range(user_count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        user_ids = list(User.objects.filter(username__startswith=USERNAME_PREFIX).values_list('id', flat=True))
+
+        statuses = list(SUBMISSION_STATUSES)
+        weights = list(SUBMISSION_STATUSES.values())
+        Submission.objects.bulk_create(
+            (
+                Submission(
+                    user_id=rng.choice(user_ids),
+                    problem_id=rng.choice(problem_ids),
+                    code='def solve():\n    pass\n' * rng.randint(1, 20),
+                    language=rng.choice(('python', 'javascript', 'cpp')),
+                    status=status,
+                    runtime=rng.uniform(0.01, 1.5) if status == 'accepted' else None,
+                    memory=rng.uniform(3, 64) if status == 'accepted' else None,
+                    submitted_at=now - timedelta(seconds=rng.randint(0, 90 * 24 * 3600)),
+                )
+                for status in rng.choices(statuses, weights=weights, k=submission_count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+        # Past, running and upcoming contests
+        Contest.objects.bulk_create(
+            (
+                Contest(name=f'{CONTEST_PREFIX}{i}', start_time=start, end_time=start + timedelta(hours=2))
+                for i, start in enumerate(
+                    now + timedelta(hours=rng.randint(-60 * 24, 30 * 24)) for _ in range(contest_count)
+                )
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        contest_ids = list(Contest.objects.filter(name__startswith=CONTEST_PREFIX).values_list('id', flat=True))
+        Contest.problems.through.objects.bulk_create(
+            (
+                Contest.problems.through(contest_id=contest_id, problem_id=problem_id)
+                for contest_id in contest_ids
+                for problem_id in rng.sample(problem_ids, min(5, len(problem_ids)))
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        self.stderr.write(
+            f'Seeded {problem_count} problems, {user_count} users, '
+            f'{submission_count} submissions and {contest_count} contests'
+        )
+
+
+class ClientSender:
+    """Sends requests through the Django test client, counting the queries of each."""
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def send(self, endpoint, path, token):
+        if not hasattr(self.local, 'client'):
+            self.local.client = Client(HTTP_HOST='localhost')
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.local.client.get(path, HTTP_AUTHORIZATION=f'Bearer {token}')
+        latency = time.perf_counter() - started
+        return sample(endpoint, response.status_code, latency, len(queries))
+
+    def close(self):
+        # The database connections of the worker threads end with the command
+        pass
+
+
+class HttpSender:
+    """Sends requests to a running server over one keep-alive connection per thread."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise CommandError(f'Not an http(s) URL: {url}')
+        self.parts = parts
+        self.local = threading.local()
+        self.connections = []
+
+    def _connection(self):
+        if not hasattr(self.local, 'connection'):
+            factory = http.client.HTTPSConnection if self.parts.scheme == 'https' else http.client.HTTPConnection
+            self.local.connection = factory(self.parts.hostname, self.parts.port, timeout=60)
+            self.connections.append(self.local.connection)
+        return self.local.connection
+
+    def send(self, endpoint, path, token):
+        http_connection = self._connection()
+        started = time.perf_counter()
+        try:
+            http_connection.request(
+                'GET', self.parts.path.rstrip('/') + path, headers={'Authorization': f'Bearer {token}'}
+            )
+            response = http_connection.getresponse()
+            response.read()
+            status = response.status
+            queries = server_timing_queries(response.getheader('Server-Timing'))
+        except (OSError, http.client.HTTPException):
+            # Counted as an error; the next request opens a new connection
+            http_connection.close()
+            status = queries = None
+        latency = time.perf_counter() - started
+        return sample(endpoint, status, latency, queries)
+
+    def close(self):
+        for http_connection in self.connections:
+            http_connection.close()
+
+
+def server_timing_queries(header):
+    """The query count judgeflow.profiling puts in Server-Timing, if the header has one."""
+    match = SERVER_TIMING_QUERIES.search(header or '')
+    return int(match.group(1)) if match else None
+
+
+def sample(endpoint, status, latency, queries):
+    return {
+        'endpoint': endpoint,
+        'status': status,
+        'error': status is None or status >= 400,
+        'latency': latency,
+        'queries': queries,
+    }
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(sample['latency'] for sample in samples)
+    summary = {
+        'requests': len(samples),
+        'requests_per_second': len(samples) / elapsed if elapsed else None,
+        'errors': sum(1 for sample in samples if sample['error']),
+        'latency': {
+            'mean': sum(latencies) / len(latencies),
+            **{name: percentile(latencies, fraction) for name, fraction in PERCENTILES},
+            'max': latencies[-1],
+        },
+        'queries': None,
+    }
+    queries = [sample['queries'] for sample in samples if sample['queries'] is not None]
+    if queries:
+        summary['queries'] = {'mean': sum(queries) / len(queries), 'max': max(queries)}
+    return summary
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values."""
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+def parse_mix(text):
+    """'problems_list=3,problem_detail=5' -> {'problems_list': 3.0, 'problem_detail': 5.0}"""
+    mix = {}
+    for part in text.split(','):
+        endpoint, _, weight = part.partition('=')
+        endpoint = endpoint.strip()
+        if endpoint not in ENDPOINTS:
+            raise CommandError(f'Unknown endpoint {endpoint!r} in --mix (choose from {", ".join(ENDPOINTS)})')
+        try:
+            mix[endpoint] = float(weight) if weight else 1.0
+        except ValueError:
+            raise CommandError(f'Bad weight {weight!r} for {endpoint} in --mix')
+    if not any(weight > 0 for weight in mix.values()):
+        raise CommandError('--mix needs at least one endpoint with a positive weight')
+    return mix
+
+
+# Filler for problem descriptions
+WORDS = (
+    'given an array of integers return the number of pairs whose sum is divisible by k each query asks '
+    'for the minimum cost path in a grid where you may only move right or down find the longest substring '
+    'without repeating characters the tree is rooted at node one and every edge has a weight'
+).split()
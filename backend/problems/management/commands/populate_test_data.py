@@ -1,6 +1,29 @@
 from django.core.management.base import BaseCommand
 from problems.models import Problem, Tag, TestCase
 
+# Two Sum accepts any pair of indices that adds up to the target, not just the expected one
+TWO_SUM_CHECKER = """import json
+import sys
+
+with open(sys.argv[1]) as f:
+    nums_line, target_line = f.read().strip().split('\\n')[:2]
+nums, target = json.loads(nums_line), int(target_line)
+
+try:
+    with open(sys.argv[3]) as f:
+        i, j = json.loads(f.read())
+except (ValueError, TypeError):
+    print('Expected a list of two indices, like [0,1]')
+    sys.exit(1)
+
+if not all(isinstance(k, int) and 0 <= k < len(nums) for k in (i, j)) or i == j:
+    print('The indices must be two different positions in the array')
+    sys.exit(1)
+if nums[i] + nums[j] != target:
+    print(f'nums[{i}] + nums[{j}] is {nums[i] + nums[j]}, not {target}')
+    sys.exit(1)
+"""
+
 class Command(BaseCommand):
     help = 'Populate the database with test problems and test cases'
 
@@ -23,6 +46,9 @@ class Command(BaseCommand):
                 'description': 'Given an array of integers nums and an integer target, return indices of the two numbers such that they add up to target.',
                 'difficulty': 'easy',
                 'constraints': '2 <= nums.length <= 10^4\n-10^9 <= nums[i] <= 10^9\n-10^9 <= target <= 10^9\nOnly one valid answer exists.',
+                'checker': 'custom',
+                'checker_language': 'python',
+                'checker_code': TWO_SUM_CHECKER,
             },
             {
                 'title': 'Reverse Integer',
@@ -42,11 +68,7 @@ class Command(BaseCommand):
         for problem_data in problems_data:
             problem, created = Problem.objects.get_or_create(
                 title=problem_data['title'],
-                defaults={
-                    'description': problem_data['description'],
-                    'difficulty': problem_data['difficulty'],
-                    'constraints': problem_data['constraints'],
-                }
+                defaults={key: value for key, value in problem_data.items() if key != 'title'}
             )
             # Add tags to the problem
             problem.tags.set(tags[:3])  # Assign first 3 tags to each problem
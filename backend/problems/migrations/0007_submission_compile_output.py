@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0006_alter_submission_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='compile_output',
+            field=models.TextField(blank=True, default='', help_text='Compiler output when the build failed'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0007_submission_compile_output'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='memory_limit',
+            field=models.PositiveIntegerField(default=256, help_text='Memory limit per test case, in MB'),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='output_limit',
+            field=models.PositiveIntegerField(default=64, help_text='Output size limit per test case, in MB'),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='time_limit',
+            field=models.FloatField(default=2.0, help_text='CPU time limit per test case, in seconds'),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('wrong_answer', 'Wrong Answer'), ('runtime_error', 'Runtime Error'), ('time_limit_exceeded', 'Time Limit Exceeded'), ('memory_limit_exceeded', 'Memory Limit Exceeded'), ('compilation_error', 'Compilation Error')], default='pending', max_length=25),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0010_problem_batched_execution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testcase',
+            name='expected_output_hash',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 of the stored expected output', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='testcase',
+            name='input_hash',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 of the stored input', max_length=64),
+        ),
+    ]
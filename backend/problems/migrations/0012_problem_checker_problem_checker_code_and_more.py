@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0011_testcase_expected_output_hash_testcase_input_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='checker',
+            field=models.CharField(choices=[('exact', 'Exact match'), ('tokens', 'Tokens'), ('float', 'Tokens, numbers within a tolerance'), ('custom', 'Checker program')], default='exact', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='checker_code',
+            field=models.TextField(blank=True, help_text='Checker program: run as `checker input expected output`, exits 0 to accept and 1 to reject'),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='checker_language',
+            field=models.CharField(choices=[('python', 'Python'), ('javascript', 'JavaScript'), ('cpp', 'C++')], default='cpp', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='checker_tolerance',
+            field=models.FloatField(default=1e-06, help_text="Absolute or relative error the 'float' checker allows"),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0012_problem_checker_problem_checker_code_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testcase',
+            name='failure_count',
+            field=models.PositiveIntegerField(default=0, help_text='Judged submissions that failed on this test'),
+        ),
+        migrations.AddField(
+            model_name='testcase',
+            name='judged_count',
+            field=models.PositiveIntegerField(default=0, help_text='Judged submissions that ran this test'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:38
+
+import problems.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0014_alter_submission_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='tests_version',
+            field=models.CharField(default=problems.models.new_tests_version, editable=False, max_length=32),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0015_problem_tests_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='problem',
+            name='batched_execution',
+            field=models.BooleanField(default=False, help_text='Run all test cases through one program launch (Python and C++)'),
+        ),
+    ]
@@ -1,3 +1,6 @@
+import uuid
+
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -8,6 +11,9 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
 
+def new_tests_version():
+    return uuid.uuid4().hex
+
 class Problem(models.Model):
     DIFFICULTY_CHOICES = [
         ('easy', 'Easy'),
@@ -22,14 +28,61 @@ class Problem(models.Model):
     tags = models.ManyToManyField(Tag, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     
+    # Resource limits for every test run of a submission
+    time_limit = models.FloatField(default=2.0, help_text="CPU time limit per test case, in seconds")
+    memory_limit = models.PositiveIntegerField(default=256, help_text="Memory limit per test case, in MB")
+    output_limit = models.PositiveIntegerField(default=64, help_text="Output size limit per test case, in MB")
+    batched_execution = models.BooleanField(
+        default=False,
+        help_text="Run all test cases through one program launch (Python and C++)"
+    )
+
+    # How the output of a submission is checked (see compiler.checkers)
+    CHECKER_CHOICES = [
+        ('exact', 'Exact match'),
+        ('tokens', 'Tokens'),
+        ('float', 'Tokens, numbers within a tolerance'),
+        ('custom', 'Checker program'),
+    ]
+    CHECKER_LANGUAGE_CHOICES = [
+        ('python', 'Python'),
+        ('javascript', 'JavaScript'),
+        ('cpp', 'C++'),
+    ]
+    checker = models.CharField(max_length=10, choices=CHECKER_CHOICES, default='exact')
+    checker_tolerance = models.FloatField(
+        default=1e-6, help_text="Absolute or relative error the 'float' checker allows"
+    )
+    checker_code = models.TextField(
+        blank=True,
+        help_text="Checker program: run as `checker input expected output`, exits 0 to accept and 1 to reject"
+    )
+    checker_language = models.CharField(max_length=20, choices=CHECKER_LANGUAGE_CHOICES, default='cpp')
+
+    # Renewed whenever the tests, limits or checker change; cached verdicts are
+    # keyed by it (see compiler.verdict_cache)
+    tests_version = models.CharField(max_length=32, default=new_tests_version, editable=False)
+    
     def __str__(self):
         return self.title
 
+    def clean(self):
+        if self.checker == 'custom' and not self.checker_code.strip():
+            raise ValidationError({'checker_code': "A 'Checker program' checker needs its code"})
+
 class TestCase(models.Model):
     problem = models.ForeignKey(Problem, related_name='test_cases', on_delete=models.CASCADE)
     input_data = models.TextField(help_text="Input for the test case")
     expected_output = models.TextField(help_text="Expected output for the test case")
     is_hidden = models.BooleanField(default=False, help_text="Is this test case hidden from the user?")
+    # Set when the full value is in the test data directory (see compiler.test_data)
+    input_hash = models.CharField(max_length=64, blank=True, default='', help_text="SHA-256 of the stored input")
+    expected_output_hash = models.CharField(
+        max_length=64, blank=True, default='', help_text="SHA-256 of the stored expected output"
+    )
+    # Judging history, kept with queryset updates (see compiler.judging.record_result)
+    judged_count = models.PositiveIntegerField(default=0, help_text="Judged submissions that ran this test")
+    failure_count = models.PositiveIntegerField(default=0, help_text="Judged submissions that failed on this test")
 
     def __str__(self):
         if self.problem_id:
@@ -57,19 +110,25 @@ class Submission(models.Model):
         ('wrong_answer', 'Wrong Answer'),
         ('runtime_error', 'Runtime Error'),
         ('time_limit_exceeded', 'Time Limit Exceeded'),
+        ('memory_limit_exceeded', 'Memory Limit Exceeded'),
+        ('output_limit_exceeded', 'Output Limit Exceeded'),
+        ('compilation_error', 'Compilation Error'),
+        # The judge failed; the code got no verdict
+        ('internal_error', 'Judge Error'),
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     problem = models.ForeignKey(Problem, on_delete=models.CASCADE)
     code = models.TextField()
     language = models.CharField(max_length=20, choices=LANGUAGE_CHOICES)
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    status = models.CharField(max_length=25, choices=STATUS_CHOICES, default='pending')
     runtime = models.FloatField(null=True, blank=True)  # in seconds
     memory = models.FloatField(null=True, blank=True)   # in MB
     submitted_at = models.DateTimeField(default=timezone.now)
     
     # Fields for storing detailed test case results
     test_case_results = models.JSONField(null=True, blank=True, help_text="Detailed results for each test case")
+    compile_output = models.TextField(blank=True, default='', help_text="Compiler output when the build failed")
     
     def __str__(self):
         return f"{self.user.username} - {self.problem.title}"
@@ -0,0 +1,42 @@
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TransactionTestCase
+
+from problems.management.commands.load_test import parse_mix, server_timing_queries
+from problems.models import Problem
+
+
+class HelperTests(SimpleTestCase):
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix('problems_list=3,problem_detail'), {'problems_list': 3.0, 'problem_detail': 1.0})
+        with self.assertRaises(CommandError):
+            parse_mix('admin=1')
+
+    def test_server_timing_queries(self):
+        self.assertEqual(server_timing_queries('app;dur=12.5, db;dur=3.1;desc="7 queries"'), 7)
+        self.assertIsNone(server_timing_queries(None))
+
+
+class LoadTestTests(TransactionTestCase):
+    def test_seed_run_and_clear(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'report.json')
+            call_command(
+                'load_test', seed=True, problems=5, users=3, submissions=20, contests=2,
+                requests=20, concurrency=1, output=output, stderr=io.StringIO(),
+            )
+            with open(output) as f:
+                report = json.load(f)
+
+        self.assertEqual(report['requests'], 20)
+        self.assertEqual(report['errors'], 0)
+
+        call_command('load_test', clear=True)
+        self.assertFalse(Problem.objects.filter(title__startswith='Load test problem ').exists())
+        self.assertFalse(User.objects.filter(username__startswith='loadtest-').exists())
@@ -62,6 +62,8 @@ def problem_detail(request, problem_id):
                 'difficulty': problem.difficulty,
                 'tags': [tag.name for tag in problem.tags.all()],
                 'constraints': problem.constraints,
+                'time_limit': problem.time_limit,
+                'memory_limit': problem.memory_limit,
                 'test_cases': []
             }
             
@@ -113,6 +115,7 @@ def submission_detail(request, submission_id):
             'runtime': submission.runtime,
             'memory': submission.memory,
             'test_case_results': submission.test_case_results,
+            'compile_output': submission.compile_output,
             'submitted_at': submission.submitted_at.isoformat(),
         }
         
@@ -3,7 +3,7 @@ import { cn } from '@/lib/utils';
 import { Check, X, Clock, AlertTriangle, Loader2 } from 'lucide-react';
 
 interface StatusBadgeProps {
-  status: 'accepted' | 'wrong_answer' | 'time_limit' | 'runtime_error' | 'pending';
+  status: 'accepted' | 'wrong_answer' | 'time_limit' | 'runtime_error' | 'internal_error' | 'pending';
   className?: string;
 }
 
@@ -29,6 +29,11 @@ export default function StatusBadge({ status, className }: StatusBadgeProps) {
       icon: AlertTriangle,
       label: 'Runtime Error'
     },
+    internal_error: {
+      variant: 'bg-warning-light text-warning border-warning/20',
+      icon: AlertTriangle,
+      label: 'Judge Error'
+    },
     pending: {
       variant: 'bg-secondary text-secondary-foreground border-border',
       icon: Loader2,
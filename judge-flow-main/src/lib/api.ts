@@ -115,6 +115,8 @@ interface Problem {
   difficulty: 'easy' | 'medium' | 'hard';
   tags: string[];
   constraints: string;
+  time_limit: number;
+  memory_limit: number;
   test_cases: {
     input_data: string;
     expected_output: string;
@@ -125,7 +127,7 @@ interface SubmissionResponse {
   id: number;
   problem_id: number;
   problem_title: string;
-  status: 'accepted' | 'wrong_answer' | 'time_limit_exceeded' | 'runtime_error' | 'pending';
+  status: 'accepted' | 'wrong_answer' | 'time_limit_exceeded' | 'memory_limit_exceeded' | 'output_limit_exceeded' | 'runtime_error' | 'compilation_error' | 'internal_error' | 'pending';
   language: string;
   runtime?: number;
   memory?: number;
@@ -408,17 +410,58 @@ export const rejectPendingQuestion = async (questionId: number) => {
   return response.json();
 };
 
+// Submissions are judged in the background; poll the status endpoint until a verdict is in,
+// giving up after a while (the verdict still shows up on the submissions page later)
+const SUBMISSION_POLL_INTERVAL_MS = 1000;
+const SUBMISSION_POLL_TIMEOUT_MS = 5 * 60 * 1000;
+
+const waitForVerdict = async (statusUrl: string) => {
+  const deadline = Date.now() + SUBMISSION_POLL_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    const response = await authenticatedRequest(statusUrl, {
+      method: 'GET',
+    });
+    
+    if (!response.ok) {
+      throw new Error('Failed to fetch submission status');
+    }
+    
+    const result = await response.json();
+    if (result.status !== 'pending') {
+      return result;
+    }
+    
+    await new Promise((resolve) => setTimeout(resolve, SUBMISSION_POLL_INTERVAL_MS));
+  }
+  throw new Error('Judging is taking longer than usual, check your submissions page for the verdict');
+};
+
+// The judge answers 429 when it is at capacity or the user is over their budget
+const throwIfTooManyRequests = (response: Response) => {
+  if (response.status === 429) {
+    const retryAfter = response.headers.get('Retry-After');
+    throw new Error(`The judge is busy, please try again in ${retryAfter ?? 'a few'} seconds`);
+  }
+};
+
 export const submitSolution = async (data: SubmitSolutionData) => {
   const response = await authenticatedRequest(`${API_BASE_URL}/compiler/submit-solution/`, {
     method: 'POST',
     body: JSON.stringify(data),
   });
   
+  throwIfTooManyRequests(response);
   if (!response.ok) {
     throw new Error('Failed to submit solution');
   }
   
-  return response.json();
+  const submission = await response.json();
+  // Identical resubmissions are answered from the verdict cache straight away
+  if (submission.status !== 'pending') {
+    return submission;
+  }
+  const { submission_id } = submission;
+  return waitForVerdict(`${API_BASE_URL}/compiler/submissions/${submission_id}/status/`);
 };
 
 export const getUserSubmissions = async (): Promise<{ submissions: SubmissionResponse[] }> => {
@@ -501,11 +544,18 @@ export const submitContestSolution = async (data: any) => {
     body: JSON.stringify(data),
   });
   
+  throwIfTooManyRequests(response);
   if (!response.ok) {
     throw new Error('Failed to submit contest solution');
   }
   
-  return response.json();
+  const submission = await response.json();
+  // Identical resubmissions are answered from the verdict cache straight away
+  if (submission.status !== 'pending') {
+    return submission;
+  }
+  const { submission_id } = submission;
+  return waitForVerdict(`${API_BASE_URL}/contests/submissions/${submission_id}/status/`);
 };
 
 // Compiler APIs
@@ -515,6 +565,7 @@ export const runCode = async (data: RunCodeData) => {
     body: JSON.stringify(data),
   });
   
+  throwIfTooManyRequests(response);
   if (!response.ok) {
     throw new Error('Failed to run code');
   }
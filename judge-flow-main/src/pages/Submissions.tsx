@@ -111,6 +111,9 @@ export default function Submissions() {
                 <SelectItem value="wrong_answer">Wrong Answer</SelectItem>
                 <SelectItem value="runtime_error">Runtime Error</SelectItem>
                 <SelectItem value="time_limit_exceeded">Time Limit Exceeded</SelectItem>
+                <SelectItem value="memory_limit_exceeded">Memory Limit Exceeded</SelectItem>
+                <SelectItem value="output_limit_exceeded">Output Limit Exceeded</SelectItem>
+                <SelectItem value="internal_error">Judge Error</SelectItem>
                 <SelectItem value="pending">Pending</SelectItem>
               </SelectContent>
             </Select>